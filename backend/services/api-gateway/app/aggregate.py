@@ -0,0 +1,128 @@
+"""Declarative fan-out for composite pages (backend-for-frontend).
+
+A composite is a named set of legs, each a gateway path template. All legs
+run concurrently with their own timeout; failures of optional legs are
+reported next to the data instead of failing the whole page.
+"""
+from __future__ import annotations
+
+import asyncio
+import string
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Set, Tuple
+from urllib.parse import quote
+
+import httpx
+
+
+@dataclass(frozen=True, slots=True)
+class Leg:
+    path: str
+    timeout: float = 2.0
+    required: bool = False
+
+    @property
+    def placeholders(self) -> Set[str]:
+        return {name for _, name, _, _ in string.Formatter().parse(self.path) if name}
+
+
+@dataclass(frozen=True, slots=True)
+class Composite:
+    legs: Dict[str, Leg]
+    params: Tuple[str, ...] = field(default=())
+
+
+COMPOSITES: Dict[str, Composite] = {
+    "game": Composite(
+        params=("game_id",),
+        legs={
+            "game": Leg("/api/v1/catalog/games/{game_id}", timeout=2.0, required=True),
+            "review_stats": Leg("/api/v1/reviews/game/{game_id}/stats", timeout=1.5),
+            "reviews": Leg("/api/v1/reviews/game/{game_id}?limit=5", timeout=1.5),
+            "similar": Leg("/api/v1/recommendations/games/{game_id}/similar?limit=10", timeout=1.0),
+        },
+    ),
+    "profile": Composite(
+        params=("user_id",),
+        legs={
+            "achievements": Leg("/api/v1/achievements/users/{user_id}/overview", timeout=1.5),
+            "reviews": Leg("/api/v1/reviews/user/{user_id}", timeout=1.5),
+            "recommendations": Leg("/api/v1/recommendations/user/{user_id}?limit=10", timeout=1.0),
+        },
+    ),
+}
+
+
+class LegFailed(Exception):
+    def __init__(self, status_code: int, detail: Any) -> None:
+        super().__init__(str(detail))
+        self.status_code = status_code
+        self.detail = detail
+
+
+# (path_with_query, headers) -> upstream response
+LegFetcher = Callable[[str, Dict[str, str]], Awaitable[httpx.Response]]
+
+
+def render_path(leg: Leg, params: Mapping[str, str]) -> str:
+    """Fill the leg's template with URL-escaped parameter values."""
+    return leg.path.format(**{name: quote(str(params[name]), safe="") for name in leg.placeholders})
+
+
+async def _run_leg(leg: Leg, path: str, headers: Dict[str, str], fetch: LegFetcher) -> Any:
+    try:
+        response = await asyncio.wait_for(fetch(path, headers), timeout=leg.timeout)
+    except asyncio.TimeoutError:
+        raise LegFailed(504, f"timed out after {leg.timeout}s")
+    except httpx.HTTPError as exc:
+        raise LegFailed(503, str(exc) or exc.__class__.__name__)
+    if response.status_code >= 400:
+        try:
+            detail = response.json().get("detail", response.text)
+        except (ValueError, AttributeError):
+            detail = response.text
+        raise LegFailed(response.status_code, detail)
+    try:
+        return response.json()
+    except ValueError:
+        return response.text
+
+
+async def aggregate(
+    composite: Composite,
+    params: Mapping[str, str],
+    headers: Dict[str, str],
+    fetch: LegFetcher,
+) -> Tuple[int, Dict[str, Any]]:
+    """Run every leg concurrently and merge the results into one payload.
+
+    Returns ``(status_code, body)``; the status is 200 unless a required leg
+    failed, in which case that leg's status is propagated.
+    """
+    names = list(composite.legs)
+    results = await asyncio.gather(
+        *(
+            _run_leg(composite.legs[name], render_path(composite.legs[name], params), headers, fetch)
+            for name in names
+        ),
+        return_exceptions=True,
+    )
+
+    data: Dict[str, Any] = {}
+    errors: Dict[str, Dict[str, Any]] = {}
+    status_code = 200
+    for name, result in zip(names, results):
+        if isinstance(result, LegFailed):
+            errors[name] = {"status": result.status_code, "detail": result.detail}
+            if composite.legs[name].required and status_code == 200:
+                status_code = result.status_code
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            data[name] = result
+    return status_code, {"data": data, "errors": errors, "partial": bool(errors)}
+
+
+def missing_params(composite: Composite, params: Mapping[str, str]) -> Optional[list]:
+    missing = [name for name in composite.params if not params.get(name)]
+    return missing or None
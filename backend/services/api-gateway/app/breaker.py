@@ -0,0 +1,238 @@
+"""Per-upstream circuit breakers and background health probing."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Awaitable, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+from app.upstream import UpstreamPool
+
+logger = logging.getLogger(__name__)
+
+
+class BreakerState(str, Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, service: str, retry_after: float) -> None:
+        super().__init__(f"Circuit open for {service}")
+        self.service = service
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Rolling-window breaker driven by error rate and slow calls.
+
+    The last ``window`` calls are kept as bad/good outcomes; a call is bad when
+    it fails or takes longer than ``slow_call_seconds``. Once at least
+    ``min_calls`` are recorded and the bad ratio reaches ``failure_rate`` the
+    breaker opens and rejects calls for ``open_seconds``, then lets
+    ``half_open_calls`` trial calls through to decide whether to close again.
+    Health probes open a closed breaker only after ``probe_failures`` failures
+    in a row, so one dropped probe does not reject a healthy upstream's traffic.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        window: int,
+        min_calls: int,
+        failure_rate: float,
+        slow_call_seconds: float,
+        open_seconds: float,
+        half_open_calls: int,
+        probe_failures: int = 3,
+    ) -> None:
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.probe_failures = max(1, probe_failures)
+        self.state = BreakerState.CLOSED
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._trials = 0
+        self._failed_probes = 0
+
+    @classmethod
+    def from_settings(cls, name: str) -> "CircuitBreaker":
+        return cls(
+            name,
+            window=settings.CIRCUIT_BREAKER_WINDOW,
+            min_calls=settings.CIRCUIT_BREAKER_MIN_CALLS,
+            failure_rate=settings.CIRCUIT_BREAKER_FAILURE_RATE,
+            slow_call_seconds=settings.CIRCUIT_BREAKER_SLOW_CALL_SECONDS,
+            open_seconds=settings.CIRCUIT_BREAKER_OPEN_SECONDS,
+            half_open_calls=settings.CIRCUIT_BREAKER_HALF_OPEN_CALLS,
+            probe_failures=settings.CIRCUIT_BREAKER_PROBE_FAILURES,
+        )
+
+    def retry_after(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._opened_at + self.open_seconds - now)
+
+    def allow(self, now: Optional[float] = None) -> bool:
+        """Return True if a call may go upstream right now."""
+        now = time.monotonic() if now is None else now
+        if self.state is BreakerState.OPEN:
+            if now - self._opened_at < self.open_seconds:
+                return False
+            self._half_open()
+        if self.state is BreakerState.HALF_OPEN:
+            if self._trials >= self.half_open_calls:
+                return False
+            self._trials += 1
+        return True
+
+    def record(self, elapsed: float, failed: bool, now: Optional[float] = None) -> None:
+        bad = failed or elapsed >= self.slow_call_seconds
+        if self.state is BreakerState.HALF_OPEN:
+            if bad:
+                self._open(now)
+            else:
+                self._close()
+            return
+        if self.state is BreakerState.OPEN:
+            return
+        self._outcomes.append(bad)
+        if len(self._outcomes) >= self.min_calls:
+            if sum(self._outcomes) / len(self._outcomes) >= self.failure_rate:
+                self._open(now)
+
+    def release(self) -> None:
+        """Return a half-open trial slot for a call that ended without an outcome."""
+        if self.state is BreakerState.HALF_OPEN and self._trials > 0:
+            self._trials -= 1
+
+    def probe_result(self, healthy: bool, now: Optional[float] = None) -> None:
+        """Feed a health-check outcome: repeated failures trip the breaker, successes shorten the wait."""
+        if healthy:
+            self._failed_probes = 0
+            if self.state is BreakerState.OPEN:
+                self._half_open()
+            return
+        self._failed_probes += 1
+        if self.state is BreakerState.HALF_OPEN or (
+            self.state is BreakerState.CLOSED and self._failed_probes >= self.probe_failures
+        ):
+            self._open(now)
+
+    def _open(self, now: Optional[float]) -> None:
+        if self.state is not BreakerState.OPEN:
+            logger.warning("Circuit breaker for %s opened", self.name)
+        self.state = BreakerState.OPEN
+        self._opened_at = time.monotonic() if now is None else now
+        self._trials = 0
+
+    def _half_open(self) -> None:
+        self.state = BreakerState.HALF_OPEN
+        self._trials = 0
+
+    def _close(self) -> None:
+        logger.info("Circuit breaker for %s closed", self.name)
+        self.state = BreakerState.CLOSED
+        self._outcomes.clear()
+        self._trials = 0
+        self._failed_probes = 0
+
+
+class UpstreamHealth:
+    """Registry of breakers plus a prober hitting each upstream's ``/health``."""
+
+    def __init__(self, pool: UpstreamPool) -> None:
+        self._pool = pool
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._probe_task: Optional[asyncio.Task] = None
+        self.health: Dict[str, Dict[str, object]] = {}
+
+    def breaker(self, service: str) -> CircuitBreaker:
+        breaker = self._breakers.get(service)
+        if breaker is None:
+            breaker = CircuitBreaker.from_settings(service)
+            self._breakers[service] = breaker
+        return breaker
+
+    async def call(
+        self, service: str, send: Callable[[], Awaitable[httpx.Response]]
+    ) -> httpx.Response:
+        """Run ``send`` through ``service``'s breaker, failing fast while it is open."""
+        if not settings.CIRCUIT_BREAKER_ENABLED:
+            return await send()
+        breaker = self.breaker(service)
+        if not breaker.allow():
+            raise CircuitOpenError(service, breaker.retry_after())
+        started = time.monotonic()
+        try:
+            response = await send()
+        except httpx.RequestError:
+            breaker.record(time.monotonic() - started, failed=True)
+            raise
+        except BaseException:
+            # Cancelled or unexpected: no verdict on the upstream either way.
+            breaker.release()
+            raise
+        breaker.record(time.monotonic() - started, failed=response.status_code >= 500)
+        return response
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        return {
+            name: {"state": breaker.state.value, **self.health.get(name, {})}
+            for name, breaker in self._breakers.items()
+        }
+
+    # ------------------------- probing ---------------------------- #
+    async def probe(self, service: str, upstream: str) -> bool:
+        started = time.monotonic()
+        try:
+            response = await self._pool.client(service).get(
+                f"{upstream}/health", timeout=settings.HEALTH_PROBE_TIMEOUT
+            )
+            healthy = response.status_code < 500
+        except httpx.HTTPError:
+            healthy = False
+        self.health[service] = {
+            "healthy": healthy,
+            "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            "checked_at": time.time(),
+        }
+        self.breaker(service).probe_result(healthy)
+        return healthy
+
+    async def _probe_loop(self, targets: Callable[[], Iterable[Tuple[str, str]]]) -> None:
+        while True:
+            pairs = list(targets())
+            await asyncio.gather(
+                *(self.probe(service, upstream) for service, upstream in pairs),
+                return_exceptions=True,
+            )
+            await asyncio.sleep(settings.HEALTH_PROBE_INTERVAL)
+
+    def start(self, targets: Callable[[], Iterable[Tuple[str, str]]]) -> None:
+        """Start probing ``(service, upstream_url)`` pairs every HEALTH_PROBE_INTERVAL seconds."""
+        if settings.HEALTH_PROBE_INTERVAL <= 0 or self._probe_task is not None:
+            return
+        self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop(targets))
+
+    async def stop(self) -> None:
+        task, self._probe_task = self._probe_task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
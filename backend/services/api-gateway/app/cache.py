@@ -0,0 +1,288 @@
+"""Two-tier HTTP response cache for idempotent, anonymous gateway GETs.
+
+Entries live in a bounded in-process LRU in front of the shared Redis client,
+so a hot key is served from worker memory and a cold worker can still be
+warmed by its peers. Freshness follows upstream ``Cache-Control`` when present
+and the per-route TTL otherwise; stale entries can be served while a single
+background refresh revalidates them.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import redis.asyncio as aioredis
+from fastapi import Request
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHEABLE_METHODS = frozenset({"GET", "HEAD"})
+# Headers describing the encoded transfer of one response; the cache stores decoded bodies.
+_UNCACHED_HEADERS = frozenset(
+    {"content-length", "content-encoding", "date", "age", "etag", "set-cookie"}
+)
+_DIRECTIVE_RE = re.compile(r"\s*([a-zA-Z-]+)\s*(?:=\s*\"?([^\",]*)\"?)?\s*(?:,|$)")
+
+
+def parse_cache_control(value: str | None) -> Dict[str, Optional[str]]:
+    """Parse a ``Cache-Control`` header into ``{directive: value}``."""
+    if not value:
+        return {}
+    return {name.lower(): (arg or None) for name, arg in _DIRECTIVE_RE.findall(value)}
+
+
+def _seconds(directives: Dict[str, Optional[str]], name: str) -> Optional[float]:
+    raw = directives.get(name)
+    if raw is None:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        return None
+
+
+def _freshness(directives: Dict[str, Optional[str]], route_ttl: float) -> float:
+    """Shared-cache lifetime: ``s-maxage``, then ``max-age``, then the route TTL."""
+    ttl = _seconds(directives, "s-maxage")
+    if ttl is None:
+        ttl = _seconds(directives, "max-age")
+    return route_ttl if ttl is None else ttl
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` header against ``etag``."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    wanted = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == wanted:
+            return True
+    return False
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    etag: str
+    upstream_etag: bool
+    stored_at: float
+    fresh_until: float
+    stale_until: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.fresh_until
+
+    def is_usable(self, now: float) -> bool:
+        return now < self.stale_until
+
+    def age(self, now: float) -> int:
+        return max(0, int(now - self.stored_at))
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["body"] = base64.b64encode(self.body).decode("ascii")
+        return json.dumps(data, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CachedResponse":
+        data = json.loads(raw)
+        data["body"] = base64.b64decode(data["body"])
+        data["headers"] = [tuple(pair) for pair in data["headers"]]
+        return cls(**data)
+
+
+class _LRU:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, CachedResponse]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._data.get(key)
+        if entry is not None:
+            self._data.move_to_end(key)
+        return entry
+
+    def set(self, key: str, entry: CachedResponse) -> None:
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ResponseCache:
+    def __init__(self, client: Optional[aioredis.Redis]) -> None:
+        self._redis = client
+        self._memory = _LRU(settings.RESPONSE_CACHE_MAX_ENTRIES)
+        self._refreshing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self.stats: Dict[str, int] = {"hits": 0, "stale_hits": 0, "misses": 0, "revalidated": 0}
+
+    # ------------------------- request side ------------------------- #
+    def ttl_for(self, request: Request) -> Optional[float]:
+        """Return the route TTL if ``request`` may be served from the cache."""
+        if not settings.RESPONSE_CACHE_ENABLED or request.method not in CACHEABLE_METHODS:
+            return None
+        # Personalized responses are never shared between callers.
+        if "authorization" in request.headers or "cookie" in request.headers:
+            return None
+        ttl = settings.RESPONSE_CACHE_ROUTES.get(request.url.path.rstrip("/") or "/")
+        return ttl if ttl and ttl > 0 else None
+
+    @staticmethod
+    def key_for(request: Request) -> str:
+        """Cache key: method + path + query string with parameters sorted."""
+        query = urlencode(sorted(request.query_params.multi_items()))
+        # HEAD is answered from the GET representation.
+        return f"GET {request.url.path.rstrip('/') or '/'}?{query}"
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return "resp_cache:" + hashlib.sha256(key.encode()).hexdigest()
+
+    # ------------------------- storage ------------------------------ #
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None and entry.is_usable(now):
+            return entry
+        if entry is not None:
+            self._memory.pop(key)
+        if self._redis is None:
+            return None
+        try:
+            raw = await asyncio.wait_for(
+                self._redis.get(self._redis_key(key)), timeout=settings.RESPONSE_CACHE_REDIS_TIMEOUT
+            )
+        except (asyncio.TimeoutError, RedisError, OSError) as exc:
+            logger.debug("Response cache Redis read failed: %s", exc)
+            return None
+        if not raw:
+            return None
+        try:
+            entry = CachedResponse.from_json(raw)
+        except (ValueError, TypeError, KeyError) as exc:
+            logger.warning("Discarding malformed cached response for %s: %s", key, exc)
+            return None
+        if not entry.is_usable(now):
+            return None
+        self._memory.set(key, entry)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse) -> None:
+        self._memory.set(key, entry)
+        if self._redis is None:
+            return
+        expire = max(1, int(entry.stale_until - time.time()))
+        try:
+            await asyncio.wait_for(
+                self._redis.set(self._redis_key(key), entry.to_json(), ex=expire),
+                timeout=settings.RESPONSE_CACHE_REDIS_TIMEOUT,
+            )
+        except (asyncio.TimeoutError, RedisError, OSError) as exc:
+            logger.debug("Response cache Redis write failed: %s", exc)
+
+    # ------------------------- response side ------------------------ #
+    @staticmethod
+    def build_entry(
+        status_code: int, headers: List[Tuple[str, str]], body: bytes, route_ttl: float
+    ) -> Optional[CachedResponse]:
+        """Turn an upstream response into a cache entry, or ``None`` if it must not be stored."""
+        if status_code != 200 or len(body) > settings.RESPONSE_CACHE_MAX_BODY_BYTES:
+            return None
+        lowered = {name.lower(): value for name, value in headers}
+        if "set-cookie" in lowered:
+            return None
+        vary = {part.strip().lower() for part in lowered.get("vary", "").split(",") if part.strip()}
+        if vary - {"accept-encoding", "origin"}:
+            return None
+        directives = parse_cache_control(lowered.get("cache-control"))
+        if {"no-store", "private", "no-cache"} & directives.keys():
+            return None
+
+        ttl = _freshness(directives, route_ttl)
+        if ttl <= 0:
+            return None
+        swr = _seconds(directives, "stale-while-revalidate")
+        if swr is None:
+            swr = settings.RESPONSE_CACHE_STALE_WHILE_REVALIDATE
+
+        upstream_etag = lowered.get("etag")
+        etag = upstream_etag or 'W/"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+        now = time.time()
+        return CachedResponse(
+            status_code=status_code,
+            headers=[(name, value) for name, value in headers if name.lower() not in _UNCACHED_HEADERS],
+            body=body,
+            etag=etag,
+            upstream_etag=upstream_etag is not None,
+            stored_at=now,
+            fresh_until=now + ttl,
+            stale_until=now + ttl + swr,
+        )
+
+    @staticmethod
+    def refreshed(entry: CachedResponse, route_ttl: float, headers: List[Tuple[str, str]]) -> CachedResponse:
+        """Extend ``entry`` after the upstream answered a conditional request with 304."""
+        directives = parse_cache_control(
+            next((value for name, value in headers if name.lower() == "cache-control"), None)
+        )
+        ttl = _freshness(directives, route_ttl)
+        swr = entry.stale_until - entry.fresh_until
+        now = time.time()
+        return CachedResponse(
+            status_code=entry.status_code,
+            headers=entry.headers,
+            body=entry.body,
+            etag=entry.etag,
+            upstream_etag=entry.upstream_etag,
+            stored_at=now,
+            fresh_until=now + ttl,
+            stale_until=now + ttl + swr,
+        )
+
+    # ------------------------- background refresh ------------------- #
+    def start_refresh(self, key: str, coro) -> bool:
+        """Run ``coro`` as the single background refresh for ``key``; returns False if one is running."""
+        if key in self._refreshing:
+            coro.close()
+            return False
+        self._refreshing.add(key)
+
+        async def _run() -> None:
+            try:
+                await coro
+            except Exception as exc:  # pragma: no cover - background best effort
+                logger.warning("Background refresh of %s failed: %s", key, exc)
+            finally:
+                self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(_run())
+        # Keep a strong reference until the task finishes.
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
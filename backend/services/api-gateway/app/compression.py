@@ -0,0 +1,212 @@
+"""Negotiated response compression (gzip, brotli, zstd) at the gateway edge."""
+from __future__ import annotations
+
+import zlib
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, List, Mapping, Optional, Protocol, Tuple
+
+from app.core.config import settings
+
+try:  # optional: brotli is only offered when the module is installed
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+try:  # optional: zstd is only offered when the module is installed
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# Status codes whose responses never carry a body worth compressing.
+_NO_BODY_STATUS = frozenset({101, 204, 205, 304})
+
+
+class Encoder(Protocol):
+    def compress(self, data: bytes) -> bytes: ...
+
+    def flush(self) -> bytes: ...
+
+
+class _Adapter:
+    def __init__(self, compress: Callable[[bytes], bytes], flush: Callable[[], bytes]) -> None:
+        self.compress = compress
+        self.flush = flush
+
+
+def _gzip_encoder() -> Encoder:
+    # wbits=31 selects the gzip container rather than a raw zlib stream
+    return zlib.compressobj(settings.COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+
+
+def _brotli_encoder() -> Encoder:
+    compressor = brotli.Compressor(quality=settings.COMPRESSION_BROTLI_QUALITY)
+    # brotli's streaming API calls it process/finish; adapt to compress/flush
+    return _Adapter(compressor.process, compressor.finish)
+
+
+def _zstd_encoder() -> Encoder:
+    compressor = zstandard.ZstdCompressor(level=settings.COMPRESSION_ZSTD_LEVEL).compressobj()
+    return _Adapter(compressor.compress, compressor.flush)
+
+
+def available_encoders() -> Dict[str, Callable[[], Encoder]]:
+    """Encoders usable in this process, keyed by content-coding token."""
+    encoders: Dict[str, Callable[[], Encoder]] = {"gzip": _gzip_encoder}
+    if brotli is not None:
+        encoders["br"] = _brotli_encoder
+    if zstandard is not None:
+        encoders["zstd"] = _zstd_encoder
+    return encoders
+
+
+_ENCODERS = available_encoders()
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    weights: Dict[str, float] = {}
+    for item in header.split(","):
+        parts = [part.strip() for part in item.split(";")]
+        coding = parts[0].lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            if param.lower().startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        weights[coding] = q
+    return weights
+
+
+def negotiate(accept_encoding: str | None) -> Optional[str]:
+    """Pick the best coding the client accepts, or None to send identity.
+
+    Highest q-value wins; ties go to the order of COMPRESSION_ENCODINGS.
+    """
+    if not accept_encoding:
+        return None
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best: Optional[str] = None
+    best_q = 0.0
+    for coding in settings.COMPRESSION_ENCODINGS:
+        if coding not in _ENCODERS:
+            continue
+        q = weights.get(coding, wildcard)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def _is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return any(media_type.startswith(prefix) for prefix in settings.COMPRESSION_MEDIA_TYPES)
+
+
+def choose_encoding(
+    accept_encoding: str | None,
+    status_code: int,
+    headers: Mapping[str, str],
+    size: Optional[int] = None,
+) -> Optional[str]:
+    """Decide whether a response should be compressed, and with what.
+
+    ``headers`` must be a case-insensitive mapping of the response headers;
+    ``size`` defaults to their Content-Length. Bodies already encoded upstream,
+    marked ``no-transform``, of a non-textual type, or known to be below
+    COMPRESSION_MIN_BYTES are left alone.
+    """
+    if not settings.COMPRESSION_ENABLED or status_code in _NO_BODY_STATUS:
+        return None
+    if headers.get("content-encoding", "identity").lower() != "identity":
+        return None
+    if "no-transform" in headers.get("cache-control", "").lower():
+        return None
+    if not _is_compressible(headers.get("content-type", "")):
+        return None
+    if size is None:
+        length = headers.get("content-length", "")
+        size = int(length) if length.isdigit() else None
+    if size is not None and size < settings.COMPRESSION_MIN_BYTES:
+        return None
+    return negotiate(accept_encoding)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    encoder = _ENCODERS[encoding]()
+    return encoder.compress(body) + encoder.flush()
+
+
+async def compress_stream(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    """Compress an async byte stream chunk by chunk, without buffering the whole body."""
+    encoder = _ENCODERS[encoding]()
+    async for chunk in chunks:
+        out = encoder.compress(chunk)
+        if out:
+            yield out
+    tail = encoder.flush()
+    if tail:
+        yield tail
+
+
+def encoded_headers(
+    headers: List[Tuple[str, str]], encoding: str
+) -> List[Tuple[str, str]]:
+    """Rewrite response headers for a body re-encoded with ``encoding``."""
+    out: List[Tuple[str, str]] = []
+    for name, value in headers:
+        lowered = name.lower()
+        if lowered in ("content-length", "content-encoding", "vary"):
+            continue
+        if lowered == "etag" and not value.startswith("W/"):
+            # The compressed bytes differ, so the validator can only be weak
+            value = "W/" + value
+        out.append((name, value))
+    out.append(("content-encoding", encoding))
+    out.append(("vary", vary_value(headers)))
+    return out
+
+
+def vary_value(headers: List[Tuple[str, str]]) -> str:
+    """Existing Vary tokens plus Accept-Encoding."""
+    tokens = [
+        token.strip()
+        for name, value in headers
+        if name.lower() == "vary"
+        for token in value.split(",")
+        if token.strip()
+    ]
+    if not any(token.lower() == "accept-encoding" for token in tokens):
+        tokens.append("Accept-Encoding")
+    return ", ".join(tokens)
+
+
+class VariantCache:
+    """Compressed bodies of cached representations, keyed by cache key, ETag and coding.
+
+    Cache hits then cost a dict lookup instead of re-running the compressor.
+    """
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._data: "OrderedDict[Tuple[str, str, str], bytes]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    def get(self, cache_key: str, etag: str, body: bytes, encoding: str) -> bytes:
+        key = (cache_key, etag, encoding)
+        encoded = self._data.get(key)
+        if encoded is not None:
+            self._data.move_to_end(key)
+            self.stats["hits"] += 1
+            return encoded
+        self.stats["misses"] += 1
+        encoded = compress(body, encoding)
+        self._data[key] = encoded
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+        return encoded
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,3 @@
+"""Core utilities (config) scoped to the API gateway."""
+
+__all__ = ["config", "redis_client"]
@@ -0,0 +1,155 @@
+"""API gateway configuration."""
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+
+def _parse_bool(raw: str | None, default: bool = False) -> bool:
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
+def _parse_float_map(raw: str | None) -> Dict[str, float]:
+    """Parse ``name:value,name:value`` pairs, skipping malformed entries."""
+    mapping: Dict[str, float] = {}
+    if not raw:
+        return mapping
+    for pair in raw.split(","):
+        if ":" not in pair:
+            continue
+        key, value = pair.split(":", 1)
+        try:
+            mapping[key.strip()] = float(value.strip())
+        except ValueError:
+            continue
+    return mapping
+
+
+def _parse_list(raw: str | None, default: str) -> List[str]:
+    return [item.strip().lower() for item in (raw or default).split(",") if item.strip()]
+
+
+_DEFAULT_CACHE_ROUTES = {
+    "/api/v1/catalog/games": 30.0,
+    "/api/v1/catalog/games/featured": 300.0,
+    "/api/v1/catalog/games/new-releases": 300.0,
+    "/api/v1/catalog/games/on-sale": 60.0,
+    "/api/v1/catalog/game-icons": 300.0,
+}
+
+
+@dataclass(slots=True)
+class Settings:
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+
+    # ---------- Routing ----------
+    # Optional JSON object of extra/overriding {prefix: upstream_url} routes, re-read on reload.
+    GATEWAY_ROUTES_FILE: str | None = os.getenv("GATEWAY_ROUTES_FILE")
+    # Shared secret for /admin endpoints; admin endpoints are disabled when unset.
+    GATEWAY_ADMIN_TOKEN: str | None = os.getenv("GATEWAY_ADMIN_TOKEN")
+
+    # ---------- Upstream connection pool ----------
+    UPSTREAM_MAX_CONNECTIONS: int = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "200"))
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS: int = int(
+        os.getenv("UPSTREAM_MAX_KEEPALIVE_CONNECTIONS", "50")
+    )
+    UPSTREAM_KEEPALIVE_EXPIRY: float = float(os.getenv("UPSTREAM_KEEPALIVE_EXPIRY", "30"))
+    UPSTREAM_HTTP2: bool = _parse_bool(os.getenv("UPSTREAM_HTTP2"))
+    UPSTREAM_CONNECT_TIMEOUT: float = float(os.getenv("UPSTREAM_CONNECT_TIMEOUT", "5"))
+    UPSTREAM_TIMEOUT: float = float(os.getenv("UPSTREAM_TIMEOUT", "30"))
+    # Per-service read timeouts keyed by service name, e.g. "catalog:10,workshop:120"
+    UPSTREAM_TIMEOUTS: Dict[str, float] = field(
+        default_factory=lambda: _parse_float_map(os.getenv("UPSTREAM_TIMEOUTS"))
+    )
+
+    # ---------- Rate limiting ----------
+    # "sliding_window" or "token_bucket"
+    RATE_LIMIT_ALGORITHM: str = os.getenv("RATE_LIMIT_ALGORITHM", "sliding_window")
+    # Per client IP for anonymous or unverified callers; configurable so local/dev can use a much higher limit.
+    RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "600"))
+    # Per verified token subject; needs JWT_SECRET_KEY, otherwise every caller is limited per IP.
+    RATE_LIMIT_USER_PER_MINUTE: int = int(
+        os.getenv("RATE_LIMIT_USER_PER_MINUTE", os.getenv("RATE_LIMIT_PER_MINUTE", "600"))
+    )
+    # Per-service overrides keyed by service name, e.g. "payments:60,catalog:1200"
+    RATE_LIMIT_ROUTE_LIMITS: Dict[str, float] = field(
+        default_factory=lambda: _parse_float_map(os.getenv("RATE_LIMIT_ROUTE_LIMITS"))
+    )
+    # Budget for the Redis round trip before the in-process bucket takes over.
+    RATE_LIMIT_REDIS_TIMEOUT: float = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.05"))
+    RATE_LIMIT_REDIS_COOLDOWN: float = float(os.getenv("RATE_LIMIT_REDIS_COOLDOWN", "5"))
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_LOCAL_MAX_KEYS", "100000"))
+
+    # ---------- Response cache ----------
+    RESPONSE_CACHE_ENABLED: bool = _parse_bool(os.getenv("RESPONSE_CACHE_ENABLED"), True)
+    # TTL in seconds per exact path, e.g. "/api/v1/catalog/games:30"; upstream Cache-Control wins.
+    RESPONSE_CACHE_ROUTES: Dict[str, float] = field(
+        default_factory=lambda: _parse_float_map(os.getenv("RESPONSE_CACHE_ROUTES"))
+        or dict(_DEFAULT_CACHE_ROUTES)
+    )
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048"))
+    RESPONSE_CACHE_MAX_BODY_BYTES: int = int(
+        os.getenv("RESPONSE_CACHE_MAX_BODY_BYTES", str(1024 * 1024))
+    )
+    RESPONSE_CACHE_STALE_WHILE_REVALIDATE: float = float(
+        os.getenv("RESPONSE_CACHE_STALE_WHILE_REVALIDATE", "30")
+    )
+    RESPONSE_CACHE_REDIS_TIMEOUT: float = float(os.getenv("RESPONSE_CACHE_REDIS_TIMEOUT", "0.05"))
+
+    # Collapse concurrent identical cache misses into one upstream request.
+    SINGLE_FLIGHT_ENABLED: bool = _parse_bool(os.getenv("SINGLE_FLIGHT_ENABLED"), True)
+
+
+    # ---------- Circuit breakers & health probing ----------
+    CIRCUIT_BREAKER_ENABLED: bool = _parse_bool(os.getenv("CIRCUIT_BREAKER_ENABLED"), True)
+    CIRCUIT_BREAKER_WINDOW: int = int(os.getenv("CIRCUIT_BREAKER_WINDOW", "20"))
+    CIRCUIT_BREAKER_MIN_CALLS: int = int(os.getenv("CIRCUIT_BREAKER_MIN_CALLS", "10"))
+    CIRCUIT_BREAKER_FAILURE_RATE: float = float(os.getenv("CIRCUIT_BREAKER_FAILURE_RATE", "0.5"))
+    # Calls slower than this count as failures towards the failure rate.
+    CIRCUIT_BREAKER_SLOW_CALL_SECONDS: float = float(
+        os.getenv("CIRCUIT_BREAKER_SLOW_CALL_SECONDS", "5")
+    )
+    CIRCUIT_BREAKER_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_OPEN_SECONDS", "15"))
+    CIRCUIT_BREAKER_HALF_OPEN_CALLS: int = int(os.getenv("CIRCUIT_BREAKER_HALF_OPEN_CALLS", "1"))
+    # Consecutive failed /health probes that open a closed breaker.
+    CIRCUIT_BREAKER_PROBE_FAILURES: int = int(os.getenv("CIRCUIT_BREAKER_PROBE_FAILURES", "3"))
+    # Seconds between /health probes of every upstream; 0 disables probing.
+    HEALTH_PROBE_INTERVAL: float = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+    HEALTH_PROBE_TIMEOUT: float = float(os.getenv("HEALTH_PROBE_TIMEOUT", "2"))
+
+    # ---------- Edge authentication ----------
+    # Shared with the token issuer (user-service SECRET_KEY); empty disables edge verification.
+    JWT_SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", os.getenv("SECRET_KEY", ""))
+    JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
+    # Reject requests carrying an invalid bearer token with 401 instead of forwarding them.
+    JWT_ENFORCE: bool = _parse_bool(os.getenv("JWT_ENFORCE"), True)
+    JWT_CLAIMS_CACHE_SIZE: int = int(os.getenv("JWT_CLAIMS_CACHE_SIZE", "10000"))
+    JWT_CLAIMS_CACHE_TTL: float = float(os.getenv("JWT_CLAIMS_CACHE_TTL", "300"))
+    # Key for the X-Internal-Identity header; empty means no identity header is forwarded.
+    INTERNAL_IDENTITY_SECRET: str = os.getenv("INTERNAL_IDENTITY_SECRET", "")
+
+    # ---------- Response compression ----------
+    COMPRESSION_ENABLED: bool = _parse_bool(os.getenv("COMPRESSION_ENABLED"), True)
+    # Bodies smaller than this are sent as-is; framing overhead outweighs the savings.
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    # Server preference when the client weighs several codings equally.
+    COMPRESSION_ENCODINGS: List[str] = field(
+        default_factory=lambda: _parse_list(os.getenv("COMPRESSION_ENCODINGS"), "br,zstd,gzip")
+    )
+    COMPRESSION_MEDIA_TYPES: List[str] = field(
+        default_factory=lambda: _parse_list(
+            os.getenv("COMPRESSION_MEDIA_TYPES"),
+            "application/json,application/problem+json,application/javascript,"
+            "application/xml,image/svg+xml,text/",
+        )
+    )
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    # Dynamic responses: a low brotli quality keeps CPU close to gzip's.
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    COMPRESSION_ZSTD_LEVEL: int = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+
+settings = Settings()
@@ -0,0 +1,8 @@
+"""Shared asyncio Redis client for the gateway."""
+from __future__ import annotations
+
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+redis_client: aioredis.Redis = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
@@ -1,12 +1,28 @@
 """
 API Gateway Service
 """
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Header, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.datastructures import Headers
+import hmac
 import httpx
-import redis
 import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.aggregate import COMPOSITES, LegFailed, aggregate, missing_params
+from app.auth import INTERNAL_IDENTITY_HEADER, InvalidToken, TokenVerifier, bearer_token, sign_identity
+from app.breaker import CircuitOpenError, UpstreamHealth
+from app.cache import CachedResponse, ResponseCache, etag_matches
+from app.compression import VariantCache, choose_encoding, compress, compress_stream, encoded_headers
+from app.core.config import settings
+from app.core.redis_client import redis_client
+from app.ratelimit import RateLimiter, policy_for
+from app.routing import RouteTable, load_route_overrides
+from app.singleflight import SingleFlight
+from app.upstream import filter_headers, raw_headers, upstream_pool
 
 # Service URLs
 USER_SERVICE_URL = os.getenv("USER_SERVICE_URL", "http://localhost:8001")
@@ -22,10 +38,6 @@ RECOMMENDATION_SERVICE_URL = os.getenv("RECOMMENDATION_SERVICE_URL", "http://loc
 ACHIEVEMENT_SERVICE_URL = os.getenv("ACHIEVEMENT_SERVICE_URL", "http://localhost:8011")
 FRIENDS_CHAT_SERVICE_URL = os.getenv("FRIENDS_CHAT_SERVICE_URL", "http://localhost:8013")
 
-# Redis connection
-REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
-redis_client = redis.from_url(REDIS_URL, decode_responses=True)
-
 # Create FastAPI app
 app = FastAPI(
     title="Steam Clone API Gateway",
@@ -63,77 +75,310 @@ SERVICE_ROUTES = {
     "/api/v1/forum": os.getenv("FORUM_SERVICE_URL", "http://forum-service:8015"),
 }
 
-# Rate limiting configuration
-# Make this configurable via env var so local/dev can use a much higher limit.
-RATE_LIMIT_PER_MINUTE = int(os.getenv("RATE_LIMIT_PER_MINUTE", "600"))
+# Public prefixes whose service mounts its router under a different path
+SERVICE_PATH_REWRITES = {
+    "/api/v1/recommendations": "/api/v1/recommendation",
+    "/api/v1/payments": "/api/v1/payment",
+}
+
+
+def build_route_table() -> RouteTable:
+    """Compile SERVICE_ROUTES plus any GATEWAY_ROUTES_FILE overrides into a route table"""
+    return RouteTable(
+        {**SERVICE_ROUTES, **load_route_overrides(settings.GATEWAY_ROUTES_FILE)}, SERVICE_PATH_REWRITES
+    )
+
+# Compiled once at import; /admin/routes/reload swaps in a freshly built table
+route_table = build_route_table()
+
+# Rate limiting: one atomic Redis round trip per request, local fallback when Redis is slow
+rate_limiter = RateLimiter(redis_client, settings.RATE_LIMIT_ALGORITHM)
+
+async def check_rate_limit(request: Request, service: str) -> None:
+    """Raise 429 when the caller is over its limit for ``service``"""
+    result = await rate_limiter.hit(policy_for(request, service, caller_claims(request)))
+    if not result.allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Rate limit exceeded",
+            headers={
+                "Retry-After": str(max(1, int(result.retry_after + 0.999))),
+                "X-RateLimit-Limit": str(result.limit),
+                "X-RateLimit-Remaining": "0",
+            },
+        )
+
+# Bearer tokens are verified once at the edge; claims are cached per token
+token_verifier = TokenVerifier()
+
+def caller_claims(request: Request) -> Optional[Dict[str, Any]]:
+    """Verified claims for the caller's bearer token, or None when absent, unverifiable or invalid
+
+    Decoded at most once per request; rate limiting and identity forwarding share the result.
+    """
+    if not hasattr(request.state, "claims"):
+        token = bearer_token(request.headers.get("authorization"))
+        claims = None
+        if token is not None and token_verifier.enabled:
+            try:
+                claims = token_verifier.verify(token)
+            except InvalidToken:
+                pass
+        request.state.claims = claims
+    return request.state.claims
+
+def identity_headers(request: Request) -> List[Tuple[str, str]]:
+    """Verify the caller's bearer token and return the signed identity header to forward"""
+    token = bearer_token(request.headers.get("authorization"))
+    if token is None or not token_verifier.enabled:
+        return []
+    claims = caller_claims(request)
+    if claims is None:
+        if settings.JWT_ENFORCE:
+            raise HTTPException(
+                status_code=401,
+                detail="Could not validate credentials",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return []
+    if not settings.INTERNAL_IDENTITY_SECRET:
+        return []
+    return [(INTERNAL_IDENTITY_HEADER, sign_identity(claims, settings.INTERNAL_IDENTITY_SECRET))]
+
+# Shared two-tier cache for anonymous catalog GETs
+response_cache = ResponseCache(redis_client)
+# Identical cache misses in flight at the same time share one upstream call
+upstream_flights: SingleFlight[Tuple[Optional[CachedResponse], httpx.Response]] = SingleFlight()
+
+# Compressed bodies of cached representations, so cache hits skip the compressor
+compressed_variants = VariantCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+def encode_buffered(request: Request, response: Response, cache_key: Optional[str] = None) -> Response:
+    """Compress a fully buffered response in place when the client negotiates it"""
+    if request.method == "HEAD":
+        return response
+    headers = Headers(raw=response.raw_headers)
+    encoding = choose_encoding(
+        request.headers.get("accept-encoding"), response.status_code, headers, size=len(response.body)
+    )
+    if encoding is None:
+        return response
+    etag = headers.get("etag")
+    if cache_key is not None and etag:
+        body = compressed_variants.get(cache_key, etag, response.body, encoding)
+    else:
+        body = compress(response.body, encoding)
+    pairs = encoded_headers(
+        [(name.decode("latin-1"), value.decode("latin-1")) for name, value in response.raw_headers],
+        encoding,
+    )
+    pairs.append(("content-length", str(len(body))))
+    response.body = body
+    response.raw_headers = raw_headers(pairs)
+    return response
+
+# Circuit breaker per upstream, fed by proxied calls and background /health probes
+upstream_health = UpstreamHealth(upstream_pool)
+
+def require_admin(token: str | None) -> None:
+    """Reject the call unless ``token`` matches GATEWAY_ADMIN_TOKEN"""
+    expected = settings.GATEWAY_ADMIN_TOKEN
+    if not expected or not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.on_event("startup")
+async def on_startup():
+    await upstream_pool.start(route_table.prefixes)
+    upstream_health.start(lambda: [(route.service, route.upstream) for route in route_table.routes])
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await upstream_health.stop()
+    await upstream_pool.close()
+    await redis_client.close()
 
-def get_rate_limit_key(request: Request) -> str:
-    """Get rate limiting key based on client IP"""
-    client_ip = request.client.host if request.client else "unknown"
-    return f"rate_limit:{client_ip}"
 
-def check_rate_limit(request: Request) -> bool:
-    """Check if request is within rate limit"""
-    key = get_rate_limit_key(request)
-    current_count = redis_client.get(key)
+def _circuit_open(exc: CircuitOpenError) -> HTTPException:
+    """Fast 503 for an upstream whose breaker is open"""
+    return HTTPException(
+        status_code=503,
+        detail=f"Service temporarily unavailable: {exc.service}",
+        headers={"Retry-After": str(max(1, int(exc.retry_after + 0.999)))},
+    )
+
+async def _fetch_buffered(
+    request: Request, service_url: str, service: str, path: str, extra_headers: List[Tuple[str, str]]
+) -> httpx.Response:
+    """Fetch a GET representation upstream and read the whole (decoded) body"""
+    # Conditional headers and codings are the cache's business, not the client's, on this path;
+    # httpx's default Accept-Encoding only lists codings it can decode
+    headers = filter_headers(
+        request.headers.items(),
+        drop=(
+            "host",
+            "if-none-match",
+            "if-modified-since",
+            "accept-encoding",
+            INTERNAL_IDENTITY_HEADER,
+        ),
+    )
+    headers.extend(extra_headers)
+    client = upstream_pool.client(service)
+    return await upstream_health.call(
+        service,
+        lambda: client.request(
+            "GET",
+            f"{service_url}{path}",
+            params=dict(request.query_params),
+            headers=headers,
+        ),
+    )
+
+async def _revalidate(
+    request: Request,
+    service_url: str,
+    service: str,
+    path: str,
+    key: str,
+    ttl: float,
+    entry: Optional[CachedResponse] = None,
+) -> Tuple[Optional[CachedResponse], httpx.Response]:
+    """Refresh ``key`` upstream, conditionally when the upstream gave us an ETag"""
+    extra = [("if-none-match", entry.etag)] if entry is not None and entry.upstream_etag else []
+    response = await _fetch_buffered(request, service_url, service, path, extra)
+    if response.status_code == 304 and entry is not None:
+        response_cache.stats["revalidated"] += 1
+        fresh = response_cache.refreshed(entry, ttl, list(response.headers.multi_items()))
+    else:
+        fresh = response_cache.build_entry(
+            response.status_code,
+            filter_headers(response.headers.multi_items()),
+            response.content,
+            ttl,
+        )
+    if fresh is not None:
+        await response_cache.set(key, fresh)
+    return fresh, response
+
+def _render_cached(request: Request, key: str, entry: CachedResponse, cache_status: str) -> Response:
+    headers = entry.headers + [
+        ("etag", entry.etag),
+        ("age", str(entry.age(time.time()))),
+        ("x-cache", cache_status),
+    ]
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        response = Response(status_code=304)
+    else:
+        body = entry.body if request.method == "GET" else b""
+        response = Response(content=body, status_code=entry.status_code)
+    response.raw_headers.extend(raw_headers(headers))
+    return encode_buffered(request, response, cache_key=key)
+
+async def cached_proxy(request: Request, service_url: str, service: str, path: str, ttl: float) -> Response:
+    """Serve an anonymous GET from the response cache, refreshing upstream as needed"""
+    key = response_cache.key_for(request)
+    bypass = "no-cache" in request.headers.get("cache-control", "").lower()
+    entry = None if bypass else await response_cache.get(key)
+    now = time.time()
     
-    if current_count is None:
-        redis_client.setex(key, 60, 1)
-        return True
+    if entry is not None and entry.is_fresh(now):
+        response_cache.stats["hits"] += 1
+        return _render_cached(request, key, entry, "HIT")
+    if entry is not None and entry.is_usable(now):
+        # Stale-while-revalidate: answer now, refresh once in the background
+        response_cache.stats["stale_hits"] += 1
+        response_cache.start_refresh(
+            key, _revalidate(request, service_url, service, path, key, ttl, entry)
+        )
+        return _render_cached(request, key, entry, "STALE")
     
-    if int(current_count) >= RATE_LIMIT_PER_MINUTE:
-        return False
+    response_cache.stats["misses"] += 1
+    try:
+        if settings.SINGLE_FLIGHT_ENABLED:
+            fresh, response = await upstream_flights.do(
+                key, lambda: _revalidate(request, service_url, service, path, key, ttl, entry)
+            )
+        else:
+            fresh, response = await _revalidate(request, service_url, service, path, key, ttl, entry)
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=503, detail=f"Service unavailable: {str(e)}")
+    if fresh is not None:
+        return _render_cached(request, key, fresh, "MISS")
     
-    redis_client.incr(key)
-    return True
+    # Not storable (error, private, too large...): pass the decoded body through
+    passthrough = Response(content=response.content, status_code=response.status_code)
+    passthrough.raw_headers.extend(
+        raw_headers(
+            filter_headers(
+                response.headers.multi_items(), drop=("content-length", "content-encoding")
+            )
+        )
+    )
+    return encode_buffered(request, passthrough)
 
-async def proxy_request(request: Request, service_url: str) -> JSONResponse:
-    """Proxy request to appropriate service"""
+async def proxy_request(request: Request, service_url: str, service: str, path: str) -> Response:
+    """Proxy request to ``path`` on the appropriate service, streaming both bodies through"""
     # Check rate limit
-    if not check_rate_limit(request):
-        raise HTTPException(status_code=429, detail="Rate limit exceeded")
+    await check_rate_limit(request, service)
+    identity = identity_headers(request)
+    
+    ttl = response_cache.ttl_for(request)
+    if ttl is not None:
+        return await cached_proxy(request, service_url, service, path, ttl)
     
     # Prepare request
-    url = f"{service_url}{request.url.path}"
+    url = f"{service_url}{path}"
     params = dict(request.query_params)
-    headers = dict(request.headers)
+    # Remove host header to avoid conflicts; identity is only ever asserted by the gateway
+    headers = filter_headers(request.headers.items(), drop=("host", INTERNAL_IDENTITY_HEADER))
+    headers.extend(identity)
+    if "accept-encoding" not in request.headers:
+        # Otherwise httpx advertises its own codings and the client would get bytes it never asked for
+        headers.append(("accept-encoding", "identity"))
     
-    # Remove host header to avoid conflicts
-    headers.pop("host", None)
+    # Only stream a request body when the client actually sent one
+    has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
     
-    # Make request
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.request(
-                method=request.method,
-                url=url,
-                params=params,
-                headers=headers,
-                content=await request.body(),
-                timeout=30.0
-            )
-            
-            # Determine content type
-            content_type = response.headers.get("content-type", "")
-            is_json = content_type.startswith("application/json")
-            
-            # Parse response content
-            if is_json:
-                try:
-                    content = response.json()
-                except Exception:
-                    # Fallback to text if JSON parsing fails
-                    content = response.text
-            else:
-                content = response.text
-            
-            return JSONResponse(
-                content=content,
-                status_code=response.status_code,
-                headers=dict(response.headers)
-            )
-        except httpx.RequestError as e:
-            raise HTTPException(status_code=503, detail=f"Service unavailable: {str(e)}")
+    # Make request over the pooled keep-alive client for this upstream
+    client = upstream_pool.client(service)
+    upstream_request = client.build_request(
+        method=request.method,
+        url=url,
+        params=params,
+        headers=headers,
+        content=request.stream() if has_body else None,
+    )
+    try:
+        response = await upstream_health.call(
+            service, lambda: client.send(upstream_request, stream=True)
+        )
+    except CircuitOpenError as e:
+        raise _circuit_open(e)
+    except httpx.RequestError as e:
+        raise HTTPException(status_code=503, detail=f"Service unavailable: {str(e)}")
+    
+    # Forward the raw body chunk by chunk; an upstream encoding is passed through untouched,
+    # otherwise compress on the fly when the client asked for it and the body is worth it
+    body = response.aiter_raw()
+    response_headers = filter_headers(response.headers.multi_items())
+    encoding = None
+    if request.method != "HEAD":
+        encoding = choose_encoding(
+            request.headers.get("accept-encoding"), response.status_code, response.headers
+        )
+    if encoding is not None:
+        body = compress_stream(body, encoding)
+        response_headers = encoded_headers(response_headers, encoding)
+    streaming = StreamingResponse(
+        body,
+        status_code=response.status_code,
+        background=BackgroundTask(response.aclose),
+    )
+    streaming.raw_headers = raw_headers(response_headers)
+    return streaming
 
 @app.get("/health")
 def health_check():
@@ -146,27 +391,81 @@ def root():
     return {
         "message": "Steam Clone API Gateway",
         "version": "1.0.0",
-        "services": list(SERVICE_ROUTES.keys())
+        "services": route_table.prefixes
     }
 
+@app.post("/admin/routes/reload")
+async def reload_routes(x_admin_token: str | None = Header(default=None)):
+    """Rebuild the route table and swap it in atomically"""
+    global route_table
+    require_admin(x_admin_token)
+    try:
+        new_table = build_route_table()
+    except (OSError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail=f"Invalid route configuration: {exc}")
+    route_table = new_table
+    return {"status": "reloaded", "routes": len(new_table), "services": new_table.prefixes}
+
+@app.get("/admin/stats")
+async def gateway_stats(x_admin_token: str | None = Header(default=None)):
+    """Counters for the gateway's caching layers"""
+    require_admin(x_admin_token)
+    return {
+        "response_cache": dict(response_cache.stats),
+        "single_flight": {**upstream_flights.stats, "inflight": upstream_flights.inflight},
+        "upstreams": upstream_health.snapshot(),
+        "auth": {**token_verifier.cache.stats, "cached_tokens": len(token_verifier.cache)},
+        "compressed_variants": {**compressed_variants.stats, "entries": len(compressed_variants)},
+    }
+
+# Headers a composite page forwards to each of its legs
+AGGREGATE_FORWARD_HEADERS = ("authorization", "accept-language")
+
+async def _fetch_leg(path: str, headers: dict) -> httpx.Response:
+    """Send one aggregation leg through the same routing, pooling and breakers as proxied calls"""
+    path, sep, query = path.partition("?")
+    route = route_table.match(path)
+    if route is None:
+        raise LegFailed(404, f"No service for {path}")
+    url = f"{route.upstream}{route.upstream_path(path)}{sep}{query}"
+    client = upstream_pool.client(route.service)
+    try:
+        return await upstream_health.call(route.service, lambda: client.get(url, headers=headers))
+    except CircuitOpenError as e:
+        raise LegFailed(503, str(e))
+
+@app.get("/api/v1/aggregate/{page}")
+async def aggregate_page(request: Request, page: str):
+    """Fan out to every leg of a composite page concurrently and merge the results"""
+    composite = COMPOSITES.get(page)
+    if composite is None:
+        raise HTTPException(status_code=404, detail=f"Unknown composite page: {page}")
+    await check_rate_limit(request, "aggregate")
+    identity = identity_headers(request)
+    params = dict(request.query_params)
+    missing = missing_params(composite, params)
+    if missing:
+        raise HTTPException(status_code=400, detail=f"Missing parameters: {', '.join(missing)}")
+    headers = {
+        name: request.headers[name] for name in AGGREGATE_FORWARD_HEADERS if name in request.headers
+    }
+    headers.update(identity)
+    status_code, body = await aggregate(composite, params, headers, _fetch_leg)
+    return encode_buffered(request, JSONResponse(content={"page": page, **body}, status_code=status_code))
+
 # Dynamic route handling for all service endpoints
 @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"])
 async def proxy_all_requests(request: Request, path: str):
     """Proxy all requests to appropriate services"""
-    # Normalize path to include leading slash for comparison
-    normalized_path = f"/{path}" if not path.startswith("/") else path
-    
-    # Find matching service
-    service_url = None
-    for route_prefix, url in SERVICE_ROUTES.items():
-        if normalized_path.startswith(route_prefix):
-            service_url = url
-            break
+    # Longest-prefix match on path segments against the compiled route table
+    route = route_table.match(path)
     
-    if not service_url:
+    if route is None:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    return await proxy_request(request, service_url)
+    return await proxy_request(
+        request, route.upstream, route.service, route.upstream_path(request.url.path)
+    )
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,195 @@
+"""Atomic, non-blocking rate limiting for the gateway.
+
+Each decision is a single Redis round trip: the algorithm runs server-side as a
+Lua script, so concurrent gateway workers cannot race on the counter. When
+Redis is slow or unavailable the limiter falls back to an in-process token
+bucket instead of stalling the request.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import redis.asyncio as aioredis
+from fastapi import Request
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WINDOW_SECONDS = 60.0
+
+# Sliding-window counter: weight the previous fixed window by how much of it
+# still overlaps the sliding window, then add the current window's hits.
+# KEYS: current window, previous window. ARGV: limit, window_ms, elapsed_ms.
+_SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local estimated = previous * ((window - elapsed) / window) + current
+if estimated >= limit then
+    return {0, 0}
+end
+current = redis.call('INCR', KEYS[1])
+if current == 1 then
+    redis.call('PEXPIRE', KEYS[1], window * 2)
+end
+return {1, math.floor(limit - estimated - 1)}
+"""
+
+# Token bucket refilled continuously at ``rate`` tokens per millisecond.
+# KEYS: bucket hash. ARGV: capacity, rate, now_ms.
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate))
+return {allowed, math.floor(tokens)}
+"""
+
+
+@dataclass(slots=True)
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: float = 0.0
+
+
+@dataclass(slots=True)
+class RateLimitPolicy:
+    key: str
+    limit: int
+    window: float = WINDOW_SECONDS
+
+
+class LocalTokenBucket:
+    """Bounded in-process token buckets used when Redis cannot answer in time.
+
+    Limits are enforced per worker process, so they are approximate across a
+    multi-worker deployment; that is acceptable for a degraded mode.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list[float]]" = OrderedDict()
+
+    def hit(self, policy: RateLimitPolicy, now: Optional[float] = None) -> RateLimitResult:
+        now = time.monotonic() if now is None else now
+        rate = policy.limit / policy.window
+        bucket = self._buckets.get(policy.key)
+        if bucket is None:
+            bucket = [float(policy.limit), now]
+            self._buckets[policy.key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(policy.key)
+            bucket[0] = min(float(policy.limit), bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return RateLimitResult(True, policy.limit, int(bucket[0]))
+        return RateLimitResult(False, policy.limit, 0, (1 - bucket[0]) / rate)
+
+
+class RateLimiter:
+    def __init__(self, client: aioredis.Redis, algorithm: str = "sliding_window") -> None:
+        if algorithm not in {"sliding_window", "token_bucket"}:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self._sliding_window = client.register_script(_SLIDING_WINDOW_LUA)
+        self._token_bucket = client.register_script(_TOKEN_BUCKET_LUA)
+        self._local = LocalTokenBucket(settings.RATE_LIMIT_LOCAL_MAX_KEYS)
+        self._redis_disabled_until = 0.0
+        self._redis_down = False
+
+    async def _hit_redis(self, policy: RateLimitPolicy) -> RateLimitResult:
+        now_ms = int(time.time() * 1000)
+        window_ms = int(policy.window * 1000)
+        if self.algorithm == "token_bucket":
+            allowed, remaining = await self._token_bucket(
+                keys=[f"rate_limit:tb:{policy.key}"],
+                args=[policy.limit, policy.limit / window_ms, now_ms],
+            )
+            retry_after = 0.0 if allowed else policy.window / policy.limit
+        else:
+            window_id, elapsed = divmod(now_ms, window_ms)
+            allowed, remaining = await self._sliding_window(
+                keys=[
+                    f"rate_limit:sw:{policy.key}:{window_id}",
+                    f"rate_limit:sw:{policy.key}:{window_id - 1}",
+                ],
+                args=[policy.limit, window_ms, elapsed],
+            )
+            retry_after = 0.0 if allowed else (window_ms - elapsed) / 1000
+        return RateLimitResult(bool(allowed), policy.limit, max(int(remaining), 0), retry_after)
+
+    async def hit(self, policy: RateLimitPolicy) -> RateLimitResult:
+        """Count one request against ``policy`` and return the decision."""
+        if time.monotonic() >= self._redis_disabled_until:
+            try:
+                result = await asyncio.wait_for(
+                    self._hit_redis(policy), timeout=settings.RATE_LIMIT_REDIS_TIMEOUT
+                )
+            except (asyncio.TimeoutError, RedisError, OSError) as exc:
+                # Requests already in flight when Redis went away fail too; log the outage once
+                if not self._redis_down:
+                    self._redis_down = True
+                    logger.warning("Rate limiter falling back to local buckets: %s", exc)
+                self._redis_disabled_until = time.monotonic() + settings.RATE_LIMIT_REDIS_COOLDOWN
+            else:
+                if self._redis_down:
+                    self._redis_down = False
+                    logger.info("Rate limiter using Redis again")
+                return result
+        return self._local.hit(policy)
+
+
+def _client_identity(request: Request, claims: Optional[Dict[str, Any]]) -> tuple[str, bool]:
+    """Return (identity, authenticated) for the caller.
+
+    Only a verified token's ``sub`` earns a user bucket. A bearer header alone
+    proves nothing, so callers without verified claims share their IP's bucket.
+    """
+    subject = claims.get("sub") if claims else None
+    if subject is not None and subject != "":
+        return f"user:{subject}", True
+    client_ip = request.client.host if request.client else "unknown"
+    return f"ip:{client_ip}", False
+
+
+def policy_for(
+    request: Request, service: str, claims: Optional[Dict[str, Any]] = None
+) -> RateLimitPolicy:
+    """Build the rate limit policy for a request routed to ``service``.
+
+    ``claims`` are the caller's verified token claims, if any. A per-service
+    limit, when configured, gets its own bucket per caller; everything else
+    shares the caller's global bucket.
+    """
+    identity, authenticated = _client_identity(request, claims)
+    route_limit = settings.RATE_LIMIT_ROUTE_LIMITS.get(service)
+    if route_limit is not None:
+        return RateLimitPolicy(key=f"{identity}:{service}", limit=max(1, math.floor(route_limit)))
+    limit = settings.RATE_LIMIT_USER_PER_MINUTE if authenticated else settings.RATE_LIMIT_PER_MINUTE
+    return RateLimitPolicy(key=identity, limit=limit)
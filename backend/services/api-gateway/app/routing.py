@@ -0,0 +1,115 @@
+"""Compiled route table for dispatching gateway requests to services."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional
+
+from app.upstream import service_name
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class Route:
+    prefix: str
+    upstream: str
+    service: str
+    # Path prefix the upstream mounts this route under, when it differs from ``prefix``
+    rewrite: Optional[str] = None
+
+    def upstream_path(self, path: str) -> str:
+        """``path`` as the upstream serves it: the public prefix swapped for ``rewrite``."""
+        if self.rewrite is None:
+            return path
+        rest = _segments(path)[len(_segments(self.prefix)) :]
+        if not rest:
+            return self.rewrite
+        return self.rewrite + "/" + "/".join(rest) + ("/" if path.endswith("/") else "")
+
+
+class _Node:
+    __slots__ = ("children", "route")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _Node] = {}
+        self.route: Optional[Route] = None
+
+
+def _segments(path: str) -> List[str]:
+    return [segment for segment in path.split("/") if segment]
+
+
+def _normalize(prefix: str) -> str:
+    return "/" + "/".join(_segments(prefix))
+
+
+class RouteTable:
+    """Segment trie over route prefixes with longest-prefix matching.
+
+    Matching walks one trie level per path segment, so ``/api/v1/users`` never
+    captures ``/api/v1/users-admin`` and lookup cost does not grow with the
+    number of services. Tables are immutable once built; reloading swaps in a
+    new instance.
+    """
+
+    def __init__(self, routes: Mapping[str, str], rewrites: Optional[Mapping[str, str]] = None) -> None:
+        self._root = _Node()
+        self._routes: Dict[str, Route] = {}
+        rewrites = {_normalize(prefix): _normalize(target) for prefix, target in (rewrites or {}).items()}
+        for prefix, upstream in routes.items():
+            self._add(prefix, upstream, rewrites)
+
+    def _add(self, prefix: str, upstream: str, rewrites: Mapping[str, str]) -> None:
+        segments = _segments(prefix)
+        normalized = _normalize(prefix)
+        node = self._root
+        for segment in segments:
+            node = node.children.setdefault(segment, _Node())
+        rewrite = rewrites.get(normalized)
+        node.route = Route(
+            prefix=normalized,
+            upstream=upstream.rstrip("/"),
+            service=service_name(normalized),
+            rewrite=rewrite if rewrite != normalized else None,
+        )
+        self._routes[normalized] = node.route
+
+    def match(self, path: str) -> Optional[Route]:
+        """Return the route with the longest prefix matching ``path`` on segment boundaries."""
+        node = self._root
+        best = node.route
+        for segment in _segments(path):
+            node = node.children.get(segment)
+            if node is None:
+                break
+            if node.route is not None:
+                best = node.route
+        return best
+
+    @property
+    def prefixes(self) -> List[str]:
+        return list(self._routes)
+
+    @property
+    def routes(self) -> List[Route]:
+        return list(self._routes.values())
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+
+def load_route_overrides(path: str | None) -> Dict[str, str]:
+    """Read extra ``{prefix: upstream_url}`` routes from a JSON file, if configured."""
+    if not path:
+        return {}
+    if not os.path.exists(path):
+        logger.warning("Gateway routes file %s does not exist", path)
+        return {}
+    with open(path, "r", encoding="utf-8") as fh:
+        data = json.load(fh)
+    if not isinstance(data, dict):
+        raise ValueError("Gateway routes file must contain a JSON object of prefix -> URL")
+    return {str(prefix): str(url) for prefix, url in data.items()}
@@ -0,0 +1,109 @@
+"""Pooled HTTP clients for upstream services."""
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# RFC 7230 hop-by-hop headers; they describe a single connection and must not be forwarded.
+HOP_BY_HOP_HEADERS = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "te",
+        "trailer",
+        "trailers",
+        "transfer-encoding",
+        "upgrade",
+    }
+)
+
+
+def filter_headers(
+    headers: Iterable[Tuple[str, str]], *, drop: Iterable[str] = ()
+) -> List[Tuple[str, str]]:
+    """Copy end-to-end headers, dropping hop-by-hop ones and any names in ``drop``.
+
+    Returns a list of pairs so repeated headers such as ``Set-Cookie`` survive.
+    """
+    excluded = HOP_BY_HOP_HEADERS.union(name.lower() for name in drop)
+    return [(name, value) for name, value in headers if name.lower() not in excluded]
+
+
+def raw_headers(headers: Iterable[Tuple[str, str]]) -> List[Tuple[bytes, bytes]]:
+    """Encode header pairs for ``starlette.responses.Response.raw_headers``."""
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+
+def service_name(route_prefix: str) -> str:
+    """Return the short service name for a route prefix (``/api/v1/catalog`` -> ``catalog``)."""
+    return route_prefix.rstrip("/").rsplit("/", 1)[-1]
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class UpstreamPool:
+    """One long-lived ``httpx.AsyncClient`` per upstream, reused across requests.
+
+    Each client keeps its own keep-alive pool so a slow service cannot starve
+    connections to the others.
+    """
+
+    def __init__(self) -> None:
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._http2 = settings.UPSTREAM_HTTP2 and _http2_available()
+        if settings.UPSTREAM_HTTP2 and not self._http2:
+            logger.warning("UPSTREAM_HTTP2 is enabled but 'h2' is not installed; using HTTP/1.1")
+
+    def _timeout_for(self, name: str) -> httpx.Timeout:
+        read_timeout = settings.UPSTREAM_TIMEOUTS.get(name, settings.UPSTREAM_TIMEOUT)
+        return httpx.Timeout(read_timeout, connect=settings.UPSTREAM_CONNECT_TIMEOUT)
+
+    def _build_client(self, name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.UPSTREAM_KEEPALIVE_EXPIRY,
+        )
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=self._timeout_for(name),
+            http2=self._http2,
+        )
+
+    async def start(self, prefixes: Iterable[str]) -> None:
+        """Open a client for the upstream behind every route prefix."""
+        for prefix in prefixes:
+            name = service_name(prefix)
+            if name not in self._clients:
+                self._clients[name] = self._build_client(name)
+
+    async def close(self) -> None:
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def client(self, name: str) -> httpx.AsyncClient:
+        """Return the pooled client for ``name``, creating it on first use."""
+        client: Optional[httpx.AsyncClient] = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build_client(name)
+            self._clients[name] = client
+        return client
+
+
+upstream_pool = UpstreamPool()
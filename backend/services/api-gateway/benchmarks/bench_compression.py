@@ -0,0 +1,151 @@
+"""Bytes saved and CPU spent per coding for representative gateway responses.
+
+Run from the service directory:
+
+    python benchmarks/bench_compression.py [--iterations 200]
+
+Payloads mimic what the gateway proxies: a catalog search page of 100
+``GameResponse`` objects (screenshots, movies, requirements), a single game
+detail, a composite game page and a small error body. Timings are CPU time
+(``time.process_time``) per compression, so they reflect what each request
+costs the gateway worker rather than wall-clock noise.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.compression import available_encoders, compress  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+_GENRES = ["Action", "Adventure", "RPG", "Strategy", "Simulation", "Indie", "Racing", "Sports"]
+
+
+def _requirements(tier: int) -> dict:
+    return {
+        "minimum": {
+            "os": "Windows 10 64-bit",
+            "processor": f"Intel Core i{3 + tier} or AMD Ryzen {3 + tier}",
+            "memory": f"{4 * (tier + 1)} GB RAM",
+            "graphics": "NVIDIA GeForce GTX 960 / AMD Radeon R9 280",
+            "storage": f"{20 + tier * 15} GB available space",
+        },
+        "recommended": {
+            "os": "Windows 11 64-bit",
+            "processor": f"Intel Core i{5 + tier} or AMD Ryzen {5 + tier}",
+            "memory": f"{8 * (tier + 1)} GB RAM",
+            "graphics": "NVIDIA GeForce RTX 2060 / AMD Radeon RX 5700",
+            "storage": f"{20 + tier * 15} GB SSD",
+        },
+    }
+
+
+def game(game_id: int) -> dict:
+    released = datetime(2015, 1, 1) + timedelta(days=game_id * 17)
+    base = f"https://cdn.example.com/games/{game_id}"
+    return {
+        "id": game_id,
+        "uuid": f"00000000-0000-4000-8000-{game_id:012d}",
+        "title": f"Game Title {game_id}",
+        "short_description": f"A {_GENRES[game_id % 8].lower()} game about exploring world {game_id}.",
+        "description": f"Game {game_id} is a sprawling adventure. " * 12,
+        "developer": f"Studio {game_id % 37}",
+        "publisher": f"Publisher {game_id % 11}",
+        "price": round(9.99 + (game_id % 7) * 5, 2),
+        "original_price": 59.99,
+        "discount_percent": float(game_id % 4 * 10),
+        "currency": "USD",
+        "game_type": "game",
+        "status": "active",
+        "age_rating": "T",
+        "release_date": released.isoformat(),
+        "early_access": False,
+        "single_player": True,
+        "multiplayer": game_id % 2 == 0,
+        "co_op": game_id % 3 == 0,
+        "local_co_op": False,
+        "cross_platform": True,
+        "vr_support": False,
+        "header_image_url": f"{base}/header.jpg",
+        "background_image_url": f"{base}/background.jpg",
+        "capsule_image_url": f"{base}/capsule.jpg",
+        "icon_url": f"{base}/icon.png",
+        "screenshots": [f"{base}/screenshots/{n}.jpg" for n in range(8)],
+        "movies": [f"{base}/movies/{n}.webm" for n in range(3)],
+        "pc_requirements": _requirements(game_id % 3),
+        "mac_requirements": _requirements((game_id + 1) % 3),
+        "linux_requirements": None,
+        "total_reviews": game_id * 13,
+        "positive_reviews": game_id * 11,
+        "negative_reviews": game_id * 2,
+        "average_rating": 4.2,
+        "playtime_forever": game_id * 101,
+        "playtime_2weeks": game_id * 3,
+        "created_at": released.isoformat(),
+        "updated_at": released.isoformat(),
+        "metadata": None,
+        "genres": [{"id": game_id % 8, "name": _GENRES[game_id % 8]}],
+        "tags": [{"id": n, "name": f"tag-{n}"} for n in range(game_id % 5, game_id % 5 + 4)],
+        "platforms": [{"id": 1, "name": "Windows"}, {"id": 2, "name": "macOS"}],
+    }
+
+
+def payloads() -> dict:
+    page = {"items": [game(n) for n in range(1, 101)], "total": 5000, "page": 1, "page_size": 100}
+    composite = {
+        "page": "game",
+        "data": {
+            "game": game(7),
+            "review_stats": {"total": 91, "positive": 77, "negative": 14},
+            "reviews": [{"id": n, "rating": 4, "body": "Great game, would play again. " * 4} for n in range(5)],
+            "similar": [{"game_id": n, "score": 0.9 - n / 100} for n in range(10)],
+        },
+        "errors": {},
+        "partial": False,
+    }
+    return {
+        "GET /api/v1/catalog/games (100 items)": json.dumps(page).encode(),
+        "GET /api/v1/catalog/games/{id}": json.dumps(game(42)).encode(),
+        "GET /api/v1/aggregate/game": json.dumps(composite).encode(),
+        "404 error body": json.dumps({"detail": "Game not found"}).encode(),
+    }
+
+
+def measure(body: bytes, encoding: str, iterations: int) -> tuple[int, float]:
+    compressed = compress(body, encoding)
+    started = time.process_time()
+    for _ in range(iterations):
+        compress(body, encoding)
+    return len(compressed), (time.process_time() - started) / iterations * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    encodings = [coding for coding in settings.COMPRESSION_ENCODINGS if coding in available_encoders()]
+    print(f"threshold={settings.COMPRESSION_MIN_BYTES}B  gzip={settings.COMPRESSION_GZIP_LEVEL}"
+          f"  br={settings.COMPRESSION_BROTLI_QUALITY}  zstd={settings.COMPRESSION_ZSTD_LEVEL}")
+    print(f"{'route':40} {'coding':6} {'bytes':>9} {'saved':>9} {'ratio':>6} {'cpu ms':>8}")
+    for route, body in payloads().items():
+        if len(body) < settings.COMPRESSION_MIN_BYTES:
+            print(f"{route:40} {'-':6} {len(body):>9} {'(below threshold, sent as-is)':>26}")
+            continue
+        print(f"{route:40} {'none':6} {len(body):>9}")
+        for encoding in encodings:
+            size, cpu_ms = measure(body, encoding, args.iterations)
+            print(
+                f"{'':40} {encoding:6} {size:>9} {len(body) - size:>9} "
+                f"{len(body) / size:>5.1f}x {cpu_ms:>8.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import asyncio
+import re
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+import pytest
+
+from app.aggregate import COMPOSITES, Composite, Leg, aggregate, missing_params, render_path
+from app.main import build_route_table
+
+SERVICES = Path(__file__).resolve().parents[2]
+MOUNT = re.compile(r"include_router\(\s*\w+(?:\.router)?\s*,\s*prefix=f?\"([^\"]*)\"")
+DECORATOR = re.compile(r"@router\.get\(\s*\"([^\"]*)\"")
+
+
+def _service_dir(upstream: str) -> Path:
+    # Upstream defaults look like http://localhost:8010; find the service exposing that port
+    port = upstream.rsplit(":", 1)[-1]
+    for dockerfile in SERVICES.glob("*/Dockerfile"):
+        if re.search(rf"^EXPOSE {port}$", dockerfile.read_text(), re.MULTILINE):
+            return dockerfile.parent
+    pytest.skip(f"no service checkout for {upstream}")
+
+
+def _routes(service: Path) -> List[re.Pattern]:
+    mounts = MOUNT.findall((service / "app" / "main.py").read_text())
+    mount = mounts[0].replace("{settings.API_V1_PREFIX}", "/api/v1") if mounts else ""
+    patterns = []
+    for source in (service / "app").rglob("*.py"):
+        for path in DECORATOR.findall(source.read_text()):
+            regex = re.sub(r"\{[^}]+\}", "[^/]+", mount + path)
+            patterns.append(re.compile(regex + "/?$"))
+    return patterns
+
+
+@pytest.mark.parametrize(
+    "composite,leg",
+    [(name, leg) for name, composite in COMPOSITES.items() for leg in composite.legs],
+)
+def test_every_leg_reaches_a_service_route(composite, leg):
+    table = build_route_table()
+    path = render_path(COMPOSITES[composite].legs[leg], {"game_id": "42", "user_id": "7"}).split("?")[0]
+    route = table.match(path)
+    assert route is not None
+    upstream_path = route.upstream_path(path)
+    assert any(pattern.match(upstream_path) for pattern in _routes(_service_dir(route.upstream))), upstream_path
+
+
+def test_route_rewrites_public_prefix():
+    route = build_route_table().match("/api/v1/recommendations/games/1/similar")
+    assert route.upstream_path("/api/v1/recommendations/games/1/similar") == "/api/v1/recommendation/games/1/similar"
+    assert route.upstream_path("/api/v1/recommendations/") == "/api/v1/recommendation"
+    catalog = build_route_table().match("/api/v1/catalog/games/1")
+    assert catalog.upstream_path("/api/v1/catalog/games/1") == "/api/v1/catalog/games/1"
+
+
+COMPOSITE = Composite(
+    params=("game_id",),
+    legs={
+        "game": Leg("/game/{game_id}", timeout=0.5, required=True),
+        "stats": Leg("/stats/{game_id}", timeout=0.5),
+        "slow": Leg("/slow/{game_id}", timeout=0.05),
+        "broken": Leg("/broken/{game_id}", timeout=0.5),
+    },
+)
+
+
+def _fetcher(calls: Dict[str, Dict[str, str]], fail_game: bool = False):
+    async def fetch(path: str, headers: Dict[str, str]) -> httpx.Response:
+        calls[path] = headers
+        if path.startswith("/slow"):
+            await asyncio.sleep(1)
+        if path.startswith("/broken"):
+            raise httpx.ConnectError("connection refused")
+        if path.startswith("/game") and fail_game:
+            return httpx.Response(404, json={"detail": "Game not found"})
+        return httpx.Response(200, json={"path": path})
+
+    return fetch
+
+
+def test_aggregate_reports_failed_optional_legs():
+    calls: Dict[str, Dict[str, str]] = {}
+    status, body = asyncio.run(aggregate(COMPOSITE, {"game_id": "a b"}, {"x-user-id": "1"}, _fetcher(calls)))
+    assert status == 200
+    assert body["partial"] is True
+    assert body["data"] == {"game": {"path": "/game/a%20b"}, "stats": {"path": "/stats/a%20b"}}
+    assert body["errors"]["slow"] == {"status": 504, "detail": "timed out after 0.05s"}
+    assert body["errors"]["broken"]["status"] == 503
+    assert all(headers == {"x-user-id": "1"} for headers in calls.values())
+
+
+def test_aggregate_propagates_required_leg_status():
+    status, body = asyncio.run(aggregate(COMPOSITE, {"game_id": "1"}, {}, _fetcher({}, fail_game=True)))
+    assert status == 404
+    assert body["errors"]["game"] == {"status": 404, "detail": "Game not found"}
+    assert body["data"]["stats"] == {"path": "/stats/1"}
+
+
+def test_legs_run_concurrently():
+    # Each leg waits on the others; run one after another this would deadlock into timeouts
+    composite = Composite(legs={name: Leg(f"/{name}", timeout=0.5) for name in "abc"})
+    started = asyncio.Event()
+    seen: List[str] = []
+
+    async def fetch(path: str, headers: Dict[str, str]) -> httpx.Response:
+        seen.append(path)
+        if len(seen) == 3:
+            started.set()
+        await started.wait()
+        return httpx.Response(200, json=path)
+
+    status, body = asyncio.run(aggregate(composite, {}, {}, fetch))
+    assert status == 200
+    assert body == {"data": {"a": "/a", "b": "/b", "c": "/c"}, "errors": {}, "partial": False}
+
+
+def test_missing_params():
+    assert missing_params(COMPOSITE, {"game_id": ""}) == ["game_id"]
+    assert missing_params(COMPOSITE, {"game_id": "1"}) is None
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import ast
+import base64
+import hashlib
+import hmac
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, Optional
+
+import pytest
+from jose import jwt
+from starlette.requests import Request
+
+import app.main as gateway
+from app.auth import ClaimsCache, TokenVerifier, bearer_token, sign_identity
+
+SERVICES = Path(__file__).resolve().parents[2]
+# Services that verify the gateway's identity header with their own copy of verify_internal_identity
+VERIFIERS = ["user-service/app/core/auth.py", "friends-chat-service/app/auth.py"]
+
+
+def test_claims_cache_never_outlives_token_expiry():
+    cache = ClaimsCache(max_entries=10, ttl=300)
+    cache.set("token", {"sub": "1", "exp": 160}, now=100)
+    assert cache.get("token", now=150) == {"sub": "1", "exp": 160}
+    assert cache.get("token", now=160) is None
+    cache.set("expired", {"sub": "2", "exp": 90}, now=100)
+    assert len(cache) == 0
+
+
+def test_claims_cache_evicts_least_recently_used():
+    cache = ClaimsCache(max_entries=2, ttl=300)
+    cache.set("a", {"sub": "a"}, now=0)
+    cache.set("b", {"sub": "b"}, now=0)
+    cache.get("a", now=1)
+    cache.set("c", {"sub": "c"}, now=1)
+    assert cache.get("b", now=2) is None
+    assert cache.get("a", now=2) is not None
+
+
+def test_identity_header_is_hmac_signed():
+    header = sign_identity({"sub": "42", "user_id": 42}, "secret")
+    payload, signature = header.split(".")
+    expected = hmac.new(b"secret", payload.encode(), hashlib.sha256).digest()
+    assert base64.urlsafe_b64decode(signature + "=" * (-len(signature) % 4)) == expected
+    assert json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))) == {
+        "sub": "42",
+        "user_id": 42,
+    }
+    assert bearer_token("Bearer abc") == "abc"
+    assert bearer_token("Basic abc") is None
+
+
+def _verifier_source(path: str) -> str:
+    tree = ast.parse((SERVICES / path).read_text())
+    functions = [
+        node
+        for node in tree.body
+        if isinstance(node, ast.FunctionDef) and node.name in {"_unb64", "verify_internal_identity"}
+    ]
+    return "\n\n".join(ast.unparse(node) for node in functions)
+
+
+def _load_verifier(path: str, secret: str):
+    """The service's verify_internal_identity, run against a settings stub."""
+    namespace = dict(
+        base64=base64,
+        hashlib=hashlib,
+        hmac=hmac,
+        json=json,
+        time=time,
+        Any=Any,
+        Dict=Dict,
+        Optional=Optional,
+        settings=SimpleNamespace(INTERNAL_IDENTITY_SECRET=secret),
+    )
+    exec(compile(_verifier_source(path), path, "exec"), namespace)
+    return namespace["verify_internal_identity"]
+
+
+def test_service_verifiers_are_identical():
+    sources = {path: _verifier_source(path) for path in VERIFIERS}
+    assert all("def verify_internal_identity" in source for source in sources.values())
+    assert len(set(sources.values())) == 1
+
+
+def _signed_header(monkeypatch, claims: Dict[str, Any]) -> str:
+    monkeypatch.setattr(gateway.settings, "JWT_SECRET_KEY", "jwt-secret")
+    monkeypatch.setattr(gateway.settings, "INTERNAL_IDENTITY_SECRET", "identity-secret")
+    monkeypatch.setattr(gateway, "token_verifier", TokenVerifier())
+    token = jwt.encode(claims, "jwt-secret", algorithm=gateway.settings.JWT_ALGORITHM)
+    request = Request(
+        {"type": "http", "method": "GET", "path": "/", "headers": [(b"authorization", f"Bearer {token}".encode())]}
+    )
+    [(name, value)] = gateway.identity_headers(request)
+    assert name == "x-internal-identity"
+    return value
+
+
+@pytest.mark.parametrize("path", VERIFIERS)
+def test_services_accept_gateway_identity(monkeypatch, path):
+    claims = {"sub": "42", "user_id": 42, "exp": int(time.time()) + 60}
+    header = _signed_header(monkeypatch, claims)
+    verify = _load_verifier(path, "identity-secret")
+    assert verify(header) == claims
+
+    payload, signature = header.rsplit(".", 1)
+    forged = base64.urlsafe_b64encode(b'{"sub":"1"}').rstrip(b"=").decode()
+    assert verify(f"{forged}.{signature}") is None
+    assert verify(payload) is None
+    assert verify(None) is None
+    assert _load_verifier(path, "other-secret")(header) is None
+    assert _load_verifier(path, "")(header) is None
+
+
+@pytest.mark.parametrize("path", VERIFIERS)
+def test_services_reject_expired_identity(path):
+    # The gateway only forwards unexpired tokens; sign directly to test the service-side check
+    header = sign_identity({"sub": "42", "exp": int(time.time()) - 1}, "identity-secret")
+    assert _load_verifier(path, "identity-secret")(header) is None
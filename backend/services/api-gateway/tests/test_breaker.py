@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from app.breaker import BreakerState, CircuitBreaker
+
+
+def _breaker() -> CircuitBreaker:
+    return CircuitBreaker(
+        "catalog",
+        window=10,
+        min_calls=4,
+        failure_rate=0.5,
+        slow_call_seconds=1.0,
+        open_seconds=15.0,
+        half_open_calls=1,
+        probe_failures=2,
+    )
+
+
+def test_opens_on_error_rate_and_fails_fast():
+    breaker = _breaker()
+    for failed in (False, True, False, True):
+        assert breaker.allow(now=0)
+        breaker.record(0.01, failed=failed, now=0)
+    assert breaker.state is BreakerState.OPEN
+    assert not breaker.allow(now=5)
+    assert breaker.retry_after(now=5) == 10
+
+
+def test_slow_calls_count_as_failures():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(2.5, failed=False, now=0)
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_half_open_trial_closes_or_reopens():
+    breaker = _breaker()
+    for _ in range(4):
+        breaker.record(0.01, failed=True, now=0)
+    assert breaker.allow(now=16)
+    assert breaker.state is BreakerState.HALF_OPEN
+    assert not breaker.allow(now=16)
+    breaker.record(0.01, failed=True, now=16)
+    assert breaker.state is BreakerState.OPEN
+
+    assert breaker.allow(now=32)
+    breaker.record(0.01, failed=False, now=32)
+    assert breaker.state is BreakerState.CLOSED
+
+
+def test_health_probe_drives_state():
+    breaker = _breaker()
+    breaker.probe_result(False, now=0)
+    assert breaker.state is BreakerState.CLOSED
+    breaker.probe_result(False, now=10)
+    assert breaker.state is BreakerState.OPEN
+    breaker.probe_result(True, now=11)
+    assert breaker.state is BreakerState.HALF_OPEN
+    # A half-open upstream that still fails its probe goes straight back to open
+    breaker.probe_result(False, now=12)
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_probe_failures_must_be_consecutive():
+    breaker = _breaker()
+    for healthy in (False, True, False, True, False):
+        breaker.probe_result(healthy, now=0)
+    assert breaker.state is BreakerState.CLOSED
+    # Request outcomes still count on their own
+    for _ in range(4):
+        breaker.record(0.01, failed=True, now=0)
+    assert breaker.state is BreakerState.OPEN
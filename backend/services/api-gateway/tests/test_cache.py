@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import List, Tuple
+
+import httpx
+import pytest
+from starlette.requests import Request
+
+import app.main as gateway
+from app.cache import CachedResponse, ResponseCache, etag_matches, parse_cache_control
+
+PATH = "/api/v1/catalog/games/featured"
+
+
+def _request(*headers: Tuple[str, str]) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": PATH,
+            "query_string": b"limit=5",
+            "headers": [(name.encode(), value.encode()) for name, value in headers],
+        }
+    )
+
+
+def _entry(**overrides) -> CachedResponse:
+    now = time.time()
+    fields = dict(
+        status_code=200,
+        headers=[("content-type", "application/json")],
+        body=b"{}",
+        etag='"v1"',
+        upstream_etag=True,
+        stored_at=now,
+        fresh_until=now + 60,
+        stale_until=now + 90,
+    )
+    fields.update(overrides)
+    return CachedResponse(**fields)
+
+
+def test_parse_cache_control():
+    assert parse_cache_control('public, max-age=60, s-maxage="30", no-transform') == {
+        "public": None,
+        "max-age": "60",
+        "s-maxage": "30",
+        "no-transform": None,
+    }
+    assert parse_cache_control(None) == {}
+
+
+def test_build_entry_freshness_follows_cache_control():
+    build = ResponseCache.build_entry
+    now = time.time()
+    entry = build(200, [("cache-control", "max-age=10, stale-while-revalidate=5")], b"x", 60)
+    assert entry.fresh_until == pytest.approx(now + 10, abs=1)
+    assert entry.stale_until == pytest.approx(now + 15, abs=1)
+    assert build(200, [("cache-control", "s-maxage=20, max-age=10")], b"x", 60).fresh_until == pytest.approx(
+        now + 20, abs=1
+    )
+    # No directives: the route TTL
+    assert build(200, [], b"x", 60).fresh_until == pytest.approx(now + 60, abs=1)
+
+
+@pytest.mark.parametrize(
+    "status,headers",
+    [
+        (404, []),
+        (200, [("cache-control", "private, max-age=60")]),
+        (200, [("cache-control", "no-store")]),
+        (200, [("cache-control", "max-age=0")]),
+        (200, [("set-cookie", "session=1")]),
+        (200, [("vary", "Authorization")]),
+    ],
+)
+def test_build_entry_refuses_unshareable_responses(status, headers):
+    assert ResponseCache.build_entry(status, headers, b"x", 60) is None
+
+
+def test_build_entry_etags():
+    upstream = ResponseCache.build_entry(200, [("etag", '"abc"')], b"x", 60)
+    assert upstream.etag == '"abc"' and upstream.upstream_etag
+    generated = ResponseCache.build_entry(200, [], b"x", 60)
+    assert generated.etag.startswith('W/"') and not generated.upstream_etag
+    assert generated.etag == ResponseCache.build_entry(200, [], b"x", 60).etag
+    assert ("etag", '"abc"') not in upstream.headers
+
+
+def test_etag_matches_uses_weak_comparison():
+    assert etag_matches('"a", W/"b"', 'W/"b"')
+    assert etag_matches('W/"a"', '"a"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"a"')
+
+
+def test_fresh_then_stale_then_expired():
+    entry = _entry(stored_at=100, fresh_until=160, stale_until=190)
+    assert entry.is_fresh(159) and entry.is_usable(159)
+    assert not entry.is_fresh(160) and entry.is_usable(189)
+    assert not entry.is_usable(190)
+    assert entry.age(130.5) == 30
+
+
+def test_refreshed_keeps_body_and_swr_window():
+    entry = _entry(stored_at=0, fresh_until=10, stale_until=40)
+    now = time.time()
+    fresh = ResponseCache.refreshed(entry, 60, [("Cache-Control", "max-age=5")])
+    assert fresh.body == entry.body and fresh.etag == entry.etag
+    assert fresh.fresh_until == pytest.approx(now + 5, abs=1)
+    assert fresh.stale_until - fresh.fresh_until == 30
+
+
+def test_cold_worker_is_warmed_from_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    entry = _entry(body=b"\x00binary")
+
+    async def run():
+        await ResponseCache(client).set("GET /x?", entry)
+        peer = ResponseCache(client)
+        return await peer.get("GET /x?"), await peer.get("GET /y?")
+
+    warmed, missing = asyncio.run(run())
+    assert warmed == entry
+    assert missing is None
+
+
+def test_expired_entries_are_not_served():
+    async def run():
+        cache = ResponseCache(None)
+        await cache.set("k", _entry(fresh_until=0, stale_until=time.time() - 1))
+        return await cache.get("k")
+
+    assert asyncio.run(run()) is None
+
+
+def test_start_refresh_runs_one_refresh_per_key():
+    cache = ResponseCache(None)
+    runs: List[str] = []
+
+    async def refresh(name: str) -> None:
+        await asyncio.sleep(0.01)
+        runs.append(name)
+
+    async def run():
+        started = [cache.start_refresh("k", refresh(str(i))) for i in range(3)]
+        await asyncio.gather(*cache._tasks)
+        started.append(cache.start_refresh("k", refresh("again")))
+        await asyncio.gather(*cache._tasks)
+        return started
+
+    assert asyncio.run(run()) == [True, False, False, True]
+    assert runs == ["0", "again"]
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """Route the gateway's cached path to a fake upstream and a private cache."""
+    calls: List[List[Tuple[str, str]]] = []
+
+    async def fetch(request, service_url, service, path, extra_headers):
+        calls.append(extra_headers)
+        if ("if-none-match", '"v1"') in extra_headers:
+            return httpx.Response(304, headers={"cache-control": "max-age=60"})
+        return httpx.Response(
+            200,
+            headers={"cache-control": "max-age=60", "etag": '"v1"', "content-type": "application/json"},
+            content=b'{"games": []}',
+        )
+
+    monkeypatch.setattr(gateway, "_fetch_buffered", fetch)
+    monkeypatch.setattr(gateway, "response_cache", ResponseCache(None))
+    return calls
+
+
+def _get(*headers: Tuple[str, str]):
+    return gateway.cached_proxy(_request(*headers), "http://catalog", "catalog", PATH, 60)
+
+
+def test_cached_proxy_miss_then_hit(upstream):
+    async def run():
+        return await _get(), await _get()
+
+    miss, hit = asyncio.run(run())
+    assert miss.headers["x-cache"] == "MISS" and hit.headers["x-cache"] == "HIT"
+    assert hit.body == b'{"games": []}'
+    assert hit.headers["etag"] == '"v1"'
+    assert len(upstream) == 1
+
+
+def test_cached_proxy_answers_if_none_match_with_304(upstream):
+    async def run():
+        await _get()
+        return await _get(("if-none-match", '"v1"'))
+
+    response = asyncio.run(run())
+    assert response.status_code == 304
+    assert response.body == b""
+    assert len(upstream) == 1
+
+
+def test_cached_proxy_serves_stale_while_revalidating_once(upstream):
+    async def run():
+        await _get()
+        key = gateway.response_cache.key_for(_request())
+        entry = await gateway.response_cache.get(key)
+        entry.fresh_until = time.time() - 1
+        stale = [await _get() for _ in range(3)]
+        await asyncio.gather(*gateway.response_cache._tasks)
+        return stale, await _get()
+
+    stale, fresh = asyncio.run(run())
+    assert [response.headers["x-cache"] for response in stale] == ["STALE"] * 3
+    assert fresh.headers["x-cache"] == "HIT"
+    # One initial fetch, then a single conditional revalidation answered with 304
+    assert upstream == [[], [("if-none-match", '"v1"')]]
+    assert gateway.response_cache.stats["revalidated"] == 1
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import gzip
+
+from httpx import Headers
+
+from app.compression import choose_encoding, compress, encoded_headers, negotiate
+
+JSON = Headers({"content-type": "application/json"})
+
+
+def test_negotiate_prefers_highest_q_then_server_order():
+    assert negotiate("gzip, br") == "br"
+    assert negotiate("gzip;q=1.0, br;q=0.5") == "gzip"
+    assert negotiate("br;q=0, gzip") == "gzip"
+    assert negotiate("identity") is None
+    assert negotiate(None) is None
+
+
+def test_choose_encoding_skips_small_encoded_and_binary_bodies():
+    assert choose_encoding("gzip", 200, JSON, size=4096) == "gzip"
+    assert choose_encoding("gzip", 200, JSON, size=100) is None
+    assert choose_encoding("gzip", 304, JSON, size=4096) is None
+    encoded = Headers({"content-type": "application/json", "content-encoding": "br"})
+    assert choose_encoding("gzip", 200, encoded, size=4096) is None
+    assert choose_encoding("gzip", 200, Headers({"content-type": "image/png"}), size=4096) is None
+
+
+def test_encoded_headers_weaken_etag_and_extend_vary():
+    body = b'{"items": []}' * 200
+    assert gzip.decompress(compress(body, "gzip")) == body
+    headers = encoded_headers(
+        [("content-type", "application/json"), ("etag", '"abc"'), ("vary", "Origin"), ("content-length", "2600")],
+        "gzip",
+    )
+    assert ("etag", 'W/"abc"') in headers
+    assert ("vary", "Origin, Accept-Encoding") in headers
+    assert ("content-encoding", "gzip") in headers
+    assert all(name != "content-length" for name, _ in headers)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+from redis.exceptions import ConnectionError as RedisConnectionError
+from starlette.requests import Request
+
+import app.main as gateway
+from app.auth import TokenVerifier
+from app.ratelimit import LocalTokenBucket, RateLimitPolicy, RateLimiter, policy_for
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")  # fakeredis needs it to run the Lua scripts
+
+
+def _limiter(algorithm: str) -> RateLimiter:
+    return RateLimiter(fakeredis.aioredis.FakeRedis(), algorithm=algorithm)
+
+
+@pytest.mark.parametrize("algorithm", ["sliding_window", "token_bucket"])
+def test_lua_limiter_allows_up_to_the_limit(algorithm):
+    limiter = _limiter(algorithm)
+    policy = RateLimitPolicy(key="ip:10.0.0.1", limit=3)
+
+    async def run():
+        return [await limiter.hit(policy) for _ in range(4)]
+
+    results = asyncio.run(run())
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after > 0
+
+
+def test_lua_limiter_keys_are_independent():
+    limiter = _limiter("sliding_window")
+
+    async def run():
+        await limiter.hit(RateLimitPolicy(key="a", limit=1))
+        return await limiter.hit(RateLimitPolicy(key="b", limit=1))
+
+    assert asyncio.run(run()).allowed
+
+
+def test_local_bucket_refills_over_time():
+    bucket = LocalTokenBucket(max_keys=10)
+    policy = RateLimitPolicy(key="k", limit=2, window=2.0)
+    assert bucket.hit(policy, now=0).allowed
+    assert bucket.hit(policy, now=0).allowed
+    denied = bucket.hit(policy, now=0)
+    assert not denied.allowed
+    assert denied.retry_after == pytest.approx(1.0)
+    assert bucket.hit(policy, now=1.0).allowed
+
+
+def test_local_bucket_evicts_least_recent_key():
+    bucket = LocalTokenBucket(max_keys=2)
+    for key in ("a", "b", "c"):
+        bucket.hit(RateLimitPolicy(key=key, limit=5), now=0)
+    assert list(bucket._buckets) == ["b", "c"]
+
+
+def test_redis_outage_falls_back_locally_and_logs_once(caplog):
+    limiter = _limiter("sliding_window")
+
+    async def unavailable(policy):
+        await asyncio.sleep(0.01)
+        raise RedisConnectionError("connection refused")
+
+    limiter._hit_redis = unavailable
+    policy = RateLimitPolicy(key="ip:10.0.0.2", limit=5)
+
+    async def run():
+        return await asyncio.gather(*[limiter.hit(policy) for _ in range(8)])
+
+    with caplog.at_level(logging.WARNING, logger="app.ratelimit"):
+        results = asyncio.run(run())
+    assert [r.allowed for r in results] == [True] * 5 + [False] * 3
+    assert len([r for r in caplog.records if r.levelno == logging.WARNING]) == 1
+
+    # Back after the cooldown: Redis answers again and the next outage is logged anew
+    caplog.clear()
+    limiter._redis_disabled_until = 0.0
+    del limiter._hit_redis
+    assert asyncio.run(limiter.hit(policy)).allowed
+    assert not limiter._redis_down
+
+
+def _request(token: str | None = None, ip: str = "10.0.0.9") -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "client": (ip, 1234)})
+
+
+@pytest.mark.parametrize("secret", ["jwt-secret", ""])
+def test_junk_bearer_tokens_share_the_ip_bucket(monkeypatch, secret):
+    monkeypatch.setattr(gateway.settings, "JWT_SECRET_KEY", secret)
+    monkeypatch.setattr(gateway.settings, "RATE_LIMIT_PER_MINUTE", 3)
+    monkeypatch.setattr(gateway.settings, "RATE_LIMIT_USER_PER_MINUTE", 100)
+    monkeypatch.setattr(gateway, "rate_limiter", _limiter("sliding_window"))
+    monkeypatch.setattr(gateway, "token_verifier", TokenVerifier())
+
+    async def run():
+        for n in range(3):
+            await gateway.check_rate_limit(_request(f"junk-{n}"), "catalog")
+        with pytest.raises(HTTPException) as denied:
+            await gateway.check_rate_limit(_request("junk-3"), "catalog")
+        return denied.value
+
+    assert asyncio.run(run()).status_code == 429
+
+
+def test_verified_subjects_get_their_own_bucket(monkeypatch):
+    monkeypatch.setattr(gateway.settings, "JWT_SECRET_KEY", "jwt-secret")
+    monkeypatch.setattr(gateway, "token_verifier", TokenVerifier())
+    monkeypatch.setattr(gateway.settings, "RATE_LIMIT_USER_PER_MINUTE", 100)
+    token = jwt.encode({"sub": "42", "exp": int(time.time()) + 60}, "jwt-secret", algorithm="HS256")
+
+    request = _request(token)
+    policy = policy_for(request, "catalog", gateway.caller_claims(request))
+    assert (policy.key, policy.limit) == ("user:42", 100)
+    # A different token for the same subject draws on the same bucket
+    other = jwt.encode({"sub": "42", "exp": int(time.time()) + 120}, "jwt-secret", algorithm="HS256")
+    assert policy_for(_request(other), "catalog", gateway.caller_claims(_request(other))).key == "user:42"
+    assert policy_for(_request("junk"), "catalog", gateway.caller_claims(_request("junk"))).key == "ip:10.0.0.9"
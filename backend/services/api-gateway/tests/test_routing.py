@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from app.routing import RouteTable
+
+
+def _table() -> RouteTable:
+    return RouteTable(
+        {
+            "/api/v1/users": "http://users:8001",
+            "/api/v1/users-admin": "http://admin:9000/",
+            "/api/v1/catalog": "http://catalog:8002",
+            "/api/v1/catalog/games/featured": "http://shelves:8020",
+        }
+    )
+
+
+def test_match_uses_segment_boundaries():
+    table = _table()
+    assert table.match("/api/v1/users/me").service == "users"
+    assert table.match("/api/v1/users-admin/audit").upstream == "http://admin:9000"
+    assert table.match("/api/v1/usersx") is None
+    assert table.match("/api/v2/users") is None
+
+
+def test_match_prefers_longest_prefix():
+    table = _table()
+    assert table.match("/api/v1/catalog/games/featured").upstream == "http://shelves:8020"
+    assert table.match("/api/v1/catalog/games/on-sale").upstream == "http://catalog:8002"
+    assert table.match("api/v1/catalog//games").service == "catalog"
+
+
+def test_prefixes_are_normalized():
+    table = RouteTable({"api/v1/forum/": "http://forum:8015"})
+    assert table.prefixes == ["/api/v1/forum"]
+    assert len(table) == 1
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights: SingleFlight[bytes] = SingleFlight()
+    calls = 0
+
+    async def fetch() -> bytes:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"payload"
+
+    async def run():
+        return await asyncio.gather(*[flights.do("GET /games/on-sale?", fetch) for _ in range(50)])
+
+    results = asyncio.run(run())
+    assert calls == 1
+    assert set(results) == {b"payload"}
+    assert flights.stats == {"executed": 1, "collapsed": 49}
+    assert flights.inflight == 0
+
+
+def test_errors_propagate_and_key_is_released():
+    flights: SingleFlight[int] = SingleFlight()
+
+    async def boom() -> int:
+        raise RuntimeError("upstream down")
+
+    async def ok() -> int:
+        return 1
+
+    async def run():
+        try:
+            await flights.do("k", boom)
+        except RuntimeError:
+            pass
+        else:  # pragma: no cover
+            raise AssertionError("expected RuntimeError")
+        return await flights.do("k", ok)
+
+    assert asyncio.run(run()) == 1
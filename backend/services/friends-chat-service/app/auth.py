@@ -1,7 +1,12 @@
 """JWT helpers for Friends & Chat service."""
 from __future__ import annotations
 
-from typing import Any, Dict
+import base64
+import hashlib
+import hmac
+import json
+import time
+from typing import Any, Dict, Optional
 
 from fastapi import Depends, HTTPException, Request, status
 from jose import JWTError, jwt
@@ -9,6 +14,38 @@ from jose import JWTError, jwt
 from .core.config import settings
 
 
+def _unb64(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+# Each service image is built from its own directory, so user-service/app/core/auth.py and
+# friends-chat-service/app/auth.py carry identical copies; api-gateway/tests/test_auth.py
+# checks they match and accept what the gateway signs.
+def verify_internal_identity(header: str | None) -> Optional[Dict[str, Any]]:
+    """Return the claims from a gateway-signed ``X-Internal-Identity`` header.
+
+    Returns None when the header is absent, unsigned, forged or expired, in
+    which case callers fall back to decoding the bearer token themselves.
+    """
+    secret = settings.INTERNAL_IDENTITY_SECRET
+    if not secret or not header or "." not in header:
+        return None
+    payload, signature = header.rsplit(".", 1)
+    expected = hmac.new(secret.encode(), payload.encode("ascii", "ignore"), hashlib.sha256).digest()
+    try:
+        if not hmac.compare_digest(_unb64(signature), expected):
+            return None
+        claims = json.loads(_unb64(payload))
+    except ValueError:
+        return None
+    if not isinstance(claims, dict):
+        return None
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)) and exp <= time.time():
+        return None
+    return claims
+
+
 def decode_token(token: str) -> Dict[str, Any]:
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -20,10 +57,12 @@ def decode_token(token: str) -> Dict[str, Any]:
 
 
 def get_current_user_id(request: Request) -> str:
+    claims = verify_internal_identity(request.headers.get("X-Internal-Identity"))
+    if claims is not None and "sub" in claims:
+        return str(claims["sub"])
     auth_header = request.headers.get("Authorization")
     if not auth_header or not auth_header.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing bearer token")
     token = auth_header.split(" ", 1)[1]
     payload = decode_token(token)
     return str(payload["sub"])
-
@@ -21,6 +21,8 @@ class Settings:
 
     SECRET_KEY: str = os.getenv("SECRET_KEY", "change-me")
     ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
+    # Shared with the API gateway to trust its signed X-Internal-Identity header.
+    INTERNAL_IDENTITY_SECRET: str = os.getenv("INTERNAL_IDENTITY_SECRET", "")
 
     ALLOWED_ORIGINS: List[str] = field(
         default_factory=lambda: _parse_allowed_origins(os.getenv("ALLOWED_ORIGINS"))
@@ -1,16 +1,20 @@
 """Catalog endpoints."""
 from __future__ import annotations
 
+from datetime import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from sqlalchemy import select, text
 
 from app.db.session import get_session
+from app.models import Game
+from app.repository.pagination import count_rows, decode_cursor, encode_cursor
 from app.schemas import (
     GameCreate,
+    GameImportResponse,
     GameResponse,
     GameSearchFilters,
     GameSearchResponse,
@@ -23,7 +27,9 @@ from app.schemas import (
     TagResponse,
 )
 from app.services import CatalogService
+from app.services.game_import import parse_ndjson_line
 from app.utils.exceptions import ConflictError, NotFoundError, ServiceError
+from app.utils.serialization import RawJSONResponse, game_fragments, json_array, json_object
 
 router = APIRouter()
 
@@ -58,68 +64,180 @@ async def create_game(
         raise _http_error(exc)
 
 
-@router.get("/games")
+async def _ndjson_records(request: Request):
+    """``(line number, record or error)`` from a streamed NDJSON body."""
+    buffer, line_no = b"", 0
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if line.strip():
+                yield line_no, parse_ndjson_line(line)
+    if buffer.strip():
+        yield line_no + 1, parse_ndjson_line(buffer)
+
+
+@router.post("/games/import", response_model=GameImportResponse)
+async def import_games(
+    request: Request,
+    batch_size: int = Query(500, ge=1, le=5000),
+    max_errors: int | None = Query(None, ge=0),
+    service: CatalogService = Depends(get_catalog_service),
+):
+    """
+    Bulk upsert games from an NDJSON body (one game per line), keyed by steam_app_id.
+    The body is consumed as it streams in and written in batches; for CSV files
+    use ``python -m app.import_games``.
+    """
+    try:
+        report = await service.import_games(
+            _ndjson_records(request), batch_size=batch_size, max_errors=max_errors
+        )
+    except ServiceError as exc:
+        raise _http_error(exc)
+    return GameImportResponse(
+        received=report.received,
+        inserted=report.inserted,
+        updated=report.updated,
+        failed=report.failed,
+        errors=[{"line": line, "message": message} for line, message in report.errors],
+    )
+
+
+def _count_mode(count: str | None, cursor: str | None) -> str:
+    """Offset pages keep their exact totals by default; cursor pages skip counting."""
+    if count:
+        return count
+    return "none" if cursor else "exact"
+
+
+def _total_pages(total: int | None, per_page: int) -> int | None:
+    if total is None:
+        return None
+    return max(1, (total + per_page - 1) // per_page)
+
+
+@router.get(
+    "/games",
+    response_class=RawJSONResponse,
+    responses={200: {"model": GameSearchResponse}},
+)
 async def search_games(
     filters: GameSearchFilters = Depends(),
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    count: str | None = Query(None, pattern="^(exact|estimate|none)$"),
+    facets: bool = Query(False, description="Include genre/tag/platform/price/feature counts"),
     service: CatalogService = Depends(get_catalog_service),
 ):
-    games, total = await service.search(filters, page, per_page)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-
-    # Convert ORM objects to Pydantic models safely
-    game_responses = []
-    for game in games:
-        # Convert relations to response models while still in async context
-        genres = [GenreResponse.model_validate(g) for g in (game.genres or [])]
-        tags = [TagResponse.model_validate(t) for t in (game.tags or [])]
-        platforms = [PlatformResponse.model_validate(p) for p in (game.platforms or [])]
-        
-        # Handle metadata_json - JSONB column
-        metadata = game.metadata_json if hasattr(game, 'metadata_json') else None
-        
-        # Create response using from_orm_with_relations
-        game_response = GameResponse.from_orm_with_relations(
-            game,
-            genres=genres,
-            tags=tags,
-            platforms=platforms,
+    try:
+        result = await service.search(
+            filters,
+            page,
+            per_page,
+            cursor=cursor,
+            count=_count_mode(count, cursor),
+            with_facets=facets,
+        )
+    except ServiceError as exc:
+        raise _http_error(exc)
+    total = result.total
+
+    # Encoded straight from the ORM rows (cached per game); see app.utils.serialization
+    return RawJSONResponse(
+        json_object(
+            {"games": json_array(game_fragments.encode(game) for game in result.items)},
+            {
+                "total": total,
+                "page": page,
+                "per_page": per_page,
+                "total_pages": _total_pages(total, per_page),
+                "filters_applied": filters.model_dump(mode="json"),
+                "next_cursor": result.next_cursor,
+                "facets": result.facets,
+            },
         )
-        # Set metadata explicitly
-        game_response.metadata = metadata
-        
-        game_responses.append(game_response)
-
-    response = GameSearchResponse(
-        games=game_responses,
-        total=total,
-        page=page,
-        per_page=per_page,
-        total_pages=total_pages,
-        filters_applied=filters,
     )
-    return response.model_dump()
+
+
+async def _simple_page(
+    session: AsyncSession,
+    columns: str,
+    page: int,
+    per_page: int,
+    cursor: str | None,
+    count: str | None,
+) -> JSONResponse:
+    """Page through ``games`` by id: keyset when given a cursor, OFFSET otherwise."""
+    if cursor:
+        try:
+            (after_id,) = decode_cursor(cursor, "id:asc", [Game.id])
+        except ServiceError as exc:
+            raise _http_error(exc)
+        where, params = "WHERE id > :after_id", {"after_id": after_id}
+    else:
+        where, params = "", {"offset": (page - 1) * per_page}
+
+    result = await session.execute(
+        text(
+            f"""
+            SELECT {columns}
+            FROM games
+            {where}
+            ORDER BY id
+            LIMIT :limit {"" if cursor else "OFFSET :offset"}
+            """
+        ),
+        {**params, "limit": per_page + 1},
+    )
+    rows = []
+    for r in result:
+        row_dict = dict(r._mapping)
+        # Convert datetime to ISO string for JSON serialization (SQLite returns text already)
+        if isinstance(row_dict.get('release_date'), datetime):
+            row_dict['release_date'] = row_dict['release_date'].isoformat()
+        rows.append(row_dict)
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor("id:asc", [rows[-1]["id"]])
+
+    total = await count_rows(session, select(Game.id), _count_mode(count, cursor))
+
+    return JSONResponse(
+        {
+            "games": rows,
+            "total": total,
+            "page": page,
+            "per_page": per_page,
+            "total_pages": _total_pages(total, per_page),
+            "next_cursor": next_cursor,
+        }
+    )
 
 
 @router.get("/games-simple")
+@router.get("/games/simple")
 async def list_games_simple(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    count: str | None = Query(None, pattern="^(exact|estimate|none)$"),
     session: AsyncSession = Depends(get_session),
 ):
     """
     Lightweight games listing used by the StorePage to avoid complex ORM/Pydantic issues.
-    Returns only basic fields required by the UI.
+    Returns only basic fields required by the UI. ``/games/simple`` is an alias.
     """
-    offset = (page - 1) * per_page
-
-    result = await session.execute(
-        text(
-            """
-            SELECT
+    return await _simple_page(
+        session,
+        """
               id,
               title,
+              slug,
               description,
               short_description,
               price,
@@ -133,145 +251,36 @@ async def list_games_simple(
               total_reviews,
               positive_reviews,
               negative_reviews
-            FROM games
-            ORDER BY id
-            LIMIT :limit OFFSET :offset
-            """
-        ),
-        {"limit": per_page, "offset": offset},
+        """,
+        page,
+        per_page,
+        cursor,
+        count,
     )
-    rows = []
-    for r in result:
-        row_dict = dict(r._mapping)
-        # Convert datetime to ISO string for JSON serialization
-        if 'release_date' in row_dict and row_dict['release_date']:
-            row_dict['release_date'] = row_dict['release_date'].isoformat()
-        rows.append(row_dict)
 
-    count_result = await session.execute(text("SELECT COUNT(*) FROM games"))
-    total = int(count_result.scalar_one() or 0)
-    total_pages = max(1, (total + per_page - 1) // per_page)
 
-    return JSONResponse(
-        {
-            "games": rows,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "total_pages": total_pages,
-        }
-    )
-
-
-@router.get("/games/by-slug/{slug}", response_model=GameResponse)
+@router.get(
+    "/games/by-slug/{slug}",
+    response_class=RawJSONResponse,
+    responses={200: {"model": GameResponse}},
+)
 async def get_game_by_slug(
     slug: str,
-    session: AsyncSession = Depends(get_session),
     service: CatalogService = Depends(get_catalog_service),
 ):
     """
-    Get a game by its slug (title converted to URL-friendly format).
-    Falls back to title matching if slug doesn't exist in database.
+    Get a game by its URL slug. Former slugs of renamed games and legacy
+    title-derived slugs (e.g. ``the-witcher-3:-wild-hunt``) resolve too; the
+    response carries the canonical ``slug``.
     """
     try:
-        # Convert slug back to title for matching
-        # Handle both "cyberpunk-2077" and "cyberpunk 2077" formats
-        title_from_slug = slug.replace('-', ' ').replace('_', ' ')
-        
-        # Try to find game by exact title match (case-insensitive) and fetch requirements in one query
-        from sqlalchemy import text
-        result = await session.execute(
-            text("""
-                SELECT id, pc_requirements, mac_requirements, linux_requirements
-                FROM games 
-                WHERE LOWER(TRIM(title)) = LOWER(TRIM(:title))
-                LIMIT 1
-            """),
-            {"title": title_from_slug}
-        )
-        row = result.mappings().first()
-        
-        # If exact match not found, try normalized matching (remove special chars)
-        if not row:
-            # Normalize both slug and title by removing special characters
-            normalized_slug = title_from_slug.lower().replace(':', '').replace('-', ' ').replace('_', ' ').strip()
-            result2 = await session.execute(
-                text("""
-                    SELECT id, pc_requirements, mac_requirements, linux_requirements
-                    FROM games 
-                    WHERE LOWER(REPLACE(REPLACE(REPLACE(TRIM(title), ':', ''), '-', ' '), '_', ' ')) = :normalized
-                    LIMIT 1
-                """),
-                {"normalized": normalized_slug}
-            )
-            row = result2.mappings().first()
-        
-        if row:
-            game_id = row['id'] if isinstance(row, dict) else row[0]
-            game = await service.get_game(game_id)
-            
-            # Fetch requirements separately using raw SQL with explicit text cast
-            reqs_result = await session.execute(
-                text("""
-                    SELECT 
-                        pc_requirements::text as pc_req,
-                        mac_requirements::text as mac_req,
-                        linux_requirements::text as linux_req
-                    FROM games WHERE id = :game_id
-                """),
-                {"game_id": game_id}
-            )
-            reqs_row = reqs_result.mappings().first()
-            
-            # Build response with requirements data
-            response_dict = GameResponse.from_orm_with_relations(
-                game,
-                genres=[GenreResponse.model_validate(g) for g in (game.genres or [])],
-                tags=[TagResponse.model_validate(t) for t in (game.tags or [])],
-                platforms=[PlatformResponse.model_validate(p) for p in (game.platforms or [])],
-            ).model_dump()
-            
-            # Parse and add requirements from the query result
-            from app.schemas import SystemRequirements
-            import json
-            
-            if reqs_row:
-                pc_req_text = reqs_row.get('pc_req')
-                if pc_req_text:
-                    try:
-                        pc_req_dict = json.loads(pc_req_text)
-                        response_dict['pc_requirements'] = SystemRequirements(**pc_req_dict).model_dump()
-                    except Exception:
-                        pass
-                
-                mac_req_text = reqs_row.get('mac_req')
-                if mac_req_text:
-                    try:
-                        mac_req_dict = json.loads(mac_req_text)
-                        response_dict['mac_requirements'] = SystemRequirements(**mac_req_dict).model_dump()
-                    except Exception:
-                        pass
-                
-                linux_req_text = reqs_row.get('linux_req')
-                if linux_req_text:
-                    try:
-                        linux_req_dict = json.loads(linux_req_text)
-                        response_dict['linux_requirements'] = SystemRequirements(**linux_req_dict).model_dump()
-                    except Exception:
-                        pass
-            
-            return GameResponse(**response_dict)
-        else:
-            raise HTTPException(status_code=404, detail=f"Game not found with slug: {slug}")
-    except HTTPException:
-        raise
+        game = await service.get_game_by_slug(slug)
     except ServiceError as exc:
         raise _http_error(exc)
-    except Exception as exc:
-        raise HTTPException(status_code=500, detail=f"Error fetching game: {str(exc)}")
+    return RawJSONResponse(game_fragments.encode(game))
 
 
-@router.get("/games/{game_id}", response_model=GameResponse)
+@router.get("/games/{game_id:int}", response_model=GameResponse)
 async def get_game(game_id: int, service: CatalogService = Depends(get_catalog_service)):
     try:
         game = await service.get_game(game_id)
@@ -285,7 +294,7 @@ async def get_game(game_id: int, service: CatalogService = Depends(get_catalog_s
         raise _http_error(exc)
 
 
-@router.put("/games/{game_id}", response_model=GameResponse)
+@router.put("/games/{game_id:int}", response_model=GameResponse)
 async def update_game(
     game_id: int,
     payload: GameUpdate,
@@ -303,7 +312,7 @@ async def update_game(
         raise _http_error(exc)
 
 
-@router.delete("/games/{game_id}")
+@router.delete("/games/{game_id:int}")
 async def delete_game(
     game_id: int, service: CatalogService = Depends(get_catalog_service)
 ):
@@ -314,106 +323,43 @@ async def delete_game(
         raise _http_error(exc)
 
 
-@router.get("/games/featured")
+@router.get(
+    "/games/featured",
+    response_class=RawJSONResponse,
+    responses={200: {"model": List[GameResponse]}},
+)
 async def get_featured_games(
     limit: int = Query(10, ge=1, le=50),
     service: CatalogService = Depends(get_catalog_service),
 ):
-    games = await service.featured_games(limit)
-    responses = [
-        GameResponse.from_orm_with_relations(
-            game,
-            genres=[GenreResponse.model_validate(g) for g in (game.genres or [])],
-            tags=[TagResponse.model_validate(t) for t in (game.tags or [])],
-            platforms=[PlatformResponse.model_validate(p) for p in (game.platforms or [])],
-        )
-        for game in games
-    ]
-    return [g.model_dump() for g in responses]
+    # Pre-encoded GameResponse fragments from the shelf cache
+    return RawJSONResponse(json_array(await service.featured_games(limit)))
 
 
-@router.get("/games/new-releases")
+@router.get(
+    "/games/new-releases",
+    response_class=RawJSONResponse,
+    responses={200: {"model": List[GameResponse]}},
+)
 async def get_new_releases(
     limit: int = Query(10, ge=1, le=50),
     service: CatalogService = Depends(get_catalog_service),
 ):
-    games = await service.new_releases(limit)
-    responses = [
-        GameResponse.from_orm_with_relations(
-            game,
-            genres=[GenreResponse.model_validate(g) for g in (game.genres or [])],
-            tags=[TagResponse.model_validate(t) for t in (game.tags or [])],
-            platforms=[PlatformResponse.model_validate(p) for p in (game.platforms or [])],
-        )
-        for game in games
-    ]
-    return [g.model_dump() for g in responses]
+    # Pre-encoded GameResponse fragments from the shelf cache
+    return RawJSONResponse(json_array(await service.new_releases(limit)))
 
 
-@router.get("/games/on-sale")
+@router.get(
+    "/games/on-sale",
+    response_class=RawJSONResponse,
+    responses={200: {"model": List[GameResponse]}},
+)
 async def get_on_sale_games(
     limit: int = Query(10, ge=1, le=50),
     service: CatalogService = Depends(get_catalog_service),
 ):
-    games = await service.on_sale(limit)
-    responses = [
-        GameResponse.from_orm_with_relations(
-            game,
-            genres=[GenreResponse.model_validate(g) for g in (game.genres or [])],
-            tags=[TagResponse.model_validate(t) for t in (game.tags or [])],
-            platforms=[PlatformResponse.model_validate(p) for p in (game.platforms or [])],
-        )
-        for game in games
-    ]
-    return [g.model_dump() for g in responses]
-
-
-@router.get("/games/simple")
-async def list_games_simple(
-    page: int = Query(1, ge=1),
-    per_page: int = Query(20, ge=1, le=100),
-    session: AsyncSession = Depends(get_session),
-):
-    """
-    Lightweight games listing used by the StorePage to avoid complex ORM/Pydantic issues.
-    Returns only basic fields required by the UI.
-    """
-    offset = (page - 1) * per_page
-
-    result = await session.execute(
-        text(
-            """
-            SELECT
-              id,
-              title,
-              price,
-              header_image_url AS banner_image_url,
-              capsule_image_url AS cover_image_url,
-              icon_url,
-              average_rating,
-              total_reviews
-            FROM games
-            ORDER BY id
-            LIMIT :limit OFFSET :offset
-            """
-        ),
-        {"limit": per_page, "offset": offset},
-    )
-    rows = [dict(r._mapping) for r in result]
-
-    count_result = await session.execute(text("SELECT COUNT(*) FROM games"))
-    total = int(count_result.scalar_one() or 0)
-    total_pages = max(1, (total + per_page - 1) // per_page)
-
-    return JSONResponse(
-        {
-            "games": rows,
-            "total": total,
-            "page": page,
-            "per_page": per_page,
-            "total_pages": total_pages,
-        }
-    )
+    # Pre-encoded GameResponse fragments from the shelf cache
+    return RawJSONResponse(json_array(await service.on_sale(limit)))
 
 
 @router.post("/genres", response_model=GenreResponse, status_code=status.HTTP_201_CREATED)
@@ -512,157 +458,12 @@ async def get_platform(
 @router.get("/game-icons")
 async def get_game_icons(
     limit: int = Query(100, ge=1, le=500),
-    session: AsyncSession = Depends(get_session),
-):
-    """
-    Get available game icons for user avatars.
-    Returns a list of game icon URLs that users can choose from.
-    """
-    # Use subquery to handle DISTINCT with RANDOM() ordering
-    result = await session.execute(
-        text(
-            """
-            SELECT icon_url FROM (
-                SELECT DISTINCT icon_url
-                FROM games
-                WHERE icon_url IS NOT NULL AND icon_url != ''
-            ) AS distinct_icons
-            ORDER BY RANDOM()
-            LIMIT :limit
-            """
-        ),
-        {"limit": limit},
-    )
-    icons = [row[0] for row in result if row[0]]
-    
-    # If we don't have enough icons, also include capsule images as fallback
-    if len(icons) < limit:
-        result2 = await session.execute(
-            text(
-                """
-                SELECT capsule_image_url FROM (
-                    SELECT DISTINCT capsule_image_url
-                    FROM games
-                    WHERE capsule_image_url IS NOT NULL 
-                      AND capsule_image_url != ''
-                      AND capsule_image_url != ALL(:icons)
-                ) AS distinct_capsules
-                ORDER BY RANDOM()
-                LIMIT :remaining
-                """
-            ),
-            {"icons": icons, "remaining": limit - len(icons)},
-        )
-        icons.extend([row[0] for row in result2 if row[0]])
-    
-    return {"icons": icons, "count": len(icons)}
-
-
-    payload: TagCreate, service: CatalogService = Depends(get_catalog_service)
-):
-    try:
-        return await service.create_tag(payload)
-    except ServiceError as exc:
-        raise _http_error(exc)
-
-
-@router.get("/tags", response_model=List[TagResponse])
-async def list_tags(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
     service: CatalogService = Depends(get_catalog_service),
-):
-    return await service.list_tags(skip, limit)
-
-
-@router.get("/tags/{tag_id}", response_model=TagResponse)
-async def get_tag(
-    tag_id: int, service: CatalogService = Depends(get_catalog_service)
-):
-    try:
-        return await service.get_tag(tag_id)
-    except ServiceError as exc:
-        raise _http_error(exc)
-
-
-@router.post(
-    "/platforms", response_model=PlatformResponse, status_code=status.HTTP_201_CREATED
-)
-async def create_platform(
-    payload: PlatformCreate,
-    service: CatalogService = Depends(get_catalog_service),
-):
-    try:
-        return await service.create_platform(payload)
-    except ServiceError as exc:
-        raise _http_error(exc)
-
-
-@router.get("/platforms", response_model=List[PlatformResponse])
-async def list_platforms(
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000),
-    service: CatalogService = Depends(get_catalog_service),
-):
-    return await service.list_platforms(skip, limit)
-
-
-@router.get("/platforms/{platform_id}", response_model=PlatformResponse)
-async def get_platform(
-    platform_id: int,
-    service: CatalogService = Depends(get_catalog_service),
-):
-    try:
-        return await service.get_platform(platform_id)
-    except ServiceError as exc:
-        raise _http_error(exc)
-
-
-@router.get("/game-icons")
-async def get_game_icons(
-    limit: int = Query(100, ge=1, le=500),
-    session: AsyncSession = Depends(get_session),
 ):
     """
     Get available game icons for user avatars.
-    Returns a list of game icon URLs that users can choose from.
+    Returns a random sample of distinct game icon URLs, topped up with capsule
+    images when there are fewer icons than requested.
     """
-    # Use subquery to handle DISTINCT with RANDOM() ordering
-    result = await session.execute(
-        text(
-            """
-            SELECT icon_url FROM (
-                SELECT DISTINCT icon_url
-                FROM games
-                WHERE icon_url IS NOT NULL AND icon_url != ''
-            ) AS distinct_icons
-            ORDER BY RANDOM()
-            LIMIT :limit
-            """
-        ),
-        {"limit": limit},
-    )
-    icons = [row[0] for row in result if row[0]]
-    
-    # If we don't have enough icons, also include capsule images as fallback
-    if len(icons) < limit:
-        result2 = await session.execute(
-            text(
-                """
-                SELECT capsule_image_url FROM (
-                    SELECT DISTINCT capsule_image_url
-                    FROM games
-                    WHERE capsule_image_url IS NOT NULL 
-                      AND capsule_image_url != ''
-                      AND capsule_image_url != ALL(:icons)
-                ) AS distinct_capsules
-                ORDER BY RANDOM()
-                LIMIT :remaining
-                """
-            ),
-            {"icons": icons, "remaining": limit - len(icons)},
-        )
-        icons.extend([row[0] for row in result2 if row[0]])
-    
+    icons = await service.sample_icons(limit)
     return {"icons": icons, "count": len(icons)}
-
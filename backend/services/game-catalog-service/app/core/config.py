@@ -26,6 +26,34 @@ class Settings:
     ALLOWED_ORIGINS: List[str] = field(
         default_factory=lambda: _parse_origins(os.getenv("ALLOWED_ORIGINS"))
     )
+    # In-memory columnar snapshot serving shelves and simple filters (needs NumPy)
+    CATALOG_SNAPSHOT_ENABLED: bool = (
+        os.getenv("CATALOG_SNAPSHOT_ENABLED", "true").lower() in {"1", "true", "yes"}
+    )
+    CATALOG_SNAPSHOT_REFRESH_SECONDS: float = float(
+        os.getenv("CATALOG_SNAPSHOT_REFRESH_SECONDS", "5")
+    )
+    # Facet bitmaps re-read games written by other workers at least this often
+    CATALOG_FACET_REFRESH_SECONDS: float = float(
+        os.getenv("CATALOG_FACET_REFRESH_SECONDS", "5")
+    )
+    # Filter and hydrate genres/tags/platforms from the games id arrays (Postgres only)
+    CATALOG_RELATION_ARRAYS: bool = (
+        os.getenv("CATALOG_RELATION_ARRAYS", "true").lower() in {"1", "true", "yes"}
+    )
+    # Storefront shelf cache; without a Redis URL each worker caches on its own
+    GAME_CATALOG_REDIS_URL: str = os.getenv("GAME_CATALOG_REDIS_URL", "")
+    SHELF_CACHE_SIZE: int = int(os.getenv("SHELF_CACHE_SIZE", "50"))
+    SHELF_LOCAL_TTL_SECONDS: float = float(os.getenv("SHELF_LOCAL_TTL_SECONDS", "2"))
+    SHELF_REDIS_TTL_SECONDS: int = int(os.getenv("SHELF_REDIS_TTL_SECONDS", "3600"))
+    # Without a shared generation (no Redis, or Redis down), other workers' writes are
+    # invisible, so a worker rebuilds its shelves once they are this old
+    SHELF_LOCAL_MAX_AGE_SECONDS: float = float(os.getenv("SHELF_LOCAL_MAX_AGE_SECONDS", "30"))
+    # Encoded GameResponse fragments kept per worker for list endpoints
+    GAME_FRAGMENT_CACHE_SIZE: int = int(os.getenv("GAME_FRAGMENT_CACHE_SIZE", "5000"))
+    SLUG_CACHE_SIZE: int = int(os.getenv("SLUG_CACHE_SIZE", "10000"))
+    # Distinct icon URLs sampled for /game-icons; reloaded at least this often
+    ICON_POOL_REFRESH_SECONDS: float = float(os.getenv("ICON_POOL_REFRESH_SECONDS", "300"))
 
 
 settings = Settings()
@@ -2,11 +2,12 @@
 from __future__ import annotations
 
 from app.db.base import Base
+from app.db.migrations import apply_migrations
 from app.db.session import engine
 
 
 async def init_db() -> None:
-    """Create database tables if they do not exist."""
+    """Create database tables if they do not exist and apply pending migrations."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
-
+        await apply_migrations(conn)
@@ -0,0 +1,205 @@
+"""Idempotent schema upgrades applied on startup after ``create_all``.
+
+``create_all`` only creates missing tables, so columns and indexes added to
+existing tables live here. Each migration runs once per database, recorded in
+``catalog_schema_migrations``; an advisory lock keeps concurrent workers from
+applying the same migration twice.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+# Text-search configuration shared by the generated column and the query side.
+SEARCH_CONFIG = "english"
+
+# Arbitrary constant identifying the catalog's migration lock.
+_MIGRATION_LOCK_ID = 81020001
+
+
+@dataclass(frozen=True, slots=True)
+class Migration:
+    name: str
+    statements: Tuple[str, ...]
+
+
+def _relation_array_statements(column: str, table: str, value: str) -> Tuple[str, ...]:
+    """Denormalized ``games.<column>`` copy of association ``table``, kept in sync by triggers.
+
+    The triggers are statement-level: every game a write to ``table`` touched
+    is recomputed once per statement, whichever path wrote it (ORM, bulk
+    import, psql). Transition tables allow one event per trigger, hence the
+    insert/delete pair.
+    """
+    recompute = (
+        f"UPDATE games SET {column} = coalesce("
+        f"(SELECT array_agg({value} ORDER BY {value}) FROM {table} WHERE {table}.game_id = games.id), '{{}}')"
+    )
+    function = f"games_sync_{column}"
+    statements = [
+        f"ALTER TABLE games ADD COLUMN IF NOT EXISTS {column} INTEGER[]",
+        recompute,
+        f"CREATE INDEX IF NOT EXISTS idx_games_{column} ON games USING GIN ({column})",
+        f"""
+        CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            {recompute} WHERE games.id IN (SELECT DISTINCT game_id FROM changed);
+            RETURN NULL;
+        END
+        $$
+        """,
+    ]
+    for event, transition in (("insert", "NEW"), ("delete", "OLD")):
+        trigger = f"{table}_sync_{event}"
+        statements += [
+            f"DROP TRIGGER IF EXISTS {trigger} ON {table}",
+            f"CREATE TRIGGER {trigger} AFTER {event.upper()} ON {table} "
+            f"REFERENCING {transition} TABLE AS changed "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION {function}()",
+        ]
+    return tuple(statements)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(
+        name="0001_games_full_text_search",
+        statements=(
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            # Weighted document: title (A) > developer/publisher (B) > descriptions (C).
+            # A generated column keeps it current on every INSERT/UPDATE without triggers.
+            f"""
+            ALTER TABLE games ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig,
+                    coalesce(developer, '') || ' ' || coalesce(publisher, '')), 'B') ||
+                setweight(to_tsvector('{SEARCH_CONFIG}'::regconfig,
+                    coalesce(short_description, '') || ' ' || coalesce(description, '')), 'C')
+            ) STORED
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_games_search_vector ON games USING GIN (search_vector)",
+            # Fuzzy and partial-word title matches (%>, ILIKE) without a sequential scan.
+            "CREATE INDEX IF NOT EXISTS idx_games_title_trgm ON games USING GIN (title gin_trgm_ops)",
+        ),
+    ),
+    Migration(
+        name="0002_games_keyset_indexes",
+        # One index per search sort, matching GameRepository._sort_keys exactly
+        # (same expressions, id last) so cursor pages are index seeks.
+        statements=(
+            "CREATE INDEX IF NOT EXISTS idx_games_keyset_price ON games (price, id)",
+            "CREATE INDEX IF NOT EXISTS idx_games_keyset_title ON games (title, id)",
+            "CREATE INDEX IF NOT EXISTS idx_games_keyset_rating "
+            "ON games ((coalesce(average_rating, -1)), id)",
+            "CREATE INDEX IF NOT EXISTS idx_games_keyset_popularity "
+            "ON games ((coalesce(average_rating, -1)), total_reviews, id)",
+            "CREATE INDEX IF NOT EXISTS idx_games_keyset_release_date "
+            "ON games ((coalesce(release_date, '1900-01-01 00:00:00+00'::timestamptz)), id)",
+        ),
+    ),
+    Migration(
+        name="0003_games_slug",
+        statements=(
+            "ALTER TABLE games ADD COLUMN IF NOT EXISTS slug VARCHAR(280)",
+            # Built first (NULLs never conflict) so the backfill checks slugs with index seeks
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_games_slug ON games (slug)",
+            # Same normalization as app.utils.slugs.slugify and the same "first free
+            # slug, slug-2, slug-3..." rule as Game's insert hook. A suffixed slug can
+            # belong to another title ("Foo" #2 vs "Foo 2"), so each round assigns only
+            # free, distinct candidates; the rest move past their whole group and retry.
+            """
+            DO $$
+            BEGIN
+                CREATE TEMP TABLE slug_backfill ON COMMIT DROP AS
+                SELECT id, base,
+                       row_number() OVER (PARTITION BY base ORDER BY id) AS suffix,
+                       count(*) OVER (PARTITION BY base) AS step
+                FROM (
+                    SELECT id,
+                           coalesce(nullif(trim(both '-' FROM
+                               regexp_replace(lower(title), '[^a-z0-9]+', '-', 'g')), ''), 'game') AS base
+                    FROM games
+                    WHERE slug IS NULL
+                ) AS bases;
+                WHILE EXISTS (SELECT 1 FROM slug_backfill) LOOP
+                    WITH candidates AS (
+                        SELECT id, CASE WHEN suffix = 1 THEN base ELSE base || '-' || suffix END AS slug
+                        FROM slug_backfill
+                    ),
+                    claimed AS (
+                        SELECT id, slug
+                        FROM (
+                            SELECT id, slug, row_number() OVER (PARTITION BY slug ORDER BY id) AS claim
+                            FROM candidates
+                            WHERE NOT EXISTS (SELECT 1 FROM games WHERE games.slug = candidates.slug)
+                        ) AS free
+                        WHERE claim = 1
+                    ),
+                    assigned AS (
+                        UPDATE games SET slug = claimed.slug
+                        FROM claimed
+                        WHERE games.id = claimed.id
+                        RETURNING games.id
+                    )
+                    DELETE FROM slug_backfill WHERE id IN (SELECT id FROM assigned);
+                    UPDATE slug_backfill SET suffix = suffix + step;
+                END LOOP;
+            END
+            $$
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS game_slug_redirects (
+                slug VARCHAR(280) PRIMARY KEY,
+                game_id INTEGER NOT NULL REFERENCES games(id) ON DELETE CASCADE,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS ix_game_slug_redirects_game_id ON game_slug_redirects (game_id)",
+        ),
+    ),
+    Migration(
+        name="0004_games_relation_arrays",
+        statements=(
+            *_relation_array_statements("genre_ids", "game_genres", "genre_id"),
+            *_relation_array_statements("tag_ids", "game_tags", "tag_id"),
+            *_relation_array_statements("platform_ids", "game_platforms", "platform_id"),
+        ),
+    ),
+]
+
+
+async def apply_migrations(conn: AsyncConnection) -> List[str]:
+    """Apply pending migrations inside the caller's transaction; returns their names."""
+    if conn.dialect.name != "postgresql":
+        return []
+    await conn.execute(text("SELECT pg_advisory_xact_lock(:lock_id)"), {"lock_id": _MIGRATION_LOCK_ID})
+    await conn.execute(
+        text(
+            """
+            CREATE TABLE IF NOT EXISTS catalog_schema_migrations (
+                name VARCHAR(100) PRIMARY KEY,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """
+        )
+    )
+    applied = set((await conn.execute(text("SELECT name FROM catalog_schema_migrations"))).scalars())
+    newly_applied: List[str] = []
+    for migration in MIGRATIONS:
+        if migration.name in applied:
+            continue
+        logger.info("Applying catalog migration %s", migration.name)
+        for statement in migration.statements:
+            await conn.execute(text(statement))
+        await conn.execute(
+            text("INSERT INTO catalog_schema_migrations (name) VALUES (:name)"),
+            {"name": migration.name},
+        )
+        newly_applied.append(migration.name)
+    return newly_applied
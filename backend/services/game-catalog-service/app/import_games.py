@@ -0,0 +1,70 @@
+"""Bulk import a storefront dump (NDJSON or CSV) into the game catalog.
+
+    python -m app.import_games games.ndjson
+    python -m app.import_games games.csv --batch-size 1000 --max-errors 50
+    zcat games.ndjson.gz | python -m app.import_games - --format ndjson
+
+Records are upserted by ``steam_app_id``; see ``app.services.game_import``
+for the record format.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from contextlib import nullcontext
+
+from app.db.init_db import init_db
+from app.db.session import AsyncSessionLocal
+from app.services import CatalogService
+from app.services.game_import import PARSERS, ImportReport
+from app.utils.exceptions import ImportAbortedError
+
+
+def _progress(report: ImportReport) -> None:
+    print(f"  {report.summary()}", file=sys.stderr, flush=True)
+
+
+async def import_file(path: str, fmt: str, batch_size: int, max_errors: int | None) -> ImportReport:
+    await init_db()
+    source = nullcontext(sys.stdin) if path == "-" else open(path, encoding="utf-8", newline="")
+    with source as lines:
+        async with AsyncSessionLocal() as session:
+            return await CatalogService(session).import_games(
+                PARSERS[fmt](lines), batch_size=batch_size, max_errors=max_errors, progress=_progress
+            )
+
+
+async def async_main() -> int:
+    parser = argparse.ArgumentParser(description="Bulk import games into the catalog database.")
+    parser.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+    parser.add_argument(
+        "--format",
+        choices=sorted(PARSERS),
+        help="Input format (default: from the file extension, else ndjson)",
+    )
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument(
+        "--max-errors",
+        type=int,
+        default=None,
+        help="Stop after this many invalid records (default: never)",
+    )
+    args = parser.parse_args()
+    fmt = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+
+    try:
+        report = await import_file(args.path, fmt, args.batch_size, args.max_errors)
+    except ImportAbortedError as exc:
+        print(f"Game import aborted: {exc}", file=sys.stderr)
+        return 1
+    for line_no, message in report.errors:
+        print(f"  line {line_no}: {message}", file=sys.stderr)
+    if report.failed > len(report.errors):
+        print(f"  ... and {report.failed - len(report.errors)} more invalid records", file=sys.stderr)
+    print(f"Game import complete ({report.summary()}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(async_main()))
@@ -8,6 +8,7 @@ from .game import (
     GameBundleItem,
     GameDLC,
     GameReview,
+    GameSlugRedirect,
     GameStatus,
     GameType,
     Genre,
@@ -22,6 +23,7 @@ __all__ = [
     "GameBundleItem",
     "GameDLC",
     "GameReview",
+    "GameSlugRedirect",
     "GameStatus",
     "GameType",
     "AgeRating",
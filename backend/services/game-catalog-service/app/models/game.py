@@ -5,7 +5,7 @@ import uuid
 from enum import Enum as PyEnum
 
 from sqlalchemy import (
-    ARRAY,
+    JSON,
     Boolean,
     Column,
     DateTime,
@@ -16,12 +16,28 @@ from sqlalchemy import (
     String,
     Table,
     Text,
+    Uuid,
+    delete,
+    event,
+    insert,
+    inspect,
+    select,
 )
-from sqlalchemy.dialects.postgresql import JSONB, UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Session, relationship
 from sqlalchemy.sql import func
 
 from app.db.base import Base
+from app.utils.slugs import slugify
+
+
+# Postgres column types with a JSON stand-in elsewhere, so the schema also builds on SQLite
+def _array(item_type) -> postgresql.ARRAY:
+    return postgresql.ARRAY(item_type).with_variant(JSON(), "sqlite")
+
+
+_JSONB = JSONB().with_variant(JSON(), "sqlite")
 
 
 class GameStatus(PyEnum):
@@ -74,9 +90,11 @@ class Game(Base):
     __tablename__ = "games"
 
     id = Column(Integer, primary_key=True, index=True)
-    uuid = Column(UUID(as_uuid=True), default=uuid.uuid4, unique=True, index=True)
+    uuid = Column(Uuid(as_uuid=True), default=uuid.uuid4, unique=True, index=True)
     steam_app_id = Column(Integer, unique=True, index=True, nullable=True)
     title = Column(String(255), nullable=False, index=True)
+    # Unique URL slug derived from the title; see _assign_slug below
+    slug = Column(String(280), nullable=True)
     description = Column(Text, nullable=True)
     short_description = Column(String(500), nullable=True)
     developer = Column(String(255), nullable=False, index=True)
@@ -96,12 +114,12 @@ class Game(Base):
     background_image_url = Column(String(500), nullable=True)
     capsule_image_url = Column(String(500), nullable=True)
     icon_url = Column(String(500), nullable=True)  # Avatar/Icon (1:1 square)
-    screenshots = Column(ARRAY(String), nullable=True)
-    movies = Column(ARRAY(String), nullable=True)
+    screenshots = Column(_array(String), nullable=True)
+    movies = Column(_array(String), nullable=True)
 
-    pc_requirements = Column(JSONB, nullable=True)
-    mac_requirements = Column(JSONB, nullable=True)
-    linux_requirements = Column(JSONB, nullable=True)
+    pc_requirements = Column(_JSONB, nullable=True)
+    mac_requirements = Column(_JSONB, nullable=True)
+    linux_requirements = Column(_JSONB, nullable=True)
 
     single_player = Column(Boolean, default=False, nullable=False)
     multiplayer = Column(Boolean, default=False, nullable=False)
@@ -125,7 +143,13 @@ class Game(Base):
         nullable=False,
     )
 
-    metadata_json = Column(JSONB, nullable=True)
+    metadata_json = Column(_JSONB, nullable=True)
+
+    # Sorted copies of the association tables, maintained by database
+    # triggers (migration 0004) for array filters and read-side hydration
+    genre_ids = Column(_array(Integer), nullable=True)
+    tag_ids = Column(_array(Integer), nullable=True)
+    platform_ids = Column(_array(Integer), nullable=True)
 
     genres = relationship("Genre", secondary=game_genres, back_populates="games")
     tags = relationship("Tag", secondary=game_tags, back_populates="games")
@@ -140,6 +164,10 @@ class Game(Base):
         Index("idx_games_price_range", "price"),
         Index("idx_games_release_date", "release_date"),
         Index("idx_games_average_rating", "average_rating"),
+        Index("idx_games_slug", "slug", unique=True),
+        Index("idx_games_genre_ids", "genre_ids", postgresql_using="gin"),
+        Index("idx_games_tag_ids", "tag_ids", postgresql_using="gin"),
+        Index("idx_games_platform_ids", "platform_ids", postgresql_using="gin"),
     )
 
 
@@ -179,6 +207,51 @@ class Platform(Base):
     games = relationship("Game", secondary=game_platforms, back_populates="platforms")
 
 
+class GameSlugRedirect(Base):
+    """Former slug of a renamed game, so old links keep resolving."""
+
+    __tablename__ = "game_slug_redirects"
+
+    slug = Column(String(280), primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+def _slug_taken(connection, slug: str, game_id: int | None, session: Session) -> bool:
+    if slug in session.info.get("pending_slugs", ()):
+        return True
+    games = Game.__table__
+    redirects = GameSlugRedirect.__table__
+    in_games = select(games.c.id).where(games.c.slug == slug)
+    in_redirects = select(redirects.c.game_id).where(redirects.c.slug == slug)
+    if game_id is not None:
+        in_games = in_games.where(games.c.id != game_id)
+        in_redirects = in_redirects.where(redirects.c.game_id != game_id)
+    return connection.execute(in_games.union_all(in_redirects).limit(1)).first() is not None
+
+
+def _assign_slug(connection, game: "Game") -> str:
+    """First free ``slug``, ``slug-2``, ``slug-3``... for ``game``'s title.
+
+    Slugs held as redirects by other games count as taken, so an old link is
+    never re-pointed at a different game.
+    """
+    session = Session.object_session(game)
+    base = slugify(game.title) or "game"
+    candidate, suffix = base, 1
+    while _slug_taken(connection, candidate, game.id, session):
+        suffix += 1
+        candidate = f"{base}-{suffix}"
+    # Games flushed together are not in the table yet
+    session.info.setdefault("pending_slugs", set()).add(candidate)
+    return candidate
+
+
+@event.listens_for(Session, "after_flush")
+def _clear_pending_slugs(session, flush_context) -> None:
+    session.info.pop("pending_slugs", None)
+
+
 class GameReview(Base):
     __tablename__ = "game_reviews"
 
@@ -256,3 +329,25 @@ class GameBundleItem(Base):
     bundle = relationship("GameBundle")
     game = relationship("Game")
 
+
+
+@event.listens_for(Game, "before_insert")
+def _slug_on_insert(mapper, connection, game: Game) -> None:
+    if not game.slug:
+        game.slug = _assign_slug(connection, game)
+
+
+@event.listens_for(Game, "before_update")
+def _slug_on_update(mapper, connection, game: Game) -> None:
+    if game.slug and not inspect(game).attrs.title.history.has_changes():
+        return
+    # A game keeps its current slug when the new title still maps to it
+    old_slug, new_slug = game.slug, _assign_slug(connection, game)
+    if new_slug == old_slug:
+        return
+    redirects = GameSlugRedirect.__table__
+    # Renamed back to a former title: that slug is canonical again
+    connection.execute(delete(redirects).where(redirects.c.slug == new_slug))
+    if old_slug:
+        connection.execute(insert(redirects).values(slug=old_slug, game_id=game.id))
+    game.slug = new_slug
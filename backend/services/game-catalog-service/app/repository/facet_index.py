@@ -0,0 +1,242 @@
+"""In-process facet bitmaps for the store filter sidebar.
+
+Every facet value (a genre, tag, platform, price bucket or feature flag) keeps
+a bitmap over game ids, stored as a Python ``int`` with bit ``game_id`` set for
+each member. Counting a facet for the current search is then one AND with the
+result bitmap and a popcount, so all sidebar counts come from a single id
+query plus in-memory intersections instead of one GROUP BY per facet.
+
+Writes in this worker mark their games stale; writes by other workers are
+found every ``refresh_interval`` from ``updated_at`` (and the id set for
+deletes), the same way ``CatalogSnapshot`` refreshes. Relation changes reach
+``updated_at`` too: games only gain relations on create and import.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Game, Genre, Platform, Tag
+from app.models.game import game_genres, game_platforms, game_tags
+
+FEATURE_FLAGS = ("single_player", "multiplayer", "co_op", "vr_support")
+
+# Re-read games updated this long before the watermark, as in CatalogSnapshot:
+# updated_at is the writer's transaction start, so it can commit "in the past".
+_OVERLAP = timedelta(seconds=60)
+
+
+@dataclass(frozen=True, slots=True)
+class PriceBucket:
+    key: str
+    min_price: float
+    # Exclusive upper bound; None for the open-ended top bucket
+    max_price: Optional[float]
+
+    def contains(self, price: float) -> bool:
+        return price >= self.min_price and (self.max_price is None or price < self.max_price)
+
+
+PRICE_BUCKETS: Tuple[PriceBucket, ...] = (
+    PriceBucket("free", 0.0, 0.01),
+    PriceBucket("under_10", 0.01, 10.0),
+    PriceBucket("10_to_20", 10.0, 20.0),
+    PriceBucket("20_to_40", 20.0, 40.0),
+    PriceBucket("40_plus", 40.0, None),
+)
+
+# Facet groups backed by an association table: (group, table, id column, model)
+_RELATIONS = (
+    ("genres", game_genres, game_genres.c.genre_id, Genre),
+    ("tags", game_tags, game_tags.c.tag_id, Tag),
+    ("platforms", game_platforms, game_platforms.c.platform_id, Platform),
+)
+
+
+def bitmap_of(ids: Iterable[int]) -> int:
+    """Pack game ids into a bitmap; linear in the id range, unlike OR-ing shifts."""
+    ids = list(ids)
+    if not ids:
+        return 0
+    buffer = bytearray(max(ids) // 8 + 1)
+    for game_id in ids:
+        buffer[game_id >> 3] |= 1 << (game_id & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def _price_bucket(price: Optional[float]) -> Optional[str]:
+    for bucket in PRICE_BUCKETS:
+        if bucket.contains(price or 0.0):
+            return bucket.key
+    return None
+
+
+class FacetIndex:
+    """``(group, value) -> bitmap`` over game ids, plus display names per value."""
+
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self._bitmaps: Dict[Tuple[str, object], int] = {}
+        self._members: Dict[int, Set[Tuple[str, object]]] = {}
+        self._names: Dict[str, Dict[int, str]] = {}
+        self._stale: Set[int] = set()
+        self._watermark = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+        self.loaded = False
+        self.stats = {"full_loads": 0, "refreshes": 0, "rows_applied": 0}
+
+    def __len__(self) -> int:
+        return len(self._members)
+
+    # ------------------------------------------------------------ maintenance
+    def _set(self, game_id: int, keys: Set[Tuple[str, object]]) -> None:
+        self._unset(game_id)
+        bit = 1 << game_id
+        for key in keys:
+            self._bitmaps[key] = self._bitmaps.get(key, 0) | bit
+        self._members[game_id] = keys
+
+    def _unset(self, game_id: int) -> None:
+        mask = ~(1 << game_id)
+        for key in self._members.pop(game_id, ()):
+            remaining = self._bitmaps[key] & mask
+            if remaining:
+                self._bitmaps[key] = remaining
+            else:
+                del self._bitmaps[key]
+
+    def mark_stale(self, game_id: int) -> None:
+        """Re-read ``game_id`` before the next count (created, updated or deleted)."""
+        if self.loaded:
+            self._stale.add(game_id)
+
+    def _due(self) -> bool:
+        return time.monotonic() - self._checked_at >= self.refresh_interval
+
+    async def ensure_current(self, session: AsyncSession) -> None:
+        # A reload in flight has already taken the stale ids; wait for it to land
+        if self.loaded and not self._stale and not self._due() and not self._lock.locked():
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self._full_load(session)
+                return
+            checked = self._due()
+            if checked:
+                await self._find_writes(session)
+            if self._stale:
+                stale, self._stale = self._stale, set()
+                await self._load(session, stale)
+                self.stats["rows_applied"] += len(stale)
+            if checked:
+                # updated_at cannot reveal deletes by other workers; the id set can. New ids
+                # only grow, so a delete offset by an insert still moves the sum.
+                count, id_sum = (
+                    await session.execute(select(func.count(Game.id), func.coalesce(func.sum(Game.id), 0)))
+                ).one()
+                if (count, int(id_sum)) != (len(self), sum(self._members)):
+                    await self._full_load(session)
+
+    async def _full_load(self, session: AsyncSession) -> None:
+        self._checked_at = time.monotonic()
+        # Read before the games: a write landing mid-load is re-read next time
+        self._watermark = (await session.execute(select(func.max(Game.updated_at)))).scalar_one()
+        await self._load(session, None)
+        self._stale.clear()
+        self.loaded = True
+        self.stats["full_loads"] += 1
+
+    async def _find_writes(self, session: AsyncSession) -> None:
+        """Mark games created or updated by any worker since the last check stale."""
+        self._checked_at = time.monotonic()
+        stmt = select(Game.id, Game.updated_at)
+        if self._watermark is not None:
+            stmt = stmt.where(Game.updated_at >= self._watermark - _OVERLAP)
+        for game_id, updated_at in await session.execute(stmt):
+            self._stale.add(game_id)
+            if self._watermark is None or updated_at > self._watermark:
+                self._watermark = updated_at
+        self.stats["refreshes"] += 1
+
+    async def _load(self, session: AsyncSession, game_ids: Optional[Set[int]]) -> None:
+        """Rebuild membership for ``game_ids`` (every game when None)."""
+        keys: Dict[int, Set[Tuple[str, object]]] = defaultdict(set)
+
+        stmt = select(Game.id, Game.price, *(getattr(Game, flag) for flag in FEATURE_FLAGS))
+        if game_ids is not None:
+            stmt = stmt.where(Game.id.in_(game_ids))
+        for game_id, price, *flags in await session.execute(stmt):
+            members = keys[game_id]
+            members.add(("price", _price_bucket(price)))
+            members.update(("features", flag) for flag, on in zip(FEATURE_FLAGS, flags) if on)
+
+        for group, table, value_column, model in _RELATIONS:
+            stmt = select(table.c.game_id, value_column)
+            if game_ids is not None:
+                stmt = stmt.where(table.c.game_id.in_(game_ids))
+            for game_id, value in await session.execute(stmt):
+                if game_id in keys:
+                    keys[game_id].add((group, value))
+            # Vocabularies are small; refreshing them picks up newly created values
+            names = await session.execute(select(model.id, model.name))
+            self._names[group] = dict(names.all())
+
+        if game_ids is None:
+            self._bitmaps.clear()
+            self._members.clear()
+            grouped: Dict[Tuple[str, object], List[int]] = defaultdict(list)
+            for game_id, members in keys.items():
+                self._members[game_id] = members
+                for key in members:
+                    grouped[key].append(game_id)
+            self._bitmaps = {key: bitmap_of(ids) for key, ids in grouped.items()}
+            return
+        for game_id in game_ids:
+            if game_id in keys:
+                self._set(game_id, keys[game_id])
+            else:
+                self._unset(game_id)
+
+    # ---------------------------------------------------------------- queries
+    def counts(self, game_ids: Iterable[int]) -> Dict[str, object]:
+        """Counts of every facet value within ``game_ids``, in one pass over the bitmaps."""
+        result = bitmap_of(game_ids)
+        by_group: Dict[str, Dict[object, int]] = defaultdict(dict)
+        if result:
+            for (group, value), bitmap in self._bitmaps.items():
+                count = (bitmap & result).bit_count()
+                if count:
+                    by_group[group][value] = count
+
+        facets: Dict[str, object] = {}
+        for group, *_ in _RELATIONS:
+            names = self._names.get(group, {})
+            values = [
+                {"id": value, "name": names.get(value, str(value)), "count": count}
+                for value, count in by_group[group].items()
+            ]
+            values.sort(key=lambda item: (-item["count"], item["name"]))
+            facets[group] = values
+        facets["price_buckets"] = [
+            {
+                "key": bucket.key,
+                "min_price": bucket.min_price,
+                "max_price": bucket.max_price,
+                "count": by_group["price"].get(bucket.key, 0),
+            }
+            for bucket in PRICE_BUCKETS
+        ]
+        facets["features"] = {flag: by_group["features"].get(flag, 0) for flag in FEATURE_FLAGS}
+        return facets
+
+
+game_facet_index = FacetIndex(settings.CATALOG_FACET_REFRESH_SECONDS)
@@ -1,20 +1,36 @@
 """Data access helpers for games."""
 from __future__ import annotations
 
+import hashlib
 from typing import List, Optional, Sequence, Tuple
 
-from sqlalchemy import asc, desc, func, or_, select
+from sqlalchemy import asc, case, cast, desc, func, literal, literal_column, or_, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from sqlalchemy.sql.elements import ColumnElement
 
+from app.core.config import settings
+from app.db.migrations import SEARCH_CONFIG
 from app.models import (
     Game,
+    GameSlugRedirect,
     GameStatus,
     Genre,
     Platform,
     Tag,
 )
 from app.schemas import GameSearchFilters
+from app.repository.facet_index import game_facet_index
+from app.repository.pagination import Page, after, count_rows, decode_cursor, encode_cursor
+from app.repository.relation_vocabulary import relation_vocabulary
+from app.repository.search_index import game_search_index, tokenize
+from app.repository.slug_cache import hot_slugs
+from app.repository.snapshot import catalog_snapshot
+from app.utils.slugs import slugify
+
+FEATURED_MIN_RATING = 4.0
+FEATURED_MIN_REVIEWS = 100
 
 
 class GameRepository:
@@ -22,6 +38,12 @@ class GameRepository:
         self.session = session
 
     async def get_by_id(self, game_id: int) -> Optional[Game]:
+        """A game for reading; see ``get_for_update`` before changing its relations."""
+        games = await self._by_ids([game_id], with_relations=True)
+        return games[0] if games else None
+
+    async def get_for_update(self, game_id: int) -> Optional[Game]:
+        """A game with ORM-loaded relations, safe to modify and delete."""
         result = await self.session.execute(
             select(Game)
             .options(
@@ -33,6 +55,30 @@ class GameRepository:
         )
         return result.scalar_one_or_none()
 
+    async def get_by_slug(self, slug: str) -> Optional[Game]:
+        """Resolve a current or former slug; legacy client slugs are normalized first."""
+        slug = slugify(slug)
+        if not slug:
+            return None
+        game_id = hot_slugs.get(slug)
+        if game_id is not None:
+            game = await self.get_by_id(game_id)
+            if game is not None:
+                return game
+            hot_slugs.discard(slug)
+        result = await self.session.execute(self._with_relations(select(Game).where(Game.slug == slug)))
+        game = result.scalar_one_or_none()
+        if game is not None:
+            await self._hydrate([game])
+        if game is None:
+            redirect = await self.session.get(GameSlugRedirect, slug)
+            if redirect is None:
+                return None
+            game = await self.get_by_id(redirect.game_id)
+        if game is not None:
+            hot_slugs.put(slug, game.id)
+        return game
+
     async def get_by_steam_app_id(self, steam_app_id: int) -> Optional[Game]:
         result = await self.session.execute(
             select(Game).where(Game.steam_app_id == steam_app_id)
@@ -40,20 +86,16 @@ class GameRepository:
         return result.scalar_one_or_none()
 
     async def list(
-        self, skip: int = 0, limit: int = 100
+        self, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
     ) -> Sequence[Game]:
-        result = await self.session.execute(
-            select(Game)
-            .options(
-                selectinload(Game.genres),
-                selectinload(Game.tags),
-                selectinload(Game.platforms),
-            )
-            .offset(skip)
-            .limit(limit)
-            .order_by(Game.id)
-        )
-        return result.scalars().all()
+        """Games in id order; pass the last id seen as ``after_id`` to page without OFFSET."""
+        stmt = self._with_relations(select(Game).order_by(Game.id).limit(limit))
+        if after_id is not None:
+            stmt = stmt.where(Game.id > after_id)
+        elif skip:
+            stmt = stmt.offset(skip)
+        result = await self.session.execute(stmt)
+        return await self._hydrate(result.scalars().all())
 
     async def create(self, game: Game) -> Game:
         self.session.add(game)
@@ -64,22 +106,44 @@ class GameRepository:
     async def delete(self, game: Game) -> None:
         await self.session.delete(game)
 
+    async def _by_ids(self, ids: Sequence[int], with_relations: bool = False) -> List[Game]:
+        """Games for ``ids`` in the given order (primary-key lookup)."""
+        if not ids:
+            return []
+        stmt = select(Game).where(Game.id.in_(ids))
+        if with_relations:
+            stmt = self._with_relations(stmt)
+        games = {game.id: game for game in (await self.session.execute(stmt)).scalars()}
+        ordered = [games[game_id] for game_id in ids if game_id in games]
+        return await self._hydrate(ordered) if with_relations else ordered
+
     async def featured(self, limit: int) -> List[Game]:
-        stmt = (
+        if catalog_snapshot.enabled:
+            return await self._by_ids(
+                await catalog_snapshot.featured(
+                    self.session, limit, FEATURED_MIN_RATING, FEATURED_MIN_REVIEWS
+                ),
+                with_relations=True,
+            )
+        stmt = self._with_relations(
             select(Game)
             .where(
                 Game.status == GameStatus.ACTIVE.value,
-                Game.average_rating >= 4.0,
-                Game.total_reviews >= 100,
+                Game.average_rating >= FEATURED_MIN_RATING,
+                Game.total_reviews >= FEATURED_MIN_REVIEWS,
             )
             .order_by(desc(Game.average_rating))
             .limit(limit)
         )
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return await self._hydrate(result.scalars().all())
 
     async def new_releases(self, limit: int) -> List[Game]:
-        stmt = (
+        if catalog_snapshot.enabled:
+            return await self._by_ids(
+                await catalog_snapshot.new_releases(self.session, limit), with_relations=True
+            )
+        stmt = self._with_relations(
             select(Game)
             .where(
                 Game.status == GameStatus.ACTIVE.value,
@@ -89,10 +153,14 @@ class GameRepository:
             .limit(limit)
         )
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return await self._hydrate(result.scalars().all())
 
     async def on_sale(self, limit: int) -> List[Game]:
-        stmt = (
+        if catalog_snapshot.enabled:
+            return await self._by_ids(
+                await catalog_snapshot.on_sale(self.session, limit), with_relations=True
+            )
+        stmt = self._with_relations(
             select(Game)
             .where(
                 Game.status == GameStatus.ACTIVE.value,
@@ -102,84 +170,246 @@ class GameRepository:
             .limit(limit)
         )
         result = await self.session.execute(stmt)
-        return result.scalars().all()
+        return await self._hydrate(result.scalars().all())
 
-    async def search(
-        self, filters: GameSearchFilters, page: int, per_page: int
-    ) -> Tuple[List[Game], int]:
-        stmt = select(Game).options(
+    @property
+    def _dialect(self) -> str:
+        return self.session.bind.dialect.name
+
+    @property
+    def _relation_arrays(self) -> bool:
+        return settings.CATALOG_RELATION_ARRAYS and self._dialect == "postgresql"
+
+    def _with_relations(self, stmt):
+        """``stmt`` set up to load genres/tags/platforms: id array columns or selectinload."""
+        if self._relation_arrays:
+            return stmt
+        return stmt.options(
             selectinload(Game.genres),
             selectinload(Game.tags),
             selectinload(Game.platforms),
-        ).distinct()
+        )
 
-        if filters.query:
-            term = f"%{filters.query}%"
-            stmt = stmt.where(
-                or_(
-                    Game.title.ilike(term),
-                    Game.description.ilike(term),
-                    Game.developer.ilike(term),
-                    Game.publisher.ilike(term),
-                )
-            )
+    async def _hydrate(self, games: Sequence[Game]) -> List[Game]:
+        """Fill relation collections from the id arrays when ``_with_relations`` skipped them."""
+        games = list(games)
+        if self._relation_arrays:
+            await relation_vocabulary.hydrate(self.session, games)
+        return games
 
-        if filters.genres:
-            stmt = stmt.join(Game.genres).where(Genre.id.in_(filters.genres))
-        if filters.tags:
-            stmt = stmt.join(Game.tags).where(Tag.id.in_(filters.tags))
-        if filters.platforms:
-            stmt = stmt.join(Game.platforms).where(Platform.id.in_(filters.platforms))
+    async def search(
+        self,
+        filters: GameSearchFilters,
+        page: int,
+        per_page: int,
+        cursor: Optional[str] = None,
+        count: str = "exact",
+        with_facets: bool = False,
+    ) -> Page[Game]:
+        """One page of games matching ``filters``.
+
+        With ``cursor`` the page continues after the cursor's row (keyset) and
+        ``page`` is ignored; otherwise ``page`` is an OFFSET. Either way the
+        result carries the cursor for the following page. ``with_facets`` adds
+        sidebar counts over the whole filtered result, not just this page.
+        """
+        if catalog_snapshot.enabled and not with_facets and catalog_snapshot.serves(filters, cursor):
+            return await self._snapshot_search(filters, page, per_page, count)
+
+        criteria: List[ColumnElement] = []
+        rank = None
+        if filters.query:
+            if self._dialect == "postgresql":
+                match, rank = _full_text_match(filters.query)
+            else:
+                await game_search_index.ensure_loaded(self.session)
+                scores = game_search_index.search(filters.query)
+                if not scores:
+                    return Page(
+                        items=[],
+                        total=0 if count != "none" else None,
+                        next_cursor=None,
+                        facets=game_facet_index.counts(()) if with_facets else None,
+                    )
+                match = Game.id.in_(list(scores))
+                rank = case(scores, value=Game.id, else_=0.0)
+            criteria.append(match)
+
+        if self._relation_arrays:
+            # Array overlap (&&) on the GIN-indexed id columns: no subquery per filter
+            for ids, column in (
+                (filters.genres, Game.genre_ids),
+                (filters.tags, Game.tag_ids),
+                (filters.platforms, Game.platform_ids),
+            ):
+                if ids:
+                    criteria.append(column.overlap(ids))
+        else:
+            # EXISTS instead of JOIN + DISTINCT: no duplicate rows to collapse, so
+            # ORDER BY may use expressions (relevance) outside the select list.
+            if filters.genres:
+                criteria.append(Game.genres.any(Genre.id.in_(filters.genres)))
+            if filters.tags:
+                criteria.append(Game.tags.any(Tag.id.in_(filters.tags)))
+            if filters.platforms:
+                criteria.append(Game.platforms.any(Platform.id.in_(filters.platforms)))
 
         if filters.min_price is not None:
-            stmt = stmt.where(Game.price >= filters.min_price)
+            criteria.append(Game.price >= filters.min_price)
         if filters.max_price is not None:
-            stmt = stmt.where(Game.price <= filters.max_price)
+            criteria.append(Game.price <= filters.max_price)
         if filters.min_rating is not None:
-            stmt = stmt.where(Game.average_rating >= filters.min_rating)
+            criteria.append(Game.average_rating >= filters.min_rating)
         if filters.max_rating is not None:
-            stmt = stmt.where(Game.average_rating <= filters.max_rating)
+            criteria.append(Game.average_rating <= filters.max_rating)
         if filters.single_player is not None:
-            stmt = stmt.where(Game.single_player == filters.single_player)
+            criteria.append(Game.single_player == filters.single_player)
         if filters.multiplayer is not None:
-            stmt = stmt.where(Game.multiplayer == filters.multiplayer)
+            criteria.append(Game.multiplayer == filters.multiplayer)
         if filters.co_op is not None:
-            stmt = stmt.where(Game.co_op == filters.co_op)
+            criteria.append(Game.co_op == filters.co_op)
         if filters.vr_support is not None:
-            stmt = stmt.where(Game.vr_support == filters.vr_support)
+            criteria.append(Game.vr_support == filters.vr_support)
         if filters.early_access is not None:
-            stmt = stmt.where(Game.early_access == filters.early_access)
+            criteria.append(Game.early_access == filters.early_access)
         if filters.status:
-            stmt = stmt.where(Game.status == filters.status.value)
+            criteria.append(Game.status == filters.status.value)
         if filters.game_type:
-            stmt = stmt.where(Game.game_type == filters.game_type.value)
+            criteria.append(Game.game_type == filters.game_type.value)
         if filters.age_rating:
-            stmt = stmt.where(Game.age_rating == filters.age_rating.value)
-
-        if filters.sort_by == "price":
-            order = asc if filters.sort_order == "asc" else desc
-            stmt = stmt.order_by(order(Game.price))
-        elif filters.sort_by == "rating":
-            order = asc if filters.sort_order == "asc" else desc
-            stmt = stmt.order_by(order(Game.average_rating))
-        elif filters.sort_by == "release_date":
-            order = asc if filters.sort_order == "asc" else desc
-            stmt = stmt.order_by(order(Game.release_date))
-        elif filters.sort_by == "title":
-            order = asc if filters.sort_order == "asc" else desc
-            stmt = stmt.order_by(order(Game.title))
+            criteria.append(Game.age_rating == filters.age_rating.value)
+
+        stmt = self._with_relations(select(Game).where(*criteria))
+
+        facets = None
+        total = None
+        # An exact total of an offset page can ride along as a window count
+        windowed = count == "exact" and not with_facets and not cursor
+        if with_facets:
+            await game_facet_index.ensure_current(self.session)
+            matching = (await self.session.execute(select(Game.id).where(*criteria))).scalars().all()
+            facets = game_facet_index.counts(matching)
+            # The id scan doubles as an exact count
+            total = len(matching) if count != "none" else None
+        elif not windowed:
+            total = await count_rows(self.session, stmt, count)
+
+        signature, keys, descending = self._sort_keys(filters, rank)
+
+        # Sort keys ride along in the select so the last row can seed the next cursor
+        order = desc if descending else asc
+        matches = stmt
+        stmt = stmt.add_columns(*keys).order_by(*(order(key) for key in keys))
+        if windowed:
+            # Evaluated before OFFSET/LIMIT, so every row carries the full total
+            stmt = stmt.add_columns(func.count().over())
+        if cursor:
+            stmt = stmt.where(after(keys, decode_cursor(cursor, signature, keys), descending))
         else:
-            stmt = stmt.order_by(desc(Game.average_rating), desc(Game.total_reviews))
-
-        count_stmt = (
-            select(func.count(func.distinct(Game.id))).select_from(stmt.subquery())
+            stmt = stmt.offset((page - 1) * per_page)
+
+        rows = (await self.session.execute(stmt.limit(per_page + 1))).all()
+        if windowed:
+            # A page past the end has no row to carry the count
+            total = rows[0][-1] if rows else await count_rows(self.session, matches, "exact")
+        next_cursor = None
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            next_cursor = encode_cursor(signature, list(rows[-1][1 : 1 + len(keys)]))
+        return Page(
+            items=await self._hydrate(row[0] for row in rows),
+            total=total,
+            next_cursor=next_cursor,
+            facets=facets,
         )
-        total = (await self.session.execute(count_stmt)).scalar_one()
 
-        offset = (page - 1) * per_page
-        stmt = stmt.offset(offset).limit(per_page)
-        result = await self.session.execute(stmt)
-        return list(result.scalars().all()), total
+    async def _snapshot_search(
+        self, filters: GameSearchFilters, page: int, per_page: int, count: str
+    ) -> Page[Game]:
+        """Offset page for simple filters, ordered in the columnar snapshot."""
+        ids, total = await catalog_snapshot.search(
+            self.session, filters, (page - 1) * per_page, per_page + 1
+        )
+        games = await self._by_ids(ids[:per_page], with_relations=True)
+        next_cursor = None
+        if len(ids) > per_page and games:
+            signature, _, _ = self._sort_keys(filters, None)
+            next_cursor = encode_cursor(signature, _snapshot_sort_values(filters, games[-1]))
+        return Page(items=games, total=total if count != "none" else None, next_cursor=next_cursor)
+
+    def _sort_keys(
+        self, filters: GameSearchFilters, rank: Optional[ColumnElement]
+    ) -> Tuple[str, List[ColumnElement], bool]:
+        """``(cursor signature, ORDER BY keys ending in id, descending)`` for ``filters``.
+
+        Nullable columns are coalesced to a floor value so keyset comparisons
+        never meet NULL; the matching expression indexes live in migrations.
+        """
+        descending = filters.sort_order != "asc"
+        sort_by = filters.sort_by or "relevance"
+        if sort_by == "price":
+            keys = [Game.price]
+        elif sort_by == "rating":
+            keys = [_rating_key()]
+        elif sort_by == "release_date":
+            null_date = _NULL_DATE.get(self._dialect, _NULL_DATE["default"])
+            keys = [func.coalesce(Game.release_date, literal_column(null_date))]
+        elif sort_by == "title":
+            keys = [Game.title]
+        elif rank is not None:
+            # Relevance of a text query: the cursor is only valid for that query
+            sort_by = "relevance:" + hashlib.blake2b(filters.query.encode(), digest_size=6).hexdigest()
+            keys, descending = [rank, Game.total_reviews], True
+        else:
+            keys, descending = [_rating_key(), Game.total_reviews], True
+        signature = f"{sort_by}:{'desc' if descending else 'asc'}"
+        return signature, [*keys, Game.id], descending
+
+
+# Floor for NULL release dates in keyset ordering; Postgres needs a typed literal
+# so the expression matches idx_games_keyset_release_date.
+_NULL_DATE = {
+    "postgresql": "'1900-01-01 00:00:00+00'::timestamptz",
+    "default": "'1900-01-01 00:00:00.000000'",
+}
+
+
+def _snapshot_sort_values(filters: GameSearchFilters, game: Game) -> List[object]:
+    """Cursor values for ``game`` under a snapshot-served sort, as SQL would return them."""
+    rating = game.average_rating if game.average_rating is not None else -1
+    sort_by = filters.sort_by or "relevance"
+    if sort_by == "price":
+        return [game.price, game.id]
+    if sort_by == "rating":
+        return [rating, game.id]
+    return [rating, game.total_reviews, game.id]
+
+
+def _rating_key() -> ColumnElement:
+    return func.coalesce(Game.average_rating, literal_column("-1"))
+
+
+def _prefix_tsquery(query: str) -> str:
+    """``"witcher 3"`` -> ``"witcher:* & 3:*"``; tokens are word characters only, so safe for to_tsquery."""
+    return " & ".join(f"{token}:*" for token in tokenize(query))
+
+
+def _full_text_match(query: str):
+    """WHERE clause and relevance score for a text query against the games search index.
+
+    Matches the weighted ``search_vector`` (GIN) with prefix terms, or the
+    title fuzzily via ``pg_trgm`` word similarity (trigram GIN), so typos and
+    partial words still find results.
+    """
+    fuzzy = Game.title.op("%>")(query)
+    similarity = func.word_similarity(query, Game.title)
+    terms = _prefix_tsquery(query)
+    if not terms:
+        return fuzzy, similarity
+    search_vector = literal_column("games.search_vector")
+    tsquery = func.to_tsquery(cast(literal(SEARCH_CONFIG), REGCONFIG), terms)
+    match = or_(search_vector.op("@@")(tsquery), fuzzy)
+    return match, func.ts_rank_cd(search_vector, tsquery) + similarity
 
 
 class GenreRepository:
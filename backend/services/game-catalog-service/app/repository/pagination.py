@@ -0,0 +1,129 @@
+"""Keyset (cursor) pagination helpers for catalog listings.
+
+A cursor is an opaque token holding the sort signature plus the sort-key
+values and id of the last row served. The next page continues with
+``WHERE (keys..., id) < (values..., last_id)`` (or ``>`` when ascending), which
+an index on the same columns answers by seeking, so page 500 costs the same as
+page 1.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Generic, List, Optional, Sequence, TypeVar
+
+from sqlalchemy import Select, func, literal, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.utils.exceptions import InvalidCursorError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+@dataclass(slots=True)
+class Page(Generic[T]):
+    items: List[T]
+    total: Optional[int]
+    next_cursor: Optional[str]
+    # Facet counts over the full filtered result, when requested
+    facets: Optional[Dict[str, Any]] = None
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(signature: str, values: Sequence[Any]) -> str:
+    payload = json.dumps(
+        {"s": signature, "v": [_encode_value(value) for value in values]}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode("ascii")
+
+
+def _fits(value: Any, key: ColumnElement) -> bool:
+    """Whether ``value`` can be bound against ``key``: a forged cursor must not reach SQL."""
+    if value is None or isinstance(value, (list, dict)):
+        return False
+    try:
+        expected = key.type.python_type
+    except NotImplementedError:
+        # Untyped expressions (e.g. a relevance score): any scalar the encoder emits
+        return True
+    if expected in (int, float) and isinstance(value, bool):
+        return False
+    if expected is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, signature: str, keys: Sequence[ColumnElement]) -> List[Any]:
+    """Return the key values stored in ``cursor``; it must come from the same sort over ``keys``."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(value) for value in payload["v"]]
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursorError("Invalid pagination cursor") from exc
+    if payload.get("s") != signature or len(values) != len(keys):
+        raise InvalidCursorError("Cursor does not match the requested sort order")
+    if not all(_fits(value, key) for value, key in zip(values, keys)):
+        raise InvalidCursorError("Invalid pagination cursor")
+    return values
+
+
+def after(keys: Sequence[ColumnElement], values: Sequence[Any], descending: bool) -> ColumnElement:
+    """Row-value predicate selecting rows strictly past ``values`` in the sort order."""
+    row = tuple_(*keys)
+    bound = tuple_(*(literal(value, type_=key.type) for key, value in zip(keys, values)))
+    return row < bound if descending else row > bound
+
+
+async def count_rows(session: AsyncSession, stmt: Select, mode: str) -> Optional[int]:
+    """Total rows of ``stmt``: exact COUNT, planner estimate, or None when not requested."""
+    if mode == "none":
+        return None
+    counted = stmt.order_by(None).limit(None).offset(None)
+    if mode == "estimate" and session.bind.dialect.name == "postgresql":
+        estimate = await _planner_estimate(session, counted)
+        if estimate is not None:
+            return estimate
+    count_stmt = select(func.count()).select_from(counted.subquery())
+    return (await session.execute(count_stmt)).scalar_one()
+
+
+async def _planner_estimate(session: AsyncSession, stmt: Select) -> Optional[int]:
+    """Row estimate from ``EXPLAIN``: O(1) regardless of how many rows match."""
+    compiled = stmt.compile(dialect=session.bind.dialect)
+    params = tuple(compiled.params[name] for name in (compiled.positiontup or ()))
+    try:
+        # Savepoint: a failed EXPLAIN must not abort the caller's transaction
+        async with session.begin_nested():
+            connection = await session.connection()
+            result = await connection.exec_driver_sql(
+                f"EXPLAIN (FORMAT JSON) {compiled.string}", params
+            )
+            plan = result.scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (SQLAlchemyError, LookupError, TypeError, ValueError):
+        logger.warning("Row estimate failed; falling back to an exact count", exc_info=True)
+        return None
@@ -0,0 +1,81 @@
+"""Genre, tag and platform rows by id, for hydrating games from their id arrays.
+
+With ``CATALOG_RELATION_ARRAYS`` on, read paths load games without the three
+``selectinload`` queries and fill ``Game.genres``/``tags``/``platforms`` from
+the ``genre_ids``/``tag_ids``/``platform_ids`` columns instead. The
+vocabularies are small and almost never change, so they are kept here as
+detached instances; an id missing from them (a value created since, possibly
+by another worker) triggers one reload.
+
+Hydrated collections are set as committed state without ORM events, so they
+are for reading only; code that modifies a game's relations must load it
+through ``GameRepository.get_for_update``.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Dict, Iterable, Sequence, Tuple, Type
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import Game, Genre, Platform, Tag
+
+# relationship -> (id array column, related model)
+RELATION_ARRAYS: Dict[str, Tuple[str, Type]] = {
+    "genres": ("genre_ids", Genre),
+    "tags": ("tag_ids", Tag),
+    "platforms": ("platform_ids", Platform),
+}
+
+
+class RelationVocabulary:
+    def __init__(self) -> None:
+        self._items: Dict[str, Dict[int, object]] = {name: {} for name in RELATION_ARRAYS}
+        self._lock = asyncio.Lock()
+        self.stats = {"loads": 0}
+
+    async def hydrate(self, session: AsyncSession, games: Iterable[Game]) -> None:
+        """Set each game's relation collections from its id arrays."""
+        games = list(games)
+        if not games:
+            return
+        if self._missing(games):
+            await self._load(session, games)
+        for name, (column, _) in RELATION_ARRAYS.items():
+            items = self._items[name]
+            for game in games:
+                ids = getattr(game, column) or ()
+                set_committed_value(game, name, [items[i] for i in ids if i in items])
+
+    def _missing(self, games: Sequence[Game]) -> bool:
+        for name, (column, _) in RELATION_ARRAYS.items():
+            items = self._items[name]
+            for game in games:
+                if any(i not in items for i in getattr(game, column) or ()):
+                    return True
+        return False
+
+    async def _load(self, session: AsyncSession, games: Sequence[Game]) -> None:
+        async with self._lock:
+            # Another request may have reloaded while this one waited
+            if not self._missing(games):
+                return
+            loaded = {}
+            for name, (_, model) in RELATION_ARRAYS.items():
+                table = model.__table__
+                rows = await session.execute(select(table))
+                items = {}
+                for row in rows.mappings():
+                    # Detached copies: never tied to, or expired by, a request's session
+                    item = model(**row)
+                    make_transient_to_detached(item)
+                    items[item.id] = item
+                loaded[name] = items
+            self._items = loaded
+            self.stats["loads"] += 1
+
+
+relation_vocabulary = RelationVocabulary()
@@ -0,0 +1,168 @@
+"""In-process inverted index used for text search when Postgres FTS is unavailable.
+
+SQLite test runs have no ``tsvector``/``pg_trgm``, so the repository ranks
+matches here instead. The index mirrors the Postgres semantics closely enough
+for tests: every query term must match (as a word prefix), fields are weighted
+title > developer/publisher > description, and a trigram title match is used
+when no term matches at all.
+"""
+from __future__ import annotations
+
+import asyncio
+import bisect
+import math
+import re
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Game
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Field weights, mirroring setweight() A/B/C on the Postgres search vector.
+_WEIGHTS = {"title": 1.0, "developer": 0.4, "publisher": 0.4, "short_description": 0.2, "description": 0.2}
+
+# Minimum trigram similarity for a fuzzy title match (pg_trgm's default threshold).
+FUZZY_THRESHOLD = 0.3
+
+
+def tokenize(text: str | None) -> List[str]:
+    return _TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _trigrams(text: str) -> Set[str]:
+    grams: Set[str] = set()
+    for word in tokenize(text):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class InvertedIndex:
+    """Term -> {game_id: weight} postings over the searchable game fields."""
+
+    def __init__(self) -> None:
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._doc_terms: Dict[int, Set[str]] = {}
+        self._titles: Dict[int, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._lock = asyncio.Lock()
+        self.loaded = False
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    # ------------------------------------------------------------ maintenance
+    def add(self, game_id: int, fields: Dict[str, Optional[str]]) -> None:
+        self.remove(game_id)
+        weights: Dict[str, float] = {}
+        for field, weight in _WEIGHTS.items():
+            for term in tokenize(fields.get(field)):
+                weights[term] = max(weights.get(term, 0.0), weight)
+        for term, weight in weights.items():
+            if term not in self._postings:
+                self._vocabulary_dirty = True
+            self._postings[term][game_id] = weight
+        self._doc_terms[game_id] = set(weights)
+        self._titles[game_id] = _trigrams(fields.get("title") or "")
+
+    def remove(self, game_id: int) -> None:
+        for term in self._doc_terms.pop(game_id, ()):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(game_id, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary_dirty = True
+        self._titles.pop(game_id, None)
+
+    def index_game(self, game: Game) -> None:
+        """Keep an already loaded index in sync with a created or updated game."""
+        if self.loaded:
+            self.add(game.id, {field: getattr(game, field, None) for field in _WEIGHTS})
+
+    def discard_game(self, game_id: int) -> None:
+        if self.loaded:
+            self.remove(game_id)
+
+    async def reindex(self, session: AsyncSession, game_ids: Iterable[int]) -> None:
+        """Re-read ``game_ids`` into a loaded index after writes that bypass the ORM."""
+        if not self.loaded:
+            return
+        columns = [getattr(Game, field) for field in _WEIGHTS]
+        result = await session.execute(select(Game.id, *columns).where(Game.id.in_(list(game_ids))))
+        for row in result:
+            self.add(row[0], dict(zip(_WEIGHTS, row[1:])))
+
+    async def ensure_loaded(self, session: AsyncSession) -> None:
+        if self.loaded:
+            return
+        async with self._lock:
+            if self.loaded:
+                return
+            columns = [getattr(Game, field) for field in _WEIGHTS]
+            result = await session.execute(select(Game.id, *columns))
+            for row in result:
+                self.add(row[0], dict(zip(_WEIGHTS, row[1:])))
+            self.loaded = True
+
+    # ---------------------------------------------------------------- queries
+    def _expand(self, prefix: str) -> Iterable[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            yield term
+
+    def search(self, query: str) -> Dict[int, float]:
+        """Return ``{game_id: score}`` for games matching every query term."""
+        terms = tokenize(query)
+        if not terms:
+            return {}
+        total = max(1, len(self._doc_terms))
+        scores: Optional[Dict[int, float]] = None
+        for term in terms:
+            term_scores: Dict[int, float] = {}
+            for candidate in self._expand(term):
+                postings = self._postings[candidate]
+                idf = math.log(1 + total / len(postings))
+                # Exact word matches outrank prefix completions
+                boost = 1.0 if candidate == term else 0.5
+                for game_id, weight in postings.items():
+                    score = weight * idf * boost
+                    if score > term_scores.get(game_id, 0.0):
+                        term_scores[game_id] = score
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {gid: s + term_scores[gid] for gid, s in scores.items() if gid in term_scores}
+            if not scores:
+                break
+        if scores:
+            return scores
+        return self._fuzzy(query)
+
+    def _fuzzy(self, query: str) -> Dict[int, float]:
+        wanted = _trigrams(query)
+        if not wanted:
+            return {}
+        matches: Dict[int, float] = {}
+        for game_id, grams in self._titles.items():
+            if not grams:
+                continue
+            # word_similarity-style: how much of the query appears in the title
+            similarity = len(wanted & grams) / len(wanted)
+            if similarity >= FUZZY_THRESHOLD:
+                matches[game_id] = similarity
+        return matches
+
+
+game_search_index = InvertedIndex()
@@ -0,0 +1,40 @@
+"""Hot slug -> game id cache for product page lookups.
+
+Slugs are never re-pointed at another game (renames leave redirects behind),
+so an entry only goes stale when its game is deleted; readers drop it when
+the id no longer resolves.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+
+class SlugCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0}
+
+    def get(self, slug: str) -> Optional[int]:
+        game_id = self._entries.get(slug)
+        if game_id is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(slug)
+        self.stats["hits"] += 1
+        return game_id
+
+    def put(self, slug: str, game_id: int) -> None:
+        self._entries[slug] = game_id
+        self._entries.move_to_end(slug)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, slug: str) -> None:
+        self._entries.pop(slug, None)
+
+
+hot_slugs = SlugCache(settings.SLUG_CACHE_SIZE)
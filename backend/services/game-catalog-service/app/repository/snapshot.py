@@ -0,0 +1,271 @@
+"""Read-optimized columnar copy of the hot ``Game`` filter columns.
+
+The storefront shelves (featured, new releases, on sale) and the simple
+search filters only look at a handful of numeric and boolean columns. This
+snapshot keeps those columns as NumPy arrays so a shelf is one vectorized mask
+plus an ``argpartition`` top-k, and SQL is only used to fetch the winning rows
+by primary key. It refreshes incrementally from ``updated_at``; text and
+relation (genre/tag/platform) filters always go to SQL.
+
+NumPy is optional: without it the snapshot reports itself disabled and every
+read takes the SQL path.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Game, GameStatus
+from app.schemas import GameSearchFilters
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+_FLAGS = ("single_player", "multiplayer", "co_op", "vr_support", "early_access")
+_CODED = ("status", "game_type", "age_rating")
+_COLUMNS = (
+    Game.id,
+    Game.price,
+    Game.average_rating,
+    Game.discount_percent,
+    Game.release_date,
+    Game.total_reviews,
+    *(getattr(Game, name) for name in _CODED),
+    *(getattr(Game, name) for name in _FLAGS),
+    Game.updated_at,
+)
+
+# Sorts the snapshot can order by: sort_by -> key columns before the id tie-breaker
+SNAPSHOT_SORTS = {
+    "price": ("price",),
+    "rating": ("rating_key",),
+    "relevance": ("rating_key", "total_reviews"),
+}
+
+# Re-read rows updated this long before the watermark: updated_at is the
+# writer's transaction start, so a slow transaction can commit "in the past".
+_OVERLAP = timedelta(seconds=60)
+
+
+class CatalogSnapshot:
+    """Column arrays indexed by row; ``_rows`` maps game id to row."""
+
+    def __init__(self, enabled: bool, refresh_interval: float) -> None:
+        self.enabled = enabled and np is not None
+        self.refresh_interval = refresh_interval
+        self._columns: Dict[str, "np.ndarray"] = {}
+        self._rows: Dict[int, int] = {}
+        self._codes: Dict[str, Dict[Optional[str], int]] = {name: {} for name in _CODED}
+        self._watermark = None
+        self._refreshed_at = 0.0
+        self._dirty = True
+        self._lock = asyncio.Lock()
+        self.loaded = False
+        self.stats = {"full_loads": 0, "refreshes": 0, "rows_applied": 0}
+
+    def __len__(self) -> int:
+        return int(self._columns["alive"].sum()) if self.loaded else 0
+
+    # ------------------------------------------------------------ maintenance
+    def mark_dirty(self, deleted_id: Optional[int] = None) -> None:
+        """Refresh before the next read, so this worker sees its own writes."""
+        self._dirty = True
+        if deleted_id is not None and deleted_id in self._rows:
+            self._columns["alive"][self._rows[deleted_id]] = False
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        # A refresh in flight has already cleared _dirty; wait for it to land
+        if not self._stale() and not self._lock.locked():
+            return
+        async with self._lock:
+            if not self._stale():
+                return
+            self._dirty = False
+            self._refreshed_at = time.monotonic()
+            if not self.loaded:
+                await self._full_load(session)
+                return
+            await self._apply_updates(session)
+            # updated_at cannot reveal deletes; the id set can. New ids only grow, so
+            # a delete offset by an insert still moves the sum when the count holds.
+            count, id_sum = (
+                await session.execute(select(func.count(Game.id), func.coalesce(func.sum(Game.id), 0)))
+            ).one()
+            alive = self._columns["id"][self._columns["alive"]]
+            if (count, int(id_sum)) != (len(alive), int(alive.sum())):
+                await self._full_load(session)
+
+    def _stale(self) -> bool:
+        return self._dirty or time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    async def _full_load(self, session: AsyncSession) -> None:
+        rows = (await session.execute(select(*_COLUMNS))).all()
+        self._codes = {name: {} for name in _CODED}
+        self._columns = self._encode(rows)
+        self._rows = {game_id: row for row, game_id in enumerate(self._columns["id"].tolist())}
+        self._watermark = max((row[-1] for row in rows), default=None)
+        self.loaded = True
+        self.stats["full_loads"] += 1
+        logger.info("Catalog snapshot loaded with %d games", len(rows))
+
+    async def _apply_updates(self, session: AsyncSession) -> None:
+        stmt = select(*_COLUMNS)
+        if self._watermark is not None:
+            stmt = stmt.where(Game.updated_at >= self._watermark - _OVERLAP)
+        rows = (await session.execute(stmt)).all()
+        self.stats["refreshes"] += 1
+        if not rows:
+            return
+        batch = self._encode(rows)
+        positions = np.fromiter((self._rows.get(row[0], -1) for row in rows), dtype=np.int64, count=len(rows))
+        known = positions >= 0
+        for name, column in self._columns.items():
+            column[positions[known]] = batch[name][known]
+        if not known.all():
+            start = len(self._columns["id"])
+            for name in self._columns:
+                self._columns[name] = np.concatenate([self._columns[name], batch[name][~known]])
+            for offset, game_id in enumerate(batch["id"][~known].tolist()):
+                self._rows[game_id] = start + offset
+        self._watermark = max(self._watermark, max(row[-1] for row in rows))
+        self.stats["rows_applied"] += len(rows)
+
+    def _code(self, name: str, value: Optional[str]) -> int:
+        codes = self._codes[name]
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def _encode(self, rows: Sequence) -> Dict[str, "np.ndarray"]:
+        count = len(rows)
+        nan = float("nan")
+        rating = np.fromiter(
+            (nan if row.average_rating is None else row.average_rating for row in rows), np.float64, count
+        )
+        columns = {
+            "id": np.fromiter((row.id for row in rows), np.int64, count),
+            "price": np.fromiter((row.price or 0.0 for row in rows), np.float64, count),
+            "rating": rating,
+            # coalesce(average_rating, -1), as in the SQL sort key
+            "rating_key": np.where(np.isnan(rating), -1.0, rating),
+            "discount": np.fromiter((row.discount_percent or 0.0 for row in rows), np.float64, count),
+            "release": np.fromiter(
+                (nan if row.release_date is None else row.release_date.timestamp() for row in rows),
+                np.float64,
+                count,
+            ),
+            "total_reviews": np.fromiter((row.total_reviews or 0 for row in rows), np.int64, count),
+            "alive": np.ones(count, dtype=bool),
+        }
+        for name in _CODED:
+            columns[name] = np.fromiter(
+                (self._code(name, getattr(row, name)) for row in rows), np.int16, count
+            )
+        for name in _FLAGS:
+            columns[name] = np.fromiter((bool(getattr(row, name)) for row in rows), bool, count)
+        return columns
+
+    # ---------------------------------------------------------------- queries
+    def _equals(self, name: str, value: Optional[str]) -> "np.ndarray":
+        code = self._codes[name].get(value)
+        if code is None:
+            return np.zeros(len(self._columns["id"]), dtype=bool)
+        return self._columns[name] == code
+
+    def _active(self) -> "np.ndarray":
+        return self._columns["alive"] & self._equals("status", GameStatus.ACTIVE.value)
+
+    def _top(
+        self, mask: "np.ndarray", keys: Sequence[str], descending: bool, limit: int, offset: int = 0
+    ) -> List[int]:
+        """Ids of rows ``offset..offset+limit`` under ``mask``, ordered by ``keys`` then id."""
+        rows = np.flatnonzero(mask)
+        wanted = offset + limit
+        if wanted <= 0 or rows.size == 0:
+            return []
+        sign = -1 if descending else 1
+        sort_keys = [sign * self._columns[key][rows] for key in (*keys, "id")]
+        if wanted < rows.size:
+            # Keep everything up to the k-th primary key, ties included, then
+            # order only that slice instead of every matching row.
+            kth = sort_keys[0][np.argpartition(sort_keys[0], wanted - 1)[wanted - 1]]
+            keep = sort_keys[0] <= kth
+            rows = rows[keep]
+            sort_keys = [key[keep] for key in sort_keys]
+        order = np.lexsort(sort_keys[::-1])[offset:wanted]
+        return self._columns["id"][rows[order]].tolist()
+
+    async def featured(
+        self, session: AsyncSession, limit: int, min_rating: float, min_reviews: int
+    ) -> List[int]:
+        await self.ensure_fresh(session)
+        columns = self._columns
+        mask = self._active() & (columns["rating"] >= min_rating) & (columns["total_reviews"] >= min_reviews)
+        return self._top(mask, ("rating",), True, limit)
+
+    async def new_releases(self, session: AsyncSession, limit: int) -> List[int]:
+        await self.ensure_fresh(session)
+        mask = self._active() & ~np.isnan(self._columns["release"])
+        return self._top(mask, ("release",), True, limit)
+
+    async def on_sale(self, session: AsyncSession, limit: int) -> List[int]:
+        await self.ensure_fresh(session)
+        mask = self._active() & (self._columns["discount"] > 0)
+        return self._top(mask, ("discount",), True, limit)
+
+    @staticmethod
+    def serves(filters: GameSearchFilters, cursor: Optional[str]) -> bool:
+        """Whether ``search`` can answer these filters without SQL predicates."""
+        return (
+            not filters.query
+            and not filters.genres
+            and not filters.tags
+            and not filters.platforms
+            and cursor is None
+            and (filters.sort_by or "relevance") in SNAPSHOT_SORTS
+        )
+
+    async def search(
+        self, session: AsyncSession, filters: GameSearchFilters, offset: int, limit: int
+    ) -> Tuple[List[int], int]:
+        """``(ids for the page, total matches)`` in ``GameRepository.search`` order."""
+        await self.ensure_fresh(session)
+        columns = self._columns
+        mask = columns["alive"].copy()
+        if filters.min_price is not None:
+            mask &= columns["price"] >= filters.min_price
+        if filters.max_price is not None:
+            mask &= columns["price"] <= filters.max_price
+        if filters.min_rating is not None:
+            mask &= columns["rating"] >= filters.min_rating
+        if filters.max_rating is not None:
+            mask &= columns["rating"] <= filters.max_rating
+        for flag in _FLAGS:
+            value = getattr(filters, flag)
+            if value is not None:
+                mask &= columns[flag] == value
+        for name in _CODED:
+            value = getattr(filters, name)
+            if value:
+                mask &= self._equals(name, value.value)
+
+        sort_by = filters.sort_by or "relevance"
+        # Relevance without a text query is popularity, always descending
+        descending = sort_by == "relevance" or filters.sort_order != "asc"
+        return self._top(mask, SNAPSHOT_SORTS[sort_by], descending, limit, offset), int(mask.sum())
+
+
+catalog_snapshot = CatalogSnapshot(
+    settings.CATALOG_SNAPSHOT_ENABLED, settings.CATALOG_SNAPSHOT_REFRESH_SECONDS
+)
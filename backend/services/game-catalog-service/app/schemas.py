@@ -1,9 +1,9 @@
 """
 Game Catalog Service Pydantic Schemas
 """
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, field_validator
 from typing import Optional, List, Dict, Any
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 
 class GameStatusEnum(str, Enum):
@@ -104,8 +104,49 @@ class GameUpdate(BaseModel):
     mac_requirements: Optional[SystemRequirements] = None
     linux_requirements: Optional[SystemRequirements] = None
 
+class GameImportRecord(GameBase):
+    """One game of a storefront dump; relations are given by name."""
+    steam_app_id: int
+    header_image_url: Optional[str] = Field(None, max_length=500)
+    background_image_url: Optional[str] = Field(None, max_length=500)
+    capsule_image_url: Optional[str] = Field(None, max_length=500)
+    icon_url: Optional[str] = Field(None, max_length=500)
+    screenshots: Optional[List[str]] = None
+    movies: Optional[List[str]] = None
+    total_reviews: int = Field(default=0, ge=0)
+    positive_reviews: int = Field(default=0, ge=0)
+    negative_reviews: int = Field(default=0, ge=0)
+    average_rating: Optional[float] = Field(None, ge=0)
+    metadata: Optional[Dict[str, Any]] = None
+    genres: Optional[List[str]] = None
+    tags: Optional[List[str]] = None
+    platforms: Optional[List[str]] = None
+
+    @field_validator("release_date", mode="before")
+    @classmethod
+    def _date_only_release(cls, value: Any) -> Any:
+        # Store dumps usually carry a plain YYYY-MM-DD release date
+        if isinstance(value, str) and len(value) == 10:
+            try:
+                return datetime.combine(date.fromisoformat(value), datetime.min.time())
+            except ValueError:
+                return value
+        return value
+
+class ImportErrorDetail(BaseModel):
+    line: int
+    message: str
+
+class GameImportResponse(BaseModel):
+    received: int
+    inserted: int
+    updated: int
+    failed: int
+    errors: List[ImportErrorDetail] = []
+
 class GameResponse(GameBase):
     id: int
+    slug: Optional[str] = None
     uuid: Optional[str] = None
     steam_app_id: Optional[int] = None
     discount_percent: Optional[float] = None
@@ -174,6 +215,7 @@ class GameResponse(GameBase):
         
         return cls(
             id=game.id,
+            slug=game.slug,
             uuid=str(game.uuid) if game.uuid else None,
             title=game.title,
             description=game.description,
@@ -318,10 +360,34 @@ class GameSearchFilters(BaseModel):
         pattern="^(asc|desc)$",
     )
 
+class FacetValueCount(BaseModel):
+    id: int
+    name: str
+    count: int
+
+class PriceBucketCount(BaseModel):
+    key: str
+    min_price: float
+    # Exclusive; None for the open-ended top bucket
+    max_price: Optional[float] = None
+    count: int
+
+class SearchFacets(BaseModel):
+    genres: List[FacetValueCount] = []
+    tags: List[FacetValueCount] = []
+    platforms: List[FacetValueCount] = []
+    price_buckets: List[PriceBucketCount] = []
+    features: Dict[str, int] = {}
+
 class GameSearchResponse(BaseModel):
     games: List[GameResponse]
-    total: int
+    # None when the caller skipped counting (count=none); approximate for count=estimate
+    total: Optional[int] = None
     page: int
     per_page: int
-    total_pages: int
-    filters_applied: GameSearchFilters
\ No newline at end of file
+    total_pages: Optional[int] = None
+    filters_applied: GameSearchFilters
+    # Opaque keyset cursor for the next page; None on the last page
+    next_cursor: Optional[str] = None
+    # Sidebar counts over every game matching the filters (facets=true)
+    facets: Optional[SearchFacets] = None
\ No newline at end of file
@@ -378,7 +378,7 @@ async def seed_games(target: int = 100, curated_only: bool = False) -> tuple[int
                 await session.flush()
 
         if curated_inserted or missing:
-        await session.commit()
+            await session.commit()
 
         return curated_inserted + missing, curated_inserted
 
@@ -1,6 +1,8 @@
 """Business logic for the game catalog."""
 from __future__ import annotations
 
+from typing import Any, AsyncIterable, Callable, Iterable, List, Optional, Union
+
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models import (
@@ -15,6 +17,10 @@ from app.repository.game_repository import (
     PlatformRepository,
     TagRepository,
 )
+from app.repository.facet_index import game_facet_index
+from app.repository.pagination import Page
+from app.repository.search_index import game_search_index
+from app.repository.snapshot import catalog_snapshot
 from app.schemas import (
     GameCreate,
     GameSearchFilters,
@@ -23,7 +29,11 @@ from app.schemas import (
     PlatformCreate,
     TagCreate,
 )
+from app.services.game_import import GameImporter, ImportReport, ParsedRecord, import_records
+from app.services.icon_pool import icon_pool
+from app.services.shelf_cache import shelf_cache
 from app.utils.exceptions import ConflictError, NotFoundError
+from app.utils.serialization import game_fragments
 
 
 def _to_dict(requirements) -> dict | None:
@@ -90,7 +100,12 @@ class CatalogService:
 
         await self.games.create(game)
         await self.session.commit()
-        await self.session.refresh(game)
+        await self._reload(game)
+        game_search_index.index_game(game)
+        game_facet_index.mark_stale(game.id)
+        catalog_snapshot.mark_dirty()
+        icon_pool.mark_dirty()
+        await shelf_cache.invalidate()
         return game
 
     async def get_game(self, game_id: int) -> Game:
@@ -99,11 +114,32 @@ class CatalogService:
             raise NotFoundError("Game not found")
         return game
 
-    async def list_games(self, skip: int = 0, limit: int = 100):
-        return await self.games.list(skip, limit)
+    async def sample_icons(self, limit: int) -> List[str]:
+        return await icon_pool.sample(self.session, limit)
+
+    async def _reload(self, game: Game) -> None:
+        # A bare refresh leaves the relations expired, and the endpoints read them
+        # outside any await; load them here instead of lazily.
+        await self.session.refresh(game)
+        await self.session.refresh(game, ["genres", "tags", "platforms"])
+
+    async def _game_for_update(self, game_id: int) -> Game:
+        game = await self.games.get_for_update(game_id)
+        if not game:
+            raise NotFoundError("Game not found")
+        return game
+
+    async def get_game_by_slug(self, slug: str) -> Game:
+        game = await self.games.get_by_slug(slug)
+        if not game:
+            raise NotFoundError(f"Game not found with slug: {slug}")
+        return game
+
+    async def list_games(self, skip: int = 0, limit: int = 100, after_id: int | None = None):
+        return await self.games.list(skip, limit, after_id=after_id)
 
     async def update_game(self, game_id: int, payload: GameUpdate) -> Game:
-        game = await self.get_game(game_id)
+        game = await self._game_for_update(game_id)
         data = payload.model_dump(exclude_unset=True)
 
         for field, value in data.items():
@@ -122,27 +158,74 @@ class CatalogService:
             game.discount_percent = 0.0
 
         await self.session.commit()
-        await self.session.refresh(game)
+        await self._reload(game)
+        game_search_index.index_game(game)
+        game_facet_index.mark_stale(game.id)
+        catalog_snapshot.mark_dirty()
+        icon_pool.mark_dirty()
+        game_fragments.discard(game.id)
+        await shelf_cache.invalidate()
         return game
 
     async def delete_game(self, game_id: int) -> None:
-        game = await self.get_game(game_id)
+        game = await self._game_for_update(game_id)
         await self.games.delete(game)
         await self.session.commit()
-
-    async def featured_games(self, limit: int):
-        return await self.games.featured(limit)
-
-    async def new_releases(self, limit: int):
-        return await self.games.new_releases(limit)
-
-    async def on_sale(self, limit: int):
-        return await self.games.on_sale(limit)
+        game_search_index.discard_game(game_id)
+        game_facet_index.mark_stale(game_id)
+        catalog_snapshot.mark_dirty(deleted_id=game_id)
+        icon_pool.mark_dirty()
+        game_fragments.discard(game_id)
+        await shelf_cache.invalidate()
+
+    async def import_games(
+        self,
+        records: Union[Iterable[ParsedRecord], AsyncIterable[ParsedRecord]],
+        batch_size: int = 500,
+        max_errors: Optional[int] = None,
+        progress: Optional[Callable[[ImportReport], Any]] = None,
+    ) -> ImportReport:
+        """Upsert parsed dump records in batches; see ``app.services.game_import``."""
+
+        async def on_batch(report: ImportReport, game_ids: List[int]) -> None:
+            await game_search_index.reindex(self.session, game_ids)
+            for game_id in game_ids:
+                game_facet_index.mark_stale(game_id)
+                game_fragments.discard(game_id)
+            if progress is not None:
+                progress(report)
+
+        importer = GameImporter(self.session, batch_size, max_errors, on_batch)
+        try:
+            return await import_records(importer, records)
+        finally:
+            # Batches committed before a failure are live too
+            if importer.report.batches:
+                catalog_snapshot.mark_dirty()
+                icon_pool.mark_dirty()
+                await shelf_cache.invalidate()
+
+    async def featured_games(self, limit: int) -> List[bytes]:
+        return await shelf_cache.get("featured", limit, self.session)
+
+    async def new_releases(self, limit: int) -> List[bytes]:
+        return await shelf_cache.get("new_releases", limit, self.session)
+
+    async def on_sale(self, limit: int) -> List[bytes]:
+        return await shelf_cache.get("on_sale", limit, self.session)
 
     async def search(
-        self, filters: GameSearchFilters, page: int, per_page: int
-    ) -> tuple[list[Game], int]:
-        return await self.games.search(filters, page, per_page)
+        self,
+        filters: GameSearchFilters,
+        page: int,
+        per_page: int,
+        cursor: str | None = None,
+        count: str = "exact",
+        with_facets: bool = False,
+    ) -> Page[Game]:
+        return await self.games.search(
+            filters, page, per_page, cursor=cursor, count=count, with_facets=with_facets
+        )
 
     # ------------------------------------------------------------------ Genres
     async def create_genre(self, payload: GenreCreate) -> Genre:
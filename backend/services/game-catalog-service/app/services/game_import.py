@@ -0,0 +1,384 @@
+"""Streaming bulk import of storefront dumps into the catalog.
+
+``CatalogService.create_game`` pays a steam_app_id lookup, three relation
+lookups, a commit and a refresh per game. Here records are validated one at a
+time but written ``batch_size`` at a time: one ``INSERT ... ON CONFLICT
+(steam_app_id) DO UPDATE`` for the games, and one DELETE plus one INSERT per
+association table for genres, tags and platforms. Each batch commits on its
+own, so memory stays bounded by the batch and re-running an interrupted import
+is safe.
+
+Records are keyed by ``steam_app_id``. An existing game is only updated in the
+fields its record sets, and its genres, tags or platforms are only replaced
+when the record lists them. Genre, tag and platform names not yet in the
+catalog are created. Imports never change an existing game's slug, so store
+links stay stable; new games get slugs the same way ``Game``'s insert hook
+assigns them.
+"""
+from __future__ import annotations
+
+import csv
+import inspect
+import json
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+from pydantic import ValidationError
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Game, GameSlugRedirect, Genre, Platform, Tag
+from app.models.game import game_genres, game_platforms, game_tags
+from app.schemas import GameImportRecord
+from app.utils.exceptions import ImportAbortedError
+from app.utils.slugs import slugify
+
+_GAMES = Game.__table__
+
+# Record field -> (association table, its vocabulary id column, vocabulary table)
+_RELATIONS = {
+    "genres": (game_genres, game_genres.c.genre_id, Genre.__table__),
+    "tags": (game_tags, game_tags.c.tag_id, Tag.__table__),
+    "platforms": (game_platforms, game_platforms.c.platform_id, Platform.__table__),
+}
+_ENUMS = ("game_type", "status", "age_rating")
+_REQUIREMENTS = ("pc_requirements", "mac_requirements", "linux_requirements")
+# Game columns taken from a record as-is; ``metadata`` is stored as ``metadata_json``
+_RECORD_COLUMNS = tuple(
+    name for name in GameImportRecord.model_fields if name not in _RELATIONS and name != "metadata"
+)
+
+# CSV cells holding several values ("Action|RPG") or a JSON document
+CSV_LIST_SEPARATOR = "|"
+_CSV_LISTS = ("genres", "tags", "platforms", "screenshots", "movies")
+_CSV_JSON = (*_REQUIREMENTS, "metadata")
+
+# Invalid records kept verbatim in the report; later ones are only counted
+_MAX_REPORTED_ERRORS = 100
+
+ParsedRecord = Tuple[int, Union[Dict[str, Any], ValueError]]
+
+
+@dataclass
+class ImportReport:
+    received: int = 0
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    batches: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def rate(self) -> float:
+        """Records processed per second so far."""
+        return self.received / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.received} records: {self.inserted} inserted, {self.updated} updated, "
+            f"{self.failed} failed in {self.elapsed:.1f}s ({self.rate:.0f} records/s)"
+        )
+
+
+# ---------------------------------------------------------------- parsing
+def parse_ndjson(lines: Iterable[str]) -> Iterator[ParsedRecord]:
+    """``(line number, record or error)`` for every non-blank line."""
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        yield line_no, parse_ndjson_line(line)
+
+
+def parse_ndjson_line(line: Union[str, bytes]) -> Union[Dict[str, Any], ValueError]:
+    try:
+        record = json.loads(line)
+    except ValueError as exc:
+        return ValueError(f"invalid JSON: {exc}")
+    if not isinstance(record, dict):
+        return ValueError("expected a JSON object")
+    return record
+
+
+def parse_csv(lines: Iterable[str]) -> Iterator[ParsedRecord]:
+    """Rows of a CSV file with a header; empty cells are treated as absent.
+
+    List columns hold ``|``-separated values and the requirements/metadata
+    columns hold JSON.
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        line_no = reader.line_num
+        record: Dict[str, Any] = {}
+        try:
+            for key, value in row.items():
+                if key is None or value is None or value == "":
+                    continue
+                if key in _CSV_LISTS:
+                    record[key] = [item.strip() for item in value.split(CSV_LIST_SEPARATOR) if item.strip()]
+                elif key in _CSV_JSON:
+                    record[key] = json.loads(value)
+                else:
+                    record[key] = value
+        except ValueError as exc:
+            yield line_no, ValueError(f"invalid JSON in column {key!r}: {exc}")
+            continue
+        yield line_no, record
+
+
+PARSERS: Dict[str, Callable[[Iterable[str]], Iterator[ParsedRecord]]] = {
+    "ndjson": parse_ndjson,
+    "csv": parse_csv,
+}
+
+
+# ---------------------------------------------------------------- importing
+@dataclass(slots=True)
+class _Pending:
+    line_no: int
+    record: GameImportRecord
+    row: Dict[str, Any]
+
+
+class GameImporter:
+    """Accumulates validated records and upserts them ``batch_size`` at a time.
+
+    Feed it with ``add``/``reject`` and call ``finish`` once at the end.
+    ``on_batch`` (plain or async) is called after every committed batch with
+    the running report and the ids of the games written.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        batch_size: int = 500,
+        max_errors: Optional[int] = None,
+        on_batch: Optional[Callable[[ImportReport, List[int]], Any]] = None,
+    ) -> None:
+        self.session = session
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.on_batch = on_batch
+        self.report = ImportReport()
+        self._batch: Dict[int, _Pending] = {}
+        self._vocabulary: Dict[str, Dict[str, int]] = {name: {} for name in _RELATIONS}
+        dialect = session.bind.dialect.name
+        self._insert = sqlite.insert if dialect == "sqlite" else postgresql.insert
+
+    async def add(self, line_no: int, raw: Mapping[str, Any]) -> None:
+        self.report.received += 1
+        try:
+            record = GameImportRecord.model_validate(raw)
+        except ValidationError as exc:
+            self._fail(line_no, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()
+            ))
+            return
+        # A repeated steam_app_id within one batch: the later record wins
+        self._batch.pop(record.steam_app_id, None)
+        self._batch[record.steam_app_id] = _Pending(line_no, record, _row(record))
+        if len(self._batch) >= self.batch_size:
+            await self._flush()
+
+    def reject(self, line_no: int, message: str) -> None:
+        """Count a record that could not even be parsed."""
+        self.report.received += 1
+        self._fail(line_no, message)
+
+    async def finish(self) -> ImportReport:
+        if self._batch:
+            await self._flush()
+        return self.report
+
+    def _fail(self, line_no: int, message: str) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < _MAX_REPORTED_ERRORS:
+            self.report.errors.append((line_no, message))
+        if self.max_errors is not None and self.report.failed > self.max_errors:
+            raise ImportAbortedError(
+                f"Import stopped at line {line_no} after {self.report.failed} invalid records; "
+                f"{self.report.inserted + self.report.updated} records were already imported"
+            )
+
+    # ------------------------------------------------------------ batch writes
+    async def _flush(self) -> None:
+        batch, self._batch = list(self._batch.values()), {}
+        try:
+            ids = await self._write(batch)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        self.report.batches += 1
+        if self.on_batch is not None:
+            result = self.on_batch(self.report, ids)
+            if inspect.isawaitable(result):
+                await result
+
+    async def _write(self, batch: List[_Pending]) -> List[int]:
+        steam_ids = [pending.record.steam_app_id for pending in batch]
+        existing = set(
+            (await self.session.execute(
+                select(_GAMES.c.steam_app_id).where(_GAMES.c.steam_app_id.in_(steam_ids))
+            )).scalars()
+        )
+        await self._assign_slugs([p.row for p in batch if p.record.steam_app_id not in existing])
+
+        # Rows share one VALUES shape; what an existing game gets overwritten
+        # with depends on the fields its record set, so group by those.
+        groups: Dict[frozenset, List[_Pending]] = {}
+        for pending in batch:
+            groups.setdefault(_updated_columns(pending.record), []).append(pending)
+        game_ids: Dict[int, int] = {}
+        for columns, members in groups.items():
+            stmt = self._insert(_GAMES)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[_GAMES.c.steam_app_id],
+                set_={**{name: stmt.excluded[name] for name in columns}, "updated_at": func.now()},
+            ).returning(_GAMES.c.id, _GAMES.c.steam_app_id)
+            result = await self.session.execute(stmt, [pending.row for pending in members])
+            game_ids.update((steam_app_id, game_id) for game_id, steam_app_id in result)
+
+        for name, (table, value_column, vocabulary) in _RELATIONS.items():
+            listed = [p for p in batch if getattr(p.record, name) is not None]
+            if not listed:
+                continue
+            ids = await self._vocabulary_ids(name, vocabulary, {
+                value for pending in listed for value in getattr(pending.record, name)
+            })
+            replaced = [game_ids[p.record.steam_app_id] for p in listed]
+            await self.session.execute(delete(table).where(table.c.game_id.in_(replaced)))
+            links = {
+                (game_ids[pending.record.steam_app_id], ids[value])
+                for pending in listed
+                for value in getattr(pending.record, name)
+            }
+            if links:
+                await self.session.execute(
+                    table.insert(),
+                    [{"game_id": game_id, value_column.name: value_id} for game_id, value_id in links],
+                )
+
+        inserted = sum(1 for steam_app_id in game_ids if steam_app_id not in existing)
+        self.report.inserted += inserted
+        self.report.updated += len(game_ids) - inserted
+        return list(game_ids.values())
+
+    async def _vocabulary_ids(self, name: str, table, names: Set[str]) -> Dict[str, int]:
+        """Ids for genre/tag/platform ``names``, creating the missing ones."""
+        known = self._vocabulary[name]
+        missing = names - known.keys()
+        if missing:
+            rows = [{"name": value} for value in missing]
+            if name == "platforms":
+                rows = [{"name": value, "display_name": value} for value in missing]
+            await self.session.execute(
+                self._insert(table).on_conflict_do_nothing(index_elements=[table.c.name]), rows
+            )
+            result = await self.session.execute(
+                select(table.c.name, table.c.id).where(table.c.name.in_(missing))
+            )
+            known.update(result.all())
+        return known
+
+    async def _assign_slugs(self, rows: List[Dict[str, Any]]) -> None:
+        """First free ``slug``, ``slug-2``... per new game, as ``Game``'s insert hook does."""
+        games, redirects = _GAMES, GameSlugRedirect.__table__
+        next_suffix: Dict[str, int] = {}
+        proposed: Set[str] = set()
+        waiting = rows
+        while waiting:
+            candidates = []
+            for row in waiting:
+                base = slugify(row["title"]) or "game"
+                while True:
+                    suffix = next_suffix.get(base, 1)
+                    next_suffix[base] = suffix + 1
+                    candidate = base if suffix == 1 else f"{base}-{suffix}"
+                    if candidate not in proposed:
+                        break
+                proposed.add(candidate)
+                candidates.append((row, candidate))
+            names = [candidate for _, candidate in candidates]
+            taken = set(
+                (await self.session.execute(
+                    select(games.c.slug).where(games.c.slug.in_(names)).union(
+                        select(redirects.c.slug).where(redirects.c.slug.in_(names))
+                    )
+                )).scalars()
+            )
+            waiting = []
+            for row, candidate in candidates:
+                if candidate in taken:
+                    waiting.append(row)
+                else:
+                    row["slug"] = candidate
+
+
+def _row(record: GameImportRecord) -> Dict[str, Any]:
+    row = {name: getattr(record, name) for name in _RECORD_COLUMNS}
+    for name in _ENUMS:
+        row[name] = row[name].value if row[name] is not None else None
+    for name in _REQUIREMENTS:
+        row[name] = row[name].model_dump() if row[name] is not None else None
+    row["metadata_json"] = record.metadata
+    # Same rule as CatalogService.create_game/update_game
+    if record.original_price and record.original_price > record.price:
+        row["discount_percent"] = round(
+            ((record.original_price - record.price) / record.original_price) * 100, 2
+        )
+    else:
+        row["discount_percent"] = 0.0
+    # Existing games keep their slug; new ones get theirs in _assign_slugs
+    row["slug"] = None
+    return row
+
+
+def _updated_columns(record: GameImportRecord) -> frozenset:
+    """Columns an existing game takes from ``record``: only the fields it set."""
+    columns = {name for name in record.model_fields_set if name not in _RELATIONS and name != "steam_app_id"}
+    if "metadata" in columns:
+        columns.discard("metadata")
+        columns.add("metadata_json")
+    if columns & {"price", "original_price"}:
+        columns.add("discount_percent")
+    return frozenset(columns)
+
+
+async def import_records(
+    importer: GameImporter, records: Union[Iterable[ParsedRecord], AsyncIterable[ParsedRecord]]
+) -> ImportReport:
+    """Feed parser output (sync or async) through ``importer`` and finish it."""
+
+    async def feed(line_no: int, record: Union[Dict[str, Any], ValueError]) -> None:
+        if isinstance(record, ValueError):
+            importer.reject(line_no, str(record))
+        else:
+            await importer.add(line_no, record)
+
+    if hasattr(records, "__aiter__"):
+        async for line_no, record in records:
+            await feed(line_no, record)
+    else:
+        for line_no, record in records:
+            await feed(line_no, record)
+    return await importer.finish()
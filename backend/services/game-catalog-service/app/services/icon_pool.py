@@ -0,0 +1,73 @@
+"""Pool of distinct game icon URLs for avatar pickers and new accounts.
+
+``/game-icons`` used to run ``SELECT DISTINCT ... ORDER BY RANDOM()`` over the
+whole ``games`` table (twice when icons ran short), and user registration hits
+it for every new account. The distinct icon and capsule URLs are instead read
+once into lists and sampled in memory, so a request costs O(limit). The pool
+is reloaded after catalog writes in this worker and every
+``ICON_POOL_REFRESH_SECONDS`` to pick up writes made elsewhere.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models import Game
+
+
+class IconPool:
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self._icons: List[str] = []
+        # Capsule images that are not also icons, used when icons run short
+        self._capsules: List[str] = []
+        self._refreshed_at = 0.0
+        self._dirty = True
+        self._lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self._icons) + len(self._capsules)
+
+    def mark_dirty(self) -> None:
+        self._dirty = True
+
+    def _stale(self) -> bool:
+        return self._dirty or time.monotonic() - self._refreshed_at >= self.refresh_interval
+
+    async def ensure_fresh(self, session: AsyncSession) -> None:
+        if not self._stale():
+            return
+        async with self._lock:
+            if not self._stale():
+                return
+            self._dirty = False
+            self._refreshed_at = time.monotonic()
+            icons = await session.execute(
+                select(Game.icon_url).distinct().where(Game.icon_url.is_not(None), Game.icon_url != "")
+            )
+            capsules = await session.execute(
+                select(Game.capsule_image_url)
+                .distinct()
+                .where(Game.capsule_image_url.is_not(None), Game.capsule_image_url != "")
+            )
+            self._icons = list(icons.scalars())
+            known = set(self._icons)
+            self._capsules = [url for url in capsules.scalars() if url not in known]
+
+    async def sample(self, session: AsyncSession, limit: int) -> List[str]:
+        """Up to ``limit`` distinct random URLs: icons first, then capsule images."""
+        await self.ensure_fresh(session)
+        icons, capsules = self._icons, self._capsules
+        picked = random.sample(icons, min(limit, len(icons)))
+        if len(picked) < limit:
+            picked.extend(random.sample(capsules, min(limit - len(picked), len(capsules))))
+        return picked
+
+
+icon_pool = IconPool(settings.ICON_POOL_REFRESH_SECONDS)
@@ -0,0 +1,198 @@
+"""Precomputed storefront shelves (featured, new releases, on sale).
+
+Each shelf is built once at ``SHELF_CACHE_SIZE`` games, encoded to one
+``GameResponse`` JSON fragment per game, and kept in process memory and in
+Redis so every worker shares one build. Requests join a slice of the cached
+fragments, so a store page view costs no database or serialization work.
+
+Writes bump a generation counter (in Redis when configured, else locally).
+Readers that see an older generation keep serving their copy while one
+background task per shelf rebuilds it; only a cold worker with nothing cached
+builds inline. Without a shared generation a worker cannot see other workers'
+writes, so it also rebuilds any shelf older than ``max_age``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
+from app.repository.game_repository import GameRepository
+from app.repository.snapshot import catalog_snapshot
+from app.utils.serialization import game_fragments
+
+logger = logging.getLogger(__name__)
+
+SHELVES = ("featured", "new_releases", "on_sale")
+_GENERATION_KEY = "catalog:shelves:generation"
+
+# After a Redis failure, stay in-process for this long before trying again
+_REDIS_RETRY_SECONDS = 30.0
+
+
+@dataclass(slots=True)
+class _Entry:
+    items: List[bytes]
+    generation: int
+    checked_at: float
+    built_at: float
+
+
+class ShelfCache:
+    def __init__(self, redis_url: str, size: int, local_ttl: float, redis_ttl: int, max_age: float) -> None:
+        self.size = size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self.max_age = max_age
+        self._redis = (
+            aioredis.from_url(
+                redis_url, decode_responses=True, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+            if redis_url
+            else None
+        )
+        self._redis_down_until = 0.0
+        self._generation = 0
+        # Newest generation the catalog snapshot has been refreshed for
+        self._snapshot_generation = 0
+        self._local: Dict[str, _Entry] = {}
+        self._locks = {shelf: asyncio.Lock() for shelf in SHELVES}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.stats = {"local_hits": 0, "redis_hits": 0, "stale_served": 0, "rebuilds": 0}
+
+    # ------------------------------------------------------------------ reads
+    async def get(self, shelf: str, limit: int, session: AsyncSession) -> List[bytes]:
+        """Encoded ``GameResponse`` fragments for the first ``limit`` games of ``shelf``."""
+        if limit > self.size:
+            games = await getattr(GameRepository(session), shelf)(limit)
+            return [game_fragments.encode(game) for game in games]
+        entry = self._local.get(shelf)
+        now = time.monotonic()
+        if entry and entry.generation >= self._generation and now - entry.checked_at < self.local_ttl:
+            self.stats["local_hits"] += 1
+            return entry.items[:limit]
+
+        generation, shared = await self._read_shared(shelf)
+        # No shared generation: only age can tell that another worker wrote since
+        expired = generation is None and entry is not None and now - entry.built_at >= self.max_age
+        if generation is None:
+            generation = self._generation
+        # >=: a worker that bumped its generation while Redis was down may be ahead
+        if shared is not None and shared[0] >= generation:
+            self._generation = shared[0]
+            self._local[shelf] = entry = _Entry(shared[1], shared[0], now, now)
+            self.stats["redis_hits"] += 1
+            return entry.items[:limit]
+        if entry and entry.generation >= generation and not expired:
+            entry.checked_at = now
+            self.stats["local_hits"] += 1
+            return entry.items[:limit]
+        if entry:
+            self.stats["stale_served"] += 1
+            if expired and shelf not in self._tasks:
+                # The snapshot may not have seen those writes yet either
+                catalog_snapshot.mark_dirty()
+            self._schedule(shelf)
+            return entry.items[:limit]
+
+        async with self._locks[shelf]:
+            entry = self._local.get(shelf)
+            if entry is None:
+                entry = await self._rebuild(shelf, session)
+        return entry.items[:limit]
+
+    def _redis_available(self) -> bool:
+        return self._redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, exc: Exception) -> None:
+        logger.warning("Shelf cache Redis unavailable, using in-process cache: %s", exc)
+        self._redis_down_until = time.monotonic() + _REDIS_RETRY_SECONDS
+
+    async def _read_shared(self, shelf: str) -> Tuple[Optional[int], Optional[Tuple[int, List[bytes]]]]:
+        """``(shared generation, (generation, items) stored in Redis)``; ``(None, None)`` without Redis."""
+        if not self._redis_available():
+            return None, None
+        try:
+            raw_generation, raw_shelf = await self._redis.mget(_GENERATION_KEY, f"catalog:shelf:{shelf}")
+        except RedisError as exc:
+            self._redis_failed(exc)
+            return None, None
+        self._generation = max(self._generation, int(raw_generation or 0))
+        if raw_shelf is None:
+            return self._generation, None
+        payload = json.loads(raw_shelf)
+        return self._generation, (payload["generation"], [item.encode() for item in payload["items"]])
+
+    # ---------------------------------------------------------------- rebuilds
+    async def _rebuild(self, shelf: str, session: AsyncSession) -> _Entry:
+        # Tag with the generation seen before reading: a write landing mid-build
+        # leaves this entry stale, so the next read rebuilds again.
+        generation = self._generation
+        # The shelves read through the snapshot, which may predate the write behind
+        # this generation by up to its refresh interval; refresh it once per
+        # generation so pre-write games are not stored as current for redis_ttl.
+        if generation > self._snapshot_generation:
+            self._snapshot_generation = generation
+            catalog_snapshot.mark_dirty()
+        repository = GameRepository(session)
+        games = await getattr(repository, shelf)(self.size)
+        now = time.monotonic()
+        entry = _Entry([game_fragments.encode(game) for game in games], generation, now, now)
+        self._local[shelf] = entry
+        self.stats["rebuilds"] += 1
+        if self._redis_available():
+            try:
+                await self._redis.set(
+                    f"catalog:shelf:{shelf}",
+                    json.dumps(
+                        {"generation": generation, "items": [item.decode() for item in entry.items]}
+                    ),
+                    ex=self.redis_ttl,
+                )
+            except RedisError as exc:
+                self._redis_failed(exc)
+        return entry
+
+    async def _rebuild_detached(self, shelf: str) -> None:
+        try:
+            async with self._locks[shelf]:
+                async with AsyncSessionLocal() as session:
+                    await self._rebuild(shelf, session)
+        except Exception:  # pragma: no cover - keep serving the stale shelf
+            logger.exception("Background rebuild of shelf %s failed", shelf)
+        finally:
+            self._tasks.pop(shelf, None)
+
+    def _schedule(self, shelf: str) -> None:
+        if shelf not in self._tasks:
+            self._tasks[shelf] = asyncio.create_task(self._rebuild_detached(shelf))
+
+    async def invalidate(self) -> None:
+        """Mark every shelf stale after a catalog write and rebuild held ones in the background."""
+        self._generation += 1
+        if self._redis_available():
+            try:
+                self._generation = max(self._generation, await self._redis.incr(_GENERATION_KEY))
+            except RedisError as exc:
+                self._redis_failed(exc)
+        # A shelf this process never served is built on first read instead
+        for shelf in list(self._local):
+            self._schedule(shelf)
+
+
+shelf_cache = ShelfCache(
+    settings.GAME_CATALOG_REDIS_URL,
+    settings.SHELF_CACHE_SIZE,
+    settings.SHELF_LOCAL_TTL_SECONDS,
+    settings.SHELF_REDIS_TTL_SECONDS,
+    settings.SHELF_LOCAL_MAX_AGE_SECONDS,
+)
@@ -13,3 +13,9 @@ class NotFoundError(ServiceError):
     """Raised when a resource cannot be located."""
 
 
+class InvalidCursorError(ServiceError):
+    """Raised when a pagination cursor is malformed or belongs to another sort."""
+
+
+class ImportAbortedError(ServiceError):
+    """Raised when a bulk import hits more invalid records than it allows."""
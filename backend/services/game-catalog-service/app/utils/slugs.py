@@ -0,0 +1,16 @@
+"""URL slugs for games."""
+from __future__ import annotations
+
+import re
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+def slugify(text: str | None) -> str:
+    """``"The Witcher 3: Wild Hunt"`` -> ``"the-witcher-3-wild-hunt"``.
+
+    Must stay in step with the SQL backfill in migration
+    ``0003_games_slug`` (lower, non-alphanumeric runs -> ``-``, trim ``-``).
+    Also normalizes legacy client slugs such as ``"the-witcher-3:-wild-hunt"``.
+    """
+    return _NON_ALNUM.sub("-", (text or "").lower()).strip("-")
@@ -0,0 +1,136 @@
+"""Bulk import throughput vs one ``CatalogService.create_game`` call per game.
+
+Run from the service directory against a scratch database:
+
+    GAME_CATALOG_DATABASE_URL=postgresql://... \\
+        python benchmarks/bench_import.py [--games 20000] [--baseline 500] [--batch-size 500]
+
+Synthetic storefront records (three genres, five tags, one to three platforms
+each) are imported three ways:
+
+* ``create_game``: the per-game service path ``seed.py`` and ``POST /games``
+  use, timed on the first ``--baseline`` records only;
+* ``bulk insert``: ``CatalogService.import_games`` into an empty id range;
+* ``bulk upsert``: the same records again, so every row hits ``ON CONFLICT``.
+
+Rows use steam_app_ids from ``STEAM_ID_BASE`` up and are deleted afterwards.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import delete, select  # noqa: E402
+
+from app.db.init_db import init_db  # noqa: E402
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.models import Game, Genre, Platform, Tag  # noqa: E402
+from app.models.game import game_genres, game_platforms, game_tags  # noqa: E402
+from app.schemas import GameCreate  # noqa: E402
+from app.services import CatalogService  # noqa: E402
+from app.services.game_import import parse_ndjson  # noqa: E402
+
+STEAM_ID_BASE = 900_000_000
+GENRES = [f"Bench Genre {i}" for i in range(20)]
+TAGS = [f"Bench Tag {i}" for i in range(200)]
+PLATFORMS = ["windows", "mac", "linux"]
+
+
+def _record(index: int, rng: random.Random) -> dict:
+    price = rng.choice([0.0, 4.99, 9.99, 19.99, 39.99, 59.99])
+    return {
+        "steam_app_id": STEAM_ID_BASE + index,
+        "title": f"Import Benchmark {index}",
+        "description": "A benchmark game. " * 20,
+        "developer": f"Studio {index % 97}",
+        "publisher": f"Publisher {index % 23}",
+        "price": price,
+        "original_price": round(price * 1.5, 2) if index % 5 == 0 else None,
+        "release_date": f"20{10 + index % 14}-0{1 + index % 9}-1{index % 10}T00:00:00+00:00",
+        "multiplayer": index % 2 == 0,
+        "header_image_url": f"https://cdn.example.com/{index}/header.jpg",
+        "screenshots": [f"https://cdn.example.com/{index}/{i}.jpg" for i in range(5)],
+        "total_reviews": rng.randint(0, 50_000),
+        "average_rating": round(rng.uniform(1, 5), 2),
+        "genres": rng.sample(GENRES, 3),
+        "tags": rng.sample(TAGS, 5),
+        "platforms": rng.sample(PLATFORMS, rng.randint(1, 3)),
+    }
+
+
+async def _cleanup() -> None:
+    async with AsyncSessionLocal() as session:
+        ids = select(Game.id).where(Game.steam_app_id >= STEAM_ID_BASE).scalar_subquery()
+        for table in (game_genres, game_tags, game_platforms):
+            await session.execute(delete(table).where(table.c.game_id.in_(ids)))
+        await session.execute(delete(Game).where(Game.steam_app_id >= STEAM_ID_BASE))
+        await session.commit()
+
+
+async def _bulk(lines, batch_size: int) -> float:
+    async with AsyncSessionLocal() as session:
+        report = await CatalogService(session).import_games(parse_ndjson(lines), batch_size=batch_size)
+    assert report.failed == 0, report.errors[:5]
+    return report.received / report.elapsed
+
+
+async def _per_game(records) -> float:
+    async with AsyncSessionLocal() as session:
+        names = {}
+        for model in (Genre, Tag, Platform):
+            rows = await session.execute(select(model.id, model.name))
+            names.update({(model, name): id_ for id_, name in rows})
+    started = time.perf_counter()
+    for record in records:
+        payload = GameCreate(
+            **{key: value for key, value in record.items() if key not in {"genres", "tags", "platforms"}},
+            genre_ids=[names[(Genre, name)] for name in record["genres"]],
+            tag_ids=[names[(Tag, name)] for name in record["tags"]],
+            platform_ids=[names[(Platform, name)] for name in record["platforms"]],
+        )
+        # A fresh session per game, as each POST /games request gets
+        async with AsyncSessionLocal() as session:
+            await CatalogService(session).create_game(payload)
+    return len(records) / (time.perf_counter() - started)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=20_000)
+    parser.add_argument("--baseline", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    await init_db()
+    await _cleanup()
+    rng = random.Random(7)
+    records = [_record(index, rng) for index in range(args.games)]
+    lines = [json.dumps(record) for record in records]
+    try:
+        results = {
+            "bulk insert": await _bulk(lines, args.batch_size),
+            "bulk upsert": await _bulk(lines, args.batch_size),
+        }
+        baseline = [
+            dict(record, steam_app_id=record["steam_app_id"] + args.games)
+            for record in records[: args.baseline]
+        ]
+        results = {"create_game": await _per_game(baseline), **results}
+    finally:
+        await _cleanup()
+
+    print(f"{args.games} records, batch size {args.batch_size}, records per second\n")
+    reference = results["create_game"]
+    for name, rate in results.items():
+        print(f"{name:<14}{rate:>10.0f}/s{rate / reference:>8.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+"""GameResponse encoding: Pydantic path vs orjson fragments, per list page.
+
+Run from the service directory (no database needed):
+
+    python benchmarks/bench_serialization.py [--games 100] [--iterations 200]
+
+Builds transient ``Game`` rows shaped like the catalog's (requirements,
+screenshots, several genres/tags/platforms) and times encoding a page of them
+to response bytes three ways:
+
+* ``pydantic``: ``from_orm_with_relations`` + ``model_dump`` + FastAPI's
+  ``jsonable_encoder`` and ``json.dumps``, as the endpoints did before;
+* ``fragments cold``: ``game_payload`` + orjson with an empty fragment cache;
+* ``fragments warm``: the same page again, served from the fragment cache.
+
+Before timing it asserts that both paths produce the same JSON document.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.models import Game, Genre, Platform, Tag  # noqa: E402
+from app.schemas import GameResponse, GenreResponse, PlatformResponse, TagResponse  # noqa: E402
+from app.utils.serialization import FragmentCache, json_array  # noqa: E402
+
+_CREATED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+_GENRES = [Genre(id=i, name=f"Genre {i}", created_at=_CREATED) for i in range(12)]
+_TAGS = [Tag(id=i, name=f"Tag {i}", category="gameplay", created_at=_CREATED) for i in range(40)]
+_PLATFORMS = [
+    Platform(id=i, name=name, display_name=name.title(), icon_url=f"https://cdn.example.com/{name}.svg", created_at=_CREATED)
+    for i, name in enumerate(["windows", "mac", "linux"])
+]
+
+
+def _requirements(tier: int) -> dict:
+    return {
+        "minimum": {"os": "Windows 10", "memory": f"{4 * (tier + 1)} GB RAM", "storage": f"{20 + tier * 15} GB"},
+        "recommended": {"os": "Windows 11", "memory": f"{8 * (tier + 1)} GB RAM", "storage": f"{20 + tier * 15} GB SSD"},
+    }
+
+
+def game(game_id: int) -> Game:
+    base = f"https://cdn.example.com/games/{game_id}"
+    return Game(
+        id=game_id,
+        uuid=uuid.UUID(int=game_id),
+        steam_app_id=100000 + game_id,
+        title=f"Game Title {game_id}",
+        description=f"Game {game_id} is a sprawling adventure. " * 12,
+        short_description=f"A game about exploring world {game_id}.",
+        developer=f"Studio {game_id % 37}",
+        publisher=f"Publisher {game_id % 11}",
+        price=round(9.99 + (game_id % 7) * 5, 2),
+        original_price=59.99,
+        discount_percent=25.0,
+        currency="USD",
+        game_type="game",
+        status="active",
+        age_rating="teen",
+        release_date=datetime(2015, 1, 1, tzinfo=timezone.utc) + timedelta(days=game_id * 17),
+        early_access=False,
+        single_player=True,
+        multiplayer=game_id % 2 == 0,
+        co_op=game_id % 3 == 0,
+        local_co_op=False,
+        cross_platform=True,
+        vr_support=False,
+        header_image_url=f"{base}/header.jpg",
+        background_image_url=f"{base}/background.jpg",
+        capsule_image_url=f"{base}/capsule.jpg",
+        icon_url=f"{base}/icon.png",
+        screenshots=[f"{base}/screenshot_{i}.jpg" for i in range(6)],
+        movies=[f"{base}/trailer.mp4"],
+        pc_requirements=_requirements(game_id % 3),
+        mac_requirements=_requirements(1) if game_id % 2 else None,
+        linux_requirements=None,
+        total_reviews=1000 + game_id,
+        positive_reviews=900,
+        negative_reviews=100 + game_id,
+        average_rating=4.2,
+        playtime_forever=0,
+        playtime_2weeks=0,
+        created_at=_CREATED,
+        updated_at=_CREATED + timedelta(hours=game_id),
+        metadata_json={"source": "benchmark"},
+        genres=_GENRES[game_id % 12 : game_id % 12 + 3],
+        tags=_TAGS[game_id % 40 : game_id % 40 + 6],
+        platforms=_PLATFORMS[: 1 + game_id % 3],
+    )
+
+
+def pydantic_page(games) -> bytes:
+    responses = [
+        GameResponse.from_orm_with_relations(
+            g,
+            genres=[GenreResponse.model_validate(x) for x in (g.genres or [])],
+            tags=[TagResponse.model_validate(x) for x in (g.tags or [])],
+            platforms=[PlatformResponse.model_validate(x) for x in (g.platforms or [])],
+        )
+        for g in games
+    ]
+    content = jsonable_encoder([r.model_dump() for r in responses])
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def fragments_page(games, cache: FragmentCache) -> bytes:
+    return json_array(cache.encode(g) for g in games)
+
+
+def _time(fn, iterations: int) -> float:
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - started) / iterations * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    games = [game(i) for i in range(1, args.games + 1)]
+    assert json.loads(pydantic_page(games)) == json.loads(fragments_page(games, FragmentCache(0))), (
+        "fast path output differs from GameResponse"
+    )
+
+    warm = FragmentCache(args.games)
+    fragments_page(games, warm)
+    results = {
+        "pydantic": _time(lambda: pydantic_page(games), args.iterations),
+        "fragments cold": _time(lambda: fragments_page(games, FragmentCache(0)), args.iterations),
+        "fragments warm": _time(lambda: fragments_page(games, warm), args.iterations),
+    }
+    size = len(fragments_page(games, warm))
+    print(f"{args.games} games per page, {size / 1024:.0f} KiB body, CPU ms per page\n")
+    baseline = results["pydantic"]
+    for name, ms in results.items():
+        print(f"{name:<16}{ms:>9.3f} ms{baseline / ms:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Columnar snapshot vs SQL for the storefront shelves and simple search filters.
+
+Run from the service directory against a scratch database:
+
+    GAME_CATALOG_DATABASE_URL=postgresql://... \\
+        python benchmarks/bench_snapshot.py [--games 50000] [--iterations 50]
+
+Synthetic games are inserted until the table holds ``--games`` rows, so do not
+point this at a database you care about. Each workload goes through
+``GameRepository`` twice, once with the snapshot disabled (plain SQL) and once
+enabled, and reports the median wall-clock latency per call. Both paths
+include fetching the resulting rows by primary key, so the numbers compare what
+an endpoint would actually pay.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, insert, select  # noqa: E402
+
+from app.db.init_db import init_db  # noqa: E402
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.models import Game  # noqa: E402
+from app.repository.game_repository import GameRepository  # noqa: E402
+from app.repository.snapshot import catalog_snapshot  # noqa: E402
+from app.schemas import GameSearchFilters  # noqa: E402
+
+WORKLOADS = {
+    "featured": lambda repo: repo.featured(20),
+    "new_releases": lambda repo: repo.new_releases(20),
+    "on_sale": lambda repo: repo.on_sale(20),
+    "search popular p1": lambda repo: repo.search(GameSearchFilters(), 1, 20),
+    "search popular p50": lambda repo: repo.search(GameSearchFilters(), 50, 20),
+    "search price+co_op": lambda repo: repo.search(
+        GameSearchFilters(min_price=5, max_price=30, co_op=True, sort_by="price", sort_order="asc"), 1, 20
+    ),
+    "search rating>=4 vr": lambda repo: repo.search(
+        GameSearchFilters(min_rating=4.0, vr_support=True, sort_by="rating"), 1, 20
+    ),
+}
+
+
+def _synthetic(index: int, rng: random.Random) -> dict:
+    price = rng.choice([0.0, 4.99, 9.99, 14.99, 19.99, 29.99, 39.99, 59.99])
+    discount = rng.choice([0.0] * 6 + [10.0, 25.0, 50.0, 75.0])
+    return {
+        "title": f"Benchmark Game {index}",
+        "developer": f"Studio {index % 97}",
+        "publisher": f"Publisher {index % 23}",
+        "price": price,
+        "original_price": round(price / (1 - discount / 100), 2) if discount else None,
+        "discount_percent": discount,
+        "status": rng.choice(["active"] * 8 + ["inactive", "coming_soon"]),
+        "average_rating": None if rng.random() < 0.1 else round(rng.uniform(1.0, 5.0), 1),
+        "total_reviews": int(rng.paretovariate(1.2) * 20),
+        "release_date": None
+        if rng.random() < 0.05
+        else datetime(2010, 1, 1, tzinfo=timezone.utc) + timedelta(days=rng.randint(0, 5400)),
+        "single_player": rng.random() < 0.8,
+        "multiplayer": rng.random() < 0.4,
+        "co_op": rng.random() < 0.25,
+        "vr_support": rng.random() < 0.05,
+    }
+
+
+async def _seed(target: int) -> int:
+    rng = random.Random(7)
+    async with AsyncSessionLocal() as session:
+        existing = (await session.execute(select(func.count(Game.id)))).scalar_one()
+        for start in range(existing, target, 5000):
+            rows = [_synthetic(index, rng) for index in range(start, min(start + 5000, target))]
+            await session.execute(insert(Game), rows)
+            await session.commit()
+        return max(existing, target)
+
+
+async def _time(workload, enabled: bool, iterations: int) -> float:
+    catalog_snapshot.enabled = enabled
+    samples = []
+    async with AsyncSessionLocal() as session:
+        repo = GameRepository(session)
+        await workload(repo)  # warm-up (loads the snapshot on the first enabled run)
+        for _ in range(iterations):
+            started = time.perf_counter()
+            await workload(repo)
+            samples.append(time.perf_counter() - started)
+            session.expunge_all()
+    return statistics.median(samples) * 1000
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=50_000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    if not catalog_snapshot.enabled:
+        sys.exit("Snapshot unavailable: install numpy and set CATALOG_SNAPSHOT_ENABLED=true")
+    await init_db()
+    total = await _seed(args.games)
+    # Refresh only when forced, so timings measure reads rather than refreshes
+    catalog_snapshot.refresh_interval = float("inf")
+
+    started = time.perf_counter()
+    async with AsyncSessionLocal() as session:
+        await catalog_snapshot.ensure_fresh(session)
+    print(f"{total} games; snapshot load {(time.perf_counter() - started) * 1000:.0f} ms\n")
+
+    print(f"{'workload':<22}{'sql ms':>10}{'snapshot ms':>14}{'speedup':>10}")
+    for name, workload in WORKLOADS.items():
+        sql_ms = await _time(workload, False, args.iterations)
+        snapshot_ms = await _time(workload, True, args.iterations)
+        print(f"{name:<22}{sql_ms:>10.2f}{snapshot_ms:>14.2f}{sql_ms / snapshot_ms:>9.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
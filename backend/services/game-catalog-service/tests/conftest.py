@@ -0,0 +1,143 @@
+"""SQLite-backed fixtures for the catalog tests.
+
+The models fall back to JSON columns off Postgres, so ``create_all`` builds the
+schema on SQLite and the repository takes its portable paths (in-process text
+index, EXISTS relation filters, exact counts). Postgres-only behavior lives in
+``test_postgres.py`` and runs when ``CATALOG_TEST_POSTGRES_URL`` is set.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="catalog-tests-")
+# Read by app.core.config at import, so set before any app module loads
+os.environ["GAME_CATALOG_DATABASE_URL"] = f"sqlite:///{os.path.join(_DB_DIR, 'catalog.db')}"
+os.environ["GAME_CATALOG_REDIS_URL"] = ""
+
+from app.core.config import settings  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+from app.models import Game, Genre, Platform, Tag  # noqa: E402
+from app.repository.facet_index import game_facet_index  # noqa: E402
+from app.repository.relation_vocabulary import relation_vocabulary  # noqa: E402
+from app.repository.search_index import game_search_index  # noqa: E402
+from app.repository.slug_cache import hot_slugs  # noqa: E402
+from app.repository.snapshot import catalog_snapshot  # noqa: E402
+from app.services.icon_pool import icon_pool  # noqa: E402
+from app.services.shelf_cache import shelf_cache  # noqa: E402
+from app.utils.serialization import game_fragments  # noqa: E402
+
+
+def _reset_process_state() -> None:
+    """Fresh per-worker caches and indexes, as in a newly started worker."""
+    catalog_snapshot.__init__(settings.CATALOG_SNAPSHOT_ENABLED, settings.CATALOG_SNAPSHOT_REFRESH_SECONDS)
+    game_facet_index.__init__(settings.CATALOG_FACET_REFRESH_SECONDS)
+    game_search_index.__init__()
+    relation_vocabulary.__init__()
+    hot_slugs.__init__(settings.SLUG_CACHE_SIZE)
+    icon_pool.__init__(settings.ICON_POOL_REFRESH_SECONDS)
+    shelf_cache.__init__(
+        "",
+        settings.SHELF_CACHE_SIZE,
+        settings.SHELF_LOCAL_TTL_SECONDS,
+        settings.SHELF_REDIS_TTL_SECONDS,
+        settings.SHELF_LOCAL_MAX_AGE_SECONDS,
+    )
+    game_fragments.__init__(settings.GAME_FRAGMENT_CACHE_SIZE)
+
+
+async def _recreate_schema() -> None:
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+    await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def fresh_catalog():
+    _reset_process_state()
+    asyncio.run(_recreate_schema())
+    yield
+
+
+@pytest.fixture
+def run():
+    """Run coroutines on one event loop for the whole test, as in a worker process."""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+
+    async def shutdown():
+        # Background rebuilds hold pooled connections; let them finish before disposing
+        pending = asyncio.all_tasks() - {asyncio.current_task()}
+        await asyncio.gather(*pending, return_exceptions=True)
+        await engine.dispose()
+
+    loop.run_until_complete(shutdown())
+    loop.close()
+
+
+_GAME_DEFAULTS = dict(
+    developer="Studio",
+    publisher="Publisher",
+    price=19.99,
+    status="active",
+    game_type="game",
+)
+
+
+@pytest.fixture
+def add_games(run):
+    """Insert games from ``(title, column overrides)`` specs; returns their ids in order.
+
+    ``genres``/``tags``/``platforms`` name vocabulary rows, created on first use.
+    """
+
+    async def _add(specs):
+        async with AsyncSessionLocal() as session:
+            vocab = {}
+
+            def related(model, names):
+                items = []
+                for name in names:
+                    key = (model, name)
+                    if key not in vocab:
+                        extra = {"display_name": name} if model is Platform else {}
+                        vocab[key] = model(name=name, **extra)
+                    items.append(vocab[key])
+                return items
+
+            games = []
+            for title, overrides in specs:
+                overrides = dict(overrides)
+                relations = {
+                    "genres": related(Genre, overrides.pop("genres", ())),
+                    "tags": related(Tag, overrides.pop("tags", ())),
+                    "platforms": related(Platform, overrides.pop("platforms", ())),
+                }
+                games.append(Game(title=title, **{**_GAME_DEFAULTS, **overrides}, **relations))
+            session.add_all(games)
+            await session.commit()
+            return [game.id for game in games]
+
+    return lambda *specs: run(_add(specs))
+
+
+@pytest.fixture
+def client(run):
+    """``client(method, url, **kwargs)`` against the app."""
+    import httpx
+
+    from app.main import app
+
+    async def _request(method, url, **kwargs):
+        async with httpx.AsyncClient(app=app, base_url="http://catalog") as http:
+            response = await http.request(method, url, **kwargs)
+        # Let shelf rebuilds scheduled by a write land, so each call sees a settled catalog
+        await asyncio.gather(*shelf_cache._tasks.values())
+        return response
+
+    return lambda method, url, **kwargs: run(_request(method, url, **kwargs))
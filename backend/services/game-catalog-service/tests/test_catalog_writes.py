@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models import Game, GameSlugRedirect
+from app.repository.relation_vocabulary import relation_vocabulary
+from app.repository.slug_cache import hot_slugs
+from app.services.catalog_service import CatalogService
+from app.services.game_import import parse_csv, parse_ndjson
+from app.utils.exceptions import ImportAbortedError
+
+CATALOG = "/api/v1/catalog"
+
+
+# ------------------------------------------------------------------- slugs
+def test_slugs_are_unique_per_title(add_games, client):
+    add_games(("Doom", {}), ("DOOM", {}), ("Doom!", {}))
+    slugs = [game["slug"] for game in client("GET", f"{CATALOG}/games-simple").json()["games"]]
+    assert slugs == ["doom", "doom-2", "doom-3"]
+
+
+def test_renamed_games_keep_their_old_links(add_games, client):
+    ids = add_games(("Old Name", {}))
+    client("PUT", f"{CATALOG}/games/{ids[0]}", json={"title": "New Name"})
+    for slug in ("new-name", "old-name"):
+        response = client("GET", f"{CATALOG}/games/by-slug/{slug}")
+        assert response.status_code == 200
+        assert response.json()["slug"] == "new-name"
+
+    # Renamed back: the former slug is canonical again and the other becomes a redirect
+    client("PUT", f"{CATALOG}/games/{ids[0]}", json={"title": "Old Name"})
+    assert client("GET", f"{CATALOG}/games/by-slug/new-name").json()["slug"] == "old-name"
+
+
+def test_redirected_slugs_are_not_reused(add_games, client):
+    ids = add_games(("Shared", {}))
+    client("PUT", f"{CATALOG}/games/{ids[0]}", json={"title": "Renamed"})
+    created = client("POST", f"{CATALOG}/games", json={"title": "Shared", "developer": "d", "publisher": "p", "price": 1})
+    assert created.json()["slug"] == "shared-2"
+    assert client("GET", f"{CATALOG}/games/by-slug/shared").json()["id"] == ids[0]
+
+
+def test_legacy_slugs_and_hot_slug_cache(add_games, client):
+    add_games(("The Witcher 3: Wild Hunt", {}))
+    assert client("GET", f"{CATALOG}/games/by-slug/the-witcher-3:-wild-hunt").json()["slug"] == "the-witcher-3-wild-hunt"
+    client("GET", f"{CATALOG}/games/by-slug/the-witcher-3-wild-hunt")
+    assert hot_slugs.stats["hits"] == 1
+    assert client("GET", f"{CATALOG}/games/by-slug/missing").status_code == 404
+
+
+def test_deleted_games_leave_no_cached_slug(add_games, client):
+    ids = add_games(("Gone", {}))
+    assert client("GET", f"{CATALOG}/games/by-slug/gone").status_code == 200
+    client("DELETE", f"{CATALOG}/games/{ids[0]}")
+    assert client("GET", f"{CATALOG}/games/by-slug/gone").status_code == 404
+
+
+# ------------------------------------------------------------------ import
+def _ndjson(*records):
+    return "\n".join(record if isinstance(record, str) else json.dumps(record) for record in records)
+
+
+def test_import_inserts_then_updates_only_given_fields(client):
+    first = client(
+        "POST",
+        f"{CATALOG}/games/import",
+        content=_ndjson(
+            {"steam_app_id": 1, "title": "Portal", "developer": "Valve", "publisher": "Valve", "price": 9.99, "genres": ["Puzzle"]},
+            {"steam_app_id": 2, "title": "Portal", "developer": "Valve", "publisher": "Valve", "price": 19.99},
+            "not json",
+            {"title": "No id"},
+        ),
+    ).json()
+    assert (first["received"], first["inserted"], first["updated"], first["failed"]) == (4, 2, 0, 2)
+    assert [error["line"] for error in first["errors"]] == [3, 4]
+
+    second = client(
+        "POST",
+        f"{CATALOG}/games/import",
+        content=_ndjson(
+            {"steam_app_id": 1, "title": "Portal", "developer": "Valve", "publisher": "Valve", "price": 4.99},
+            {"steam_app_id": 2, "title": "Portal 2", "developer": "Valve", "publisher": "Valve", "price": 19.99, "genres": ["Co-op"]},
+        ),
+    ).json()
+    assert (second["inserted"], second["updated"]) == (0, 2)
+
+    games = {game["steam_app_id"]: game for game in client("GET", f"{CATALOG}/games", params={"sort_by": "title"}).json()["games"]}
+    assert games[1]["price"] == 4.99
+    # Relations are only replaced when the record lists them
+    assert [genre["name"] for genre in games[1]["genres"]] == ["Puzzle"]
+    assert [genre["name"] for genre in games[2]["genres"]] == ["Co-op"]
+    # Imports never re-slug an existing game
+    assert (games[1]["slug"], games[2]["slug"]) == ("portal", "portal-2")
+    assert games[2]["title"] == "Portal 2"
+
+
+def test_imported_games_are_searchable_at_once(client):
+    assert client("GET", f"{CATALOG}/games", params={"query": "anything"}).json()["total"] == 0
+    client(
+        "POST",
+        f"{CATALOG}/games/import",
+        params={"batch_size": 1},
+        content=_ndjson(
+            {"steam_app_id": 7, "title": "Outer Wilds", "developer": "Mobius", "publisher": "Annapurna", "price": 24.99},
+        ),
+    )
+    assert [game["title"] for game in client("GET", f"{CATALOG}/games", params={"query": "outer"}).json()["games"]] == [
+        "Outer Wilds"
+    ]
+
+
+def test_import_aborts_after_max_errors(run):
+    async def scenario():
+        async with AsyncSessionLocal() as session:
+            records = parse_ndjson(["{}", "[]", json.dumps({"steam_app_id": 3, "title": "Late", "developer": "d", "publisher": "p"})])
+            with pytest.raises(ImportAbortedError):
+                await CatalogService(session).import_games(records, max_errors=1)
+            return (await session.execute(select(Game.id))).all()
+
+    assert run(scenario()) == []
+
+
+def test_parse_csv_lists_and_json_cells():
+    rows = list(
+        parse_csv(
+            [
+                "steam_app_id,title,genres,pc_requirements,price\n",
+                '5,Hades,Action|Roguelike ,"{""minimum"": {""os"": ""10""}}",\n',
+                '6,Bad,,{oops,1\n',
+            ]
+        )
+    )
+    assert rows[0] == (
+        2,
+        {"steam_app_id": "5", "title": "Hades", "genres": ["Action", "Roguelike"], "pc_requirements": {"minimum": {"os": "10"}}},
+    )
+    line, error = rows[1]
+    assert line == 3 and isinstance(error, ValueError)
+
+
+# ---------------------------------------------------------------- relations
+def test_relation_vocabulary_hydrates_from_id_arrays(add_games, run):
+    ids = add_games(("Tagged", {"genres": ["RPG", "Action"], "tags": ["Co-op"]}))
+
+    async def hydrate():
+        async with AsyncSessionLocal() as session:
+            genres = {genre.name: genre.id for genre in await CatalogService(session).list_genres(0, 10)}
+            tags = {tag.name: tag.id for tag in await CatalogService(session).list_tags(0, 10)}
+        # What the Postgres triggers keep in the id arrays
+        async with AsyncSessionLocal() as session:
+            game = await session.get(Game, ids[0])
+            game.genre_ids = sorted(genres.values())
+            game.tag_ids = [tags["Co-op"]]
+            game.platform_ids = []
+            await relation_vocabulary.hydrate(session, [game])
+            first = sorted(genre.name for genre in game.genres), [tag.name for tag in game.tags], game.platforms
+            await relation_vocabulary.hydrate(session, [game])
+            return first
+
+    genres, tags, platforms = run(hydrate())
+    assert genres == ["Action", "RPG"] and tags == ["Co-op"] and platforms == []
+    # Vocabularies load once and are reused while every id is known
+    assert relation_vocabulary.stats["loads"] == 1
+
+
+def test_relation_vocabulary_reloads_for_unknown_ids(add_games, run):
+    add_games(("First", {"genres": ["RPG"]}))
+
+    async def hydrate(genre_ids):
+        async with AsyncSessionLocal() as session:
+            game = Game(id=99, genre_ids=genre_ids)
+            await relation_vocabulary.hydrate(session, [game])
+            return [genre.name for genre in game.genres]
+
+    assert run(hydrate([1])) == ["RPG"]
+    add_games(("Second", {"genres": ["Strategy"]}))
+    assert run(hydrate([1, 2])) == ["RPG", "Strategy"]
+    # An id that no longer exists costs one reload and is then skipped
+    assert run(hydrate([1, 404])) == ["RPG"]
+    assert relation_vocabulary.stats["loads"] == 3
+
+
+def test_slug_redirect_rows(add_games, run):
+    ids = add_games(("Alpha", {}))
+
+    async def rename(title):
+        async with AsyncSessionLocal() as session:
+            game = await session.get(Game, ids[0])
+            game.title = title
+            await session.commit()
+            return sorted((await session.execute(select(GameSlugRedirect.slug))).scalars())
+
+    assert run(rename("Beta")) == ["alpha"]
+    assert run(rename("Gamma")) == ["alpha", "beta"]
+    assert run(rename("Alpha")) == ["beta", "gamma"]
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, select, update
+
+from app.db.session import AsyncSessionLocal
+from app.models import Game
+from app.models.game import game_genres
+from app.repository.facet_index import game_facet_index
+from app.repository.game_repository import GameRepository, GenreRepository
+from app.repository.pagination import count_rows, decode_cursor, encode_cursor
+from app.schemas import GameSearchFilters
+from app.utils.exceptions import InvalidCursorError
+
+GAMES = "/api/v1/catalog/games"
+
+
+def _catalog(add_games):
+    return add_games(
+        ("The Witcher 3: Wild Hunt", {"price": 29.99, "average_rating": 4.9, "total_reviews": 900, "genres": ["RPG"]}),
+        ("Witcher Adventure Game", {"price": 9.99, "average_rating": 3.1, "total_reviews": 40, "genres": ["Board"]}),
+        ("Hollow Knight", {"price": 14.99, "average_rating": 4.8, "total_reviews": 700, "genres": ["Action"]}),
+        ("Celeste", {"price": 19.99, "average_rating": 4.8, "total_reviews": 700, "genres": ["Action"]}),
+        ("Stardew Valley", {"price": 14.99, "average_rating": None, "total_reviews": 0}),
+        (
+            "Hades",
+            {
+                "price": 24.99,
+                "average_rating": 4.7,
+                "total_reviews": 500,
+                "release_date": datetime(2020, 9, 17),
+                "genres": ["Action", "RPG"],
+            },
+        ),
+    )
+
+
+def _titles(response):
+    return [game["title"] for game in response.json()["games"]]
+
+
+def test_text_search_ranks_title_matches(add_games, client):
+    _catalog(add_games)
+    response = client("GET", GAMES, params={"query": "witcher"})
+    assert response.status_code == 200
+    assert sorted(_titles(response)) == ["The Witcher 3: Wild Hunt", "Witcher Adventure Game"]
+    assert response.json()["total"] == 2
+    # Prefix terms complete to indexed words
+    assert _titles(client("GET", GAMES, params={"query": "holl kni"})) == ["Hollow Knight"]
+
+
+def test_text_search_falls_back_to_fuzzy_titles(add_games, client):
+    _catalog(add_games)
+    assert _titles(client("GET", GAMES, params={"query": "stardwe valey"})) == ["Stardew Valley"]
+    empty = client("GET", GAMES, params={"query": "zzzz"}).json()
+    assert empty["games"] == [] and empty["total"] == 0
+
+
+def test_relation_and_column_filters(add_games, run):
+    _catalog(add_games)
+
+    async def search():
+        async with AsyncSessionLocal() as session:
+            action = await GenreRepository(session).get_by_name("Action")
+            filters = GameSearchFilters(genres=[action.id], max_price=20, sort_by="title", sort_order="asc")
+            page = await GameRepository(session).search(filters, 1, 10)
+            return [game.title for game in page.items], page.total
+
+    assert run(search()) == (["Celeste", "Hollow Knight"], 2)
+
+
+@pytest.mark.parametrize(
+    "sort_by,sort_order",
+    [
+        ("relevance", "desc"),
+        ("price", "asc"),
+        ("price", "desc"),
+        ("rating", "desc"),
+        ("release_date", "desc"),
+        ("title", "asc"),
+    ],
+)
+def test_cursor_pages_match_offset_pages(add_games, client, sort_by, sort_order):
+    _catalog(add_games)
+    params = {"sort_by": sort_by, "sort_order": sort_order, "per_page": 2}
+    offset_titles = _titles(client("GET", GAMES, params={**params, "per_page": 10}))
+
+    seen, cursor = [], None
+    while True:
+        page = client("GET", GAMES, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        seen.extend(game["title"] for game in page["games"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == offset_titles
+    assert len(seen) == 6
+
+
+def test_cursor_must_match_the_sort(add_games, client):
+    _catalog(add_games)
+    first = client("GET", GAMES, params={"sort_by": "price", "per_page": 2}).json()
+    assert first["next_cursor"]
+    response = client("GET", GAMES, params={"sort_by": "title", "cursor": first["next_cursor"]})
+    assert response.status_code == 400
+    assert client("GET", GAMES, params={"cursor": "not-a-cursor"}).status_code == 400
+
+
+def _forged(signature, values):
+    return encode_cursor(signature, values)
+
+
+@pytest.mark.parametrize(
+    "url,params",
+    [
+        (f"{GAMES}-simple", {"cursor": _forged("id:asc", ["x"])}),
+        (f"{GAMES}-simple", {"cursor": _forged("id:asc", [1.5])}),
+        (f"{GAMES}-simple", {"cursor": _forged("id:asc", [True])}),
+        (GAMES, {"sort_by": "price", "sort_order": "asc", "cursor": _forged("price:asc", ["cheap", 1])}),
+        (GAMES, {"sort_by": "title", "sort_order": "asc", "cursor": _forged("title:asc", [{"a": 1}, 1])}),
+        (GAMES, {"sort_by": "release_date", "cursor": _forged("release_date:desc", ["2020-01-01", 1])}),
+        (GAMES, {"sort_by": "rating", "cursor": _forged("rating:desc", [None, 1])}),
+    ],
+)
+def test_forged_cursor_values_are_rejected(add_games, client, url, params):
+    _catalog(add_games)
+    response = client("GET", url, params=params)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid pagination cursor"
+
+
+def test_cursor_values_are_checked_against_key_types():
+    keys = [Game.price, Game.id]
+    assert decode_cursor(_forged("price:asc", [10, 3]), "price:asc", keys) == [10, 3]
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(_forged("price:asc", [10, "3"]), "price:asc", keys)
+
+
+def test_simple_listing_pages_by_cursor_on_both_paths(add_games, client):
+    ids = _catalog(add_games)
+    first = client("GET", f"{GAMES}-simple", params={"per_page": 4}).json()
+    assert client("GET", f"{GAMES}/simple", params={"per_page": 4}).json() == first
+    assert first["games"][0]["description"] is None and "publisher" in first["games"][0]
+    rest = client("GET", f"{GAMES}/simple", params={"per_page": 4, "cursor": first["next_cursor"]}).json()
+    assert rest["next_cursor"] is None
+    games = first["games"] + rest["games"]
+    assert [game["id"] for game in games] == sorted(ids)
+    hades = next(game for game in games if game["title"] == "Hades")
+    assert hades["release_date"].startswith("2020-09-17")
+
+
+def test_cursor_round_trips_datetimes():
+    when = datetime(2021, 5, 1, 12, 30)
+    keys = [Game.release_date, Game.id]
+    assert decode_cursor(encode_cursor("release_date:desc", [when, 7]), "release_date:desc", keys) == [when, 7]
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor("release_date:desc", [when, 7]), "release_date:desc", [*keys, Game.id])
+
+
+def test_count_modes(add_games, client):
+    _catalog(add_games)
+    assert client("GET", GAMES, params={"per_page": 2}).json()["total"] == 6
+    # Estimates come from EXPLAIN on Postgres only; elsewhere they are exact
+    estimate = client("GET", GAMES, params={"per_page": 2, "count": "estimate"}).json()
+    assert estimate["total"] == 6 and estimate["total_pages"] == 3
+    none = client("GET", GAMES, params={"per_page": 2, "count": "none"}).json()
+    assert none["total"] is None and none["total_pages"] is None
+    # Cursor pages skip counting unless asked
+    cursor = client("GET", GAMES, params={"per_page": 2, "cursor": none["next_cursor"]}).json()
+    assert cursor["total"] is None
+    past_end = client("GET", GAMES, params={"per_page": 5, "page": 9}).json()
+    assert past_end["games"] == [] and past_end["total"] == 6
+
+
+def test_count_rows_estimate_is_exact_off_postgres(add_games, run):
+    _catalog(add_games)
+
+    async def counts():
+        async with AsyncSessionLocal() as session:
+            stmt = select(Game).where(Game.price < 100)
+            return [await count_rows(session, stmt, mode) for mode in ("exact", "estimate", "none")]
+
+    assert run(counts()) == [6, 6, None]
+
+
+def test_facets_count_the_whole_filtered_result(add_games, client):
+    _catalog(add_games)
+    body = client("GET", GAMES, params={"facets": "true", "max_price": 20, "per_page": 1}).json()
+    assert body["total"] == 4
+    genres = {item["name"]: item["count"] for item in body["facets"]["genres"]}
+    assert genres == {"Action": 2, "Board": 1}
+    buckets = {bucket["key"]: bucket["count"] for bucket in body["facets"]["price_buckets"]}
+    assert sum(buckets.values()) == 4
+
+
+def test_facets_follow_writes_in_this_worker(add_games, client):
+    _catalog(add_games)
+    assert client("GET", GAMES, params={"facets": "true"}).json()["total"] == 6
+    rpg = next(genre["id"] for genre in client("GET", "/api/v1/catalog/genres").json() if genre["name"] == "RPG")
+    created = client(
+        "POST",
+        GAMES,
+        json={"title": "Disco Elysium", "developer": "ZA/UM", "publisher": "ZA/UM", "price": 39.99, "genre_ids": [rpg]},
+    )
+    assert created.status_code == 201
+    genres = client("GET", GAMES, params={"facets": "true"}).json()["facets"]["genres"]
+    assert {item["name"]: item["count"] for item in genres}["RPG"] == 3
+
+
+def test_facets_pick_up_other_workers_on_their_interval(add_games, client, run):
+    ids = _catalog(add_games)
+
+    def price_counts():
+        facets = client("GET", GAMES, params={"facets": "true"}).json()["facets"]
+        return {bucket["key"]: bucket["count"] for bucket in facets["price_buckets"] if bucket["count"]}
+
+    async def write_elsewhere():
+        # Another worker's writes: nothing marks this process's index stale
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(Game).where(Game.id == ids[4]).values(price=0))
+            await session.execute(delete(game_genres).where(game_genres.c.game_id == ids[1]))
+            await session.execute(delete(Game).where(Game.id == ids[1]))
+            await session.commit()
+
+    assert price_counts() == {"under_10": 1, "10_to_20": 3, "20_to_40": 2}
+    run(write_elsewhere())
+    # Until the interval passes, the updated game still counts in its old bucket
+    assert price_counts() == {"10_to_20": 3, "20_to_40": 2}
+    game_facet_index._checked_at = 0
+    assert price_counts() == {"free": 1, "10_to_20": 2, "20_to_40": 2}
+    # The delete showed up as an id-set mismatch and forced one full reload
+    assert len(game_facet_index) == 5
+    assert game_facet_index.stats["full_loads"] == 2
+
+
+def test_facets_drop_games_deleted_elsewhere_at_equal_count(add_games, run):
+    ids = _catalog(add_games)
+
+    async def refresh():
+        async with AsyncSessionLocal() as session:
+            await game_facet_index.ensure_current(session)
+
+    async def delete_elsewhere():
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(game_genres).where(game_genres.c.game_id == ids[0]))
+            await session.execute(delete(Game).where(Game.id == ids[0]))
+            await session.commit()
+
+    run(refresh())
+    # Another worker deletes one game and inserts another from a transaction that
+    # started long ago, so the updated_at scan misses it and the row count holds
+    run(delete_elsewhere())
+    [late] = add_games(("Late Insert", {"updated_at": datetime(2000, 1, 1)}))
+    game_facet_index._checked_at = 0
+    run(refresh())
+    assert ids[0] not in game_facet_index._members and late in game_facet_index._members
+    assert game_facet_index.stats["full_loads"] == 2
+
+
+def test_repository_search_uses_the_in_process_index(add_games, run):
+    _catalog(add_games)
+
+    async def search():
+        async with AsyncSessionLocal() as session:
+            page = await GameRepository(session).search(GameSearchFilters(query="hades"), 1, 10)
+            return [game.title for game in page.items], [genre.name for genre in page.items[0].genres]
+
+    titles, genres = run(search())
+    assert titles == ["Hades"]
+    assert sorted(genres) == ["Action", "RPG"]
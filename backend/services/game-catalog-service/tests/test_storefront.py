@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import orjson
+import pytest
+from sqlalchemy import delete, update
+
+from app.db.session import AsyncSessionLocal
+from app.models import Game
+from app.repository.game_repository import GameRepository
+from app.repository.snapshot import catalog_snapshot
+from app.schemas import GameResponse, GameSearchFilters, GenreResponse, PlatformResponse, TagResponse
+from app.services.icon_pool import icon_pool
+from app.services.shelf_cache import ShelfCache, shelf_cache
+from app.utils.serialization import game_fragments, game_payload
+
+CATALOG = "/api/v1/catalog"
+
+
+def _storefront(add_games):
+    return add_games(
+        ("Top Rated", {"average_rating": 4.9, "total_reviews": 500, "release_date": datetime(2019, 1, 1)}),
+        ("Popular", {"average_rating": 4.5, "total_reviews": 5000, "discount_percent": 50, "original_price": 39.99}),
+        ("Niche", {"average_rating": 4.8, "total_reviews": 12, "release_date": datetime(2024, 3, 1)}),
+        ("Unrated", {"release_date": datetime(2023, 6, 1), "discount_percent": 10, "original_price": 21.99}),
+        ("Retired", {"average_rating": 5.0, "total_reviews": 900, "status": "discontinued", "discount_percent": 90}),
+    )
+
+
+def _titles(response):
+    return [game["title"] for game in response.json()]
+
+
+# ------------------------------------------------------------------ snapshot
+@pytest.mark.parametrize(
+    "filters",
+    [
+        GameSearchFilters(),
+        GameSearchFilters(sort_by="price", sort_order="asc"),
+        GameSearchFilters(sort_by="rating"),
+        GameSearchFilters(min_rating=4.6, sort_by="rating", sort_order="asc"),
+        GameSearchFilters(status="active", max_price=100),
+    ],
+)
+def test_snapshot_search_matches_sql(add_games, run, filters):
+    _storefront(add_games)
+
+    async def both():
+        async with AsyncSessionLocal() as session:
+            repository = GameRepository(session)
+            served = await repository.search(filters, 1, 3)
+            catalog_snapshot.enabled = False
+            try:
+                expected = await repository.search(filters, 1, 3)
+            finally:
+                catalog_snapshot.enabled = True
+            return served, expected
+
+    served, expected = run(both())
+    assert catalog_snapshot.loaded
+    assert [game.id for game in served.items] == [game.id for game in expected.items]
+    assert served.total == expected.total
+    assert served.next_cursor == expected.next_cursor
+
+
+def test_snapshot_shelves_match_sql(add_games, run):
+    _storefront(add_games)
+
+    async def shelves(enabled):
+        catalog_snapshot.enabled = enabled
+        async with AsyncSessionLocal() as session:
+            repository = GameRepository(session)
+            return [
+                [game.title for game in await getattr(repository, shelf)(10)]
+                for shelf in ("featured", "new_releases", "on_sale")
+            ]
+
+    assert run(shelves(True)) == run(shelves(False)) == [
+        ["Top Rated", "Popular"],
+        ["Niche", "Unrated", "Top Rated"],
+        ["Popular", "Unrated"],
+    ]
+
+
+def test_snapshot_sees_writes_from_this_worker(add_games, client):
+    ids = _storefront(add_games)
+    assert _titles(client("GET", f"{CATALOG}/games/on-sale")) == ["Popular", "Unrated"]
+    assert client("PUT", f"{CATALOG}/games/{ids[3]}", json={"price": 5.0, "original_price": 50.0}).status_code == 200
+    assert client("DELETE", f"{CATALOG}/games/{ids[1]}").status_code == 200
+    games = client("GET", f"{CATALOG}/games", params={"min_price": 0, "sort_by": "price", "sort_order": "asc"}).json()
+    assert [game["title"] for game in games["games"]][0] == "Unrated"
+    assert games["total"] == 4
+
+
+def test_snapshot_picks_up_other_writers_on_its_interval(add_games, run):
+    ids = _storefront(add_games)
+
+    async def featured():
+        async with AsyncSessionLocal() as session:
+            return await catalog_snapshot.featured(session, 10, 4.0, 100)
+
+    async def write_elsewhere():
+        # Another worker's write: nothing marks this process dirty
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(Game).where(Game.id == ids[2]).values(total_reviews=1000))
+            await session.commit()
+
+    assert run(featured()) == [ids[0], ids[1]]
+    run(write_elsewhere())
+    assert run(featured()) == [ids[0], ids[1]]
+    catalog_snapshot.refresh_interval = 0
+    assert run(featured()) == [ids[0], ids[2], ids[1]]
+    assert catalog_snapshot.stats["full_loads"] == 1
+
+
+def test_snapshot_drops_games_deleted_elsewhere_at_equal_count(add_games, run):
+    ids = _storefront(add_games)
+
+    async def featured():
+        async with AsyncSessionLocal() as session:
+            return await catalog_snapshot.featured(session, 10, 4.0, 100)
+
+    async def delete_elsewhere():
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(Game).where(Game.id == ids[1]))
+            await session.commit()
+
+    assert run(featured()) == [ids[0], ids[1]]
+    # Another worker deletes one game and inserts another from a transaction that
+    # started long ago, so the updated_at scan misses it and the row count holds
+    run(delete_elsewhere())
+    add_games(("Replacement", {"average_rating": 3.0, "updated_at": datetime(2000, 1, 1)}))
+    catalog_snapshot.refresh_interval = 0
+    assert run(featured()) == [ids[0]]
+    assert len(catalog_snapshot) == 5 and catalog_snapshot.stats["full_loads"] == 2
+
+
+# ------------------------------------------------------------------ shelves
+def test_shelves_are_built_once_and_sliced(add_games, client):
+    _storefront(add_games)
+    assert _titles(client("GET", f"{CATALOG}/games/featured")) == ["Top Rated", "Popular"]
+    assert _titles(client("GET", f"{CATALOG}/games/featured", params={"limit": 1})) == ["Top Rated"]
+    assert shelf_cache.stats["rebuilds"] == 1
+    assert shelf_cache.stats["local_hits"] == 1
+
+
+def test_shelf_serves_stale_copy_while_rebuilding(add_games, run):
+    ids = _storefront(add_games)
+
+    async def scenario():
+        async with AsyncSessionLocal() as session:
+            first = await shelf_cache.get("featured", 10, session)
+            # Written elsewhere: only the generation bump reaches this worker
+            await session.execute(update(Game).where(Game.id == ids[2]).values(total_reviews=1000))
+            await session.commit()
+            await shelf_cache.invalidate()
+            stale = await shelf_cache.get("featured", 10, session)
+            await asyncio.gather(*shelf_cache._tasks.values())
+            return first, stale, await shelf_cache.get("featured", 10, session)
+
+    first, stale, rebuilt = run(scenario())
+    assert stale == first
+    assert [orjson.loads(item)["title"] for item in rebuilt] == ["Top Rated", "Niche", "Popular"]
+    assert shelf_cache.stats["stale_served"] == 1
+
+
+def test_rebuilds_refresh_the_snapshot_once_per_generation(add_games, run):
+    ids = _storefront(add_games)
+
+    async def scenario():
+        async with AsyncSessionLocal() as session:
+            for shelf in ("featured", "new_releases", "on_sale"):
+                await shelf_cache.get(shelf, 10, session)
+            refreshes = catalog_snapshot.stats["refreshes"]
+            await session.execute(update(Game).where(Game.id == ids[3]).values(discount_percent=75))
+            await session.commit()
+            await shelf_cache.invalidate()
+            await asyncio.gather(*shelf_cache._tasks.values())
+            on_sale = await shelf_cache.get("on_sale", 10, session)
+            return catalog_snapshot.stats["refreshes"] - refreshes, on_sale
+
+    refreshes, on_sale = run(scenario())
+    assert [orjson.loads(item)["title"] for item in on_sale] == ["Unrated", "Popular"]
+    assert refreshes == 1
+
+
+def test_workers_share_shelves_through_redis(add_games, run):
+    fakeredis = pytest.importorskip("fakeredis")
+    _storefront(add_games)
+    server = fakeredis.FakeServer()
+
+    def worker():
+        cache = ShelfCache("", 50, 60, 3600, 30)
+        cache._redis = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+        return cache
+
+    async def scenario():
+        first, second = worker(), worker()
+        async with AsyncSessionLocal() as session:
+            built = await first.get("featured", 10, session)
+            shared = await second.get("featured", 10, session)
+            await second.invalidate()
+            # The first worker learns of the write through the shared generation
+            first._local["featured"].checked_at = 0
+            stale = await first.get("featured", 10, session)
+            return first, second, built, shared, stale
+
+    first, second, built, shared, stale = run(scenario())
+    assert shared == built
+    assert second.stats == {"local_hits": 0, "redis_hits": 1, "stale_served": 0, "rebuilds": 0}
+    assert stale == built and first.stats["stale_served"] == 1
+
+
+def test_workers_without_redis_rebuild_aged_shelves(add_games, run):
+    ids = _storefront(add_games)
+
+    async def scenario():
+        first, second = ShelfCache("", 50, 60, 3600, 30), ShelfCache("", 50, 60, 3600, 30)
+        async with AsyncSessionLocal() as session:
+            built = await first.get("featured", 10, session)
+            # The second worker writes; with no Redis its generation bump stays local
+            await session.execute(update(Game).where(Game.id == ids[2]).values(total_reviews=1000))
+            await session.commit()
+            await second.invalidate()
+            first._local["featured"].checked_at = 0
+            fresh = await first.get("featured", 10, session)
+            first._local["featured"].checked_at = 0
+            first._local["featured"].built_at -= first.max_age
+            stale = await first.get("featured", 10, session)
+            await asyncio.gather(*first._tasks.values())
+            return built, fresh, stale, await first.get("featured", 10, session), first.stats
+
+    built, fresh, stale, rebuilt, stats = run(scenario())
+    assert fresh == stale == built
+    assert [orjson.loads(item)["title"] for item in rebuilt] == ["Top Rated", "Niche", "Popular"]
+    assert stats["stale_served"] == 1 and stats["rebuilds"] == 2
+
+
+# ---------------------------------------------------------------- fragments
+def test_fragments_match_the_pydantic_response(add_games, run):
+    ids = add_games(
+        (
+            "Full Record",
+            {
+                "steam_app_id": 10,
+                "screenshots": ["a.png", "b.png"],
+                "pc_requirements": {"minimum": {"os": "Windows 10"}, "extra": 1},
+                "metadata_json": {"source": "steam"},
+                "genres": ["RPG"],
+                "tags": ["Story Rich"],
+                "platforms": ["windows"],
+            },
+        ),
+    )
+
+    async def load():
+        async with AsyncSessionLocal() as session:
+            return await GameRepository(session).get_by_id(ids[0])
+
+    game = run(load())
+    expected = GameResponse.from_orm_with_relations(
+        game,
+        genres=[GenreResponse.model_validate(g) for g in game.genres],
+        tags=[TagResponse.model_validate(t) for t in game.tags],
+        platforms=[PlatformResponse.model_validate(p) for p in game.platforms],
+    ).model_dump(mode="json")
+    assert orjson.loads(orjson.dumps(game_payload(game))) == expected
+
+    fragment = game_fragments.encode(game)
+    assert orjson.loads(fragment) == expected
+    assert game_fragments.encode(game) is fragment
+    game.updated_at = datetime(2030, 1, 1)
+    assert game_fragments.encode(game) is not fragment
+    assert game_fragments.stats == {"hits": 1, "misses": 2}
+
+
+def test_updates_drop_cached_fragments(add_games, client):
+    ids = add_games(("Before", {"genres": ["RPG"]}))
+    assert client("GET", f"{CATALOG}/games/by-slug/before").json()["title"] == "Before"
+    client("PUT", f"{CATALOG}/games/{ids[0]}", json={"title": "After"})
+    assert client("GET", f"{CATALOG}/games/by-slug/before").json()["title"] == "After"
+
+
+# ---------------------------------------------------------------- icon pool
+def test_icon_pool_prefers_icons_then_capsules(add_games, client):
+    add_games(
+        ("A", {"icon_url": "icon-1", "capsule_image_url": "icon-1"}),
+        ("B", {"icon_url": "icon-1", "capsule_image_url": "capsule-2"}),
+        ("C", {"icon_url": "", "capsule_image_url": "capsule-3"}),
+        ("D", {}),
+    )
+    body = client("GET", f"{CATALOG}/game-icons", params={"limit": 2}).json()
+    assert body["count"] == 2 and body["icons"][0] == "icon-1"
+    everything = client("GET", f"{CATALOG}/game-icons").json()["icons"]
+    assert everything[0] == "icon-1" and sorted(everything[1:]) == ["capsule-2", "capsule-3"]
+
+
+def test_icon_pool_reloads_after_writes(add_games, client):
+    ids = add_games(("A", {"icon_url": "old"}))
+    assert client("GET", f"{CATALOG}/game-icons").json()["icons"] == ["old"]
+    client("PUT", f"{CATALOG}/games/{ids[0]}", json={"icon_url": "new"})
+    assert client("GET", f"{CATALOG}/game-icons").json()["icons"] == ["new"]
+    assert len(icon_pool) == 1
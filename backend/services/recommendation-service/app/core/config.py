@@ -206,6 +206,15 @@ class Settings:
     CF_N_COMPONENTS: int = int(os.getenv("CF_N_COMPONENTS", "40"))
     CF_MIN_INTERACTIONS: int = int(os.getenv("CF_MIN_INTERACTIONS", "5"))
     CF_MAX_RECOMMENDATIONS: int = int(os.getenv("CF_MAX_RECOMMENDATIONS", "100"))
+    CF_BATCH_WORKERS: int = int(os.getenv("CF_BATCH_WORKERS", str(os.cpu_count() or 1)))
+    CF_BATCH_MEMORY_MB: int = int(os.getenv("CF_BATCH_MEMORY_MB", "256"))
+    # 0 picks sqrt(number of games) inverted lists
+    CF_SIMILAR_NLIST: int = int(os.getenv("CF_SIMILAR_NLIST", "0"))
+    CF_SIMILAR_NPROBE: int = int(os.getenv("CF_SIMILAR_NPROBE", "8"))
+    CF_TRAINING_BATCH_SIZE: int = int(os.getenv("CF_TRAINING_BATCH_SIZE", "50000"))
+    CF_ONLINE_UPDATES: bool = os.getenv("CF_ONLINE_UPDATES", "true").lower() in {"1", "true", "yes"}
+    # Background full retrain period; 0 leaves retraining to POST /train
+    CF_RETRAIN_INTERVAL_SECONDS: int = int(os.getenv("CF_RETRAIN_INTERVAL_SECONDS", "3600"))
     INTERACTION_WEIGHTS: Dict[str, float] = field(
         default_factory=lambda: _parse_weight_map(os.getenv("INTERACTION_WEIGHTS"))
     )
@@ -4,8 +4,10 @@ Recommendation Service CRUD Operations
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from typing import List, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
 from app.events import publish_event
@@ -57,6 +59,69 @@ def replace_user_recommendations(db: Session, batch: schemas.RecommendationBatch
     return new_records
 
 
+def bulk_replace_recommendations(
+    db: Session,
+    scored: Sequence[Tuple[str, Sequence[Tuple[str, float]]]],
+    *,
+    algorithm: str,
+    reason: str | None,
+    context: dict | None,
+    expires_in_hours: int | None,
+) -> int:
+    """Replace the active recommendations of many users in one transaction.
+
+    ``scored`` pairs each user id with its ranked ``(game_id, score)`` list.
+    Rows are upserted on (user_id, game_id) in a single executemany, so a game
+    recommended again keeps its row and the feedback that points at it.
+    """
+    table = models.Recommendation.__table__
+    expires_at = (
+        datetime.now(timezone.utc) + timedelta(hours=expires_in_hours) if expires_in_hours else None
+    )
+    rows = [
+        {
+            "user_id": user_id,
+            "game_id": game_id,
+            "score": max(score, 0.0),
+            "rank": idx,
+            "algorithm": algorithm,
+            "reason": reason,
+            "context": context,
+            "expires_at": expires_at,
+            "is_active": True,
+        }
+        for user_id, items in scored
+        for idx, (game_id, score) in enumerate(items, start=1)
+    ]
+
+    db.execute(
+        update(table)
+        .where(table.c.user_id.in_([user_id for user_id, _ in scored]))
+        .values(is_active=False)
+    )
+    if rows:
+        dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.game_id],
+            set_={
+                **{
+                    name: stmt.excluded[name]
+                    for name in ("score", "rank", "algorithm", "reason", "context", "expires_at", "is_active")
+                },
+                "updated_at": func.now(),
+            },
+        )
+        db.execute(stmt, rows)
+    db.commit()
+
+    _publish(
+        "recommendations_batch_created",
+        {"users": len(scored), "count": len(rows)},
+    )
+    return len(rows)
+
+
 def get_user_recommendations(db: Session, user_id: str, limit: int = 20) -> List[models.Recommendation]:
     """Fetch active recommendations for a user ordered by rank."""
     now = datetime.now(timezone.utc)
@@ -116,7 +181,7 @@ def record_feedback(
     return feedback
 
 
-def _interaction_weight(event_type: str, override: float | None) -> float:
+def interaction_weight(event_type: str, override: float | None) -> float:
     if override is not None:
         return override
     return settings.INTERACTION_WEIGHTS.get(event_type, 1.0)
@@ -127,7 +192,7 @@ def ingest_interactions(db: Session, batch: schemas.InteractionBatch) -> Tuple[i
     updated = 0
     now = datetime.now(timezone.utc)
     for event in batch.interactions:
-        weight = _interaction_weight(event.event_type, event.weight)
+        weight = interaction_weight(event.event_type, event.weight)
         occurred_at = event.occurred_at or now
         existing = (
             db.query(models.UserGameInteraction)
@@ -160,11 +225,52 @@ def ingest_interactions(db: Session, batch: schemas.InteractionBatch) -> Tuple[i
     return created, updated
 
 
+def count_training_interactions(db: Session) -> int:
+    return (
+        db.query(func.count(models.UserGameInteraction.id))
+        .filter(models.UserGameInteraction.score > 0)
+        .scalar()
+    )
+
+
+def iter_interaction_batches(db: Session, batch_size: int = 50_000) -> Iterator[Sequence[Tuple[str, str, float]]]:
+    """Stream ``(user_id, game_id, score)`` training rows in batches.
+
+    Reads plain column tuples through a server-side cursor (``yield_per``),
+    so neither ORM objects nor the full result set are ever held in memory.
+    """
+    table = models.UserGameInteraction.__table__
+    result = db.execute(
+        select(table.c.user_id, table.c.game_id, table.c.score)
+        .where(table.c.score > 0)
+        .execution_options(yield_per=batch_size)
+    )
+    for partition in result.partitions():
+        yield partition
+
+
 def list_interaction_tuples(db: Session) -> List[Tuple[str, str, float]]:
     rows = db.query(models.UserGameInteraction).all()
     return [(row.user_id, row.game_id, row.score) for row in rows if row.score > 0]
 
 
+def get_users_game_scores(db: Session, user_ids: Iterable[str]) -> Dict[str, Dict[str, float]]:
+    """Every stored game score of each of ``user_ids``, in one query."""
+    rows = (
+        db.query(
+            models.UserGameInteraction.user_id,
+            models.UserGameInteraction.game_id,
+            models.UserGameInteraction.score,
+        )
+        .filter(models.UserGameInteraction.user_id.in_(list(user_ids)))
+        .all()
+    )
+    scores: Dict[str, Dict[str, float]] = {}
+    for user_id, game_id, score in rows:
+        scores.setdefault(user_id, {})[game_id] = score
+    return scores
+
+
 def get_user_seen_games(db: Session, user_id: str) -> List[str]:
     rows = (
         db.query(models.UserGameInteraction)
@@ -172,3 +278,10 @@ def get_user_seen_games(db: Session, user_id: str) -> List[str]:
         .all()
     )
     return [row.game_id for row in rows]
+
+
+def iter_seen_pairs(db: Session, chunk_size: int = 10_000) -> Iterator[Tuple[str, str]]:
+    """Stream every (user_id, game_id) interaction pair, as ``get_user_seen_games`` sees them."""
+    query = db.query(models.UserGameInteraction.user_id, models.UserGameInteraction.game_id)
+    for user_id, game_id in query.yield_per(chunk_size):
+        yield user_id, game_id
@@ -0,0 +1,58 @@
+"""Refresh collaborative recommendations for every user in the trained model.
+
+    python -m app.generate_recommendations
+    python -m app.generate_recommendations --limit 50 --workers 8 --memory-mb 512
+
+Meant to run after ``/train`` (e.g. from the same schedule); see
+``app.services.batch_generation``.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+
+from .database import SessionLocal, init_db
+from .services import cf_engine
+from .services.batch_generation import BatchGenerationResult, generate_for_all_users
+
+
+def _progress(result: BatchGenerationResult) -> None:
+    print(
+        f"  {result.users} users, {result.recommendations} recommendations, {result.elapsed:.1f}s",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate recommendations for all users in bulk.")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--algorithm", default="collaborative")
+    parser.add_argument("--expires-in-hours", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=None, help="Scoring processes (default: CF_BATCH_WORKERS)")
+    parser.add_argument("--memory-mb", type=int, default=None, help="Score matrix budget per block (default: CF_BATCH_MEMORY_MB)")
+    args = parser.parse_args()
+
+    if not cf_engine.is_ready():
+        print("Model has not been trained yet.", file=sys.stderr)
+        return 1
+    init_db()
+    with SessionLocal() as session:
+        result = generate_for_all_users(
+            session,
+            limit=args.limit,
+            algorithm=args.algorithm,
+            expires_in_hours=args.expires_in_hours,
+            workers=args.workers,
+            memory_mb=args.memory_mb,
+            progress=_progress,
+        )
+    print(
+        f"Recommendation generation complete ({result.users} users, "
+        f"{result.recommendations} recommendations in {result.elapsed:.1f}s)."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from . import routes, models, database
 from .database import engine, get_db
 from .core.config import settings
+from .services.online_updates import model_refresher
 import uvicorn
 
 # Create FastAPI app
@@ -33,6 +34,15 @@ models.Base.metadata.create_all(bind=engine)
 # Include routers
 app.include_router(routes.router, prefix="/api/v1/recommendation", tags=["recommendation"])
 
+@app.on_event("startup")
+def start_model_refresher():
+    """Retrain the CF model in the background every CF_RETRAIN_INTERVAL_SECONDS"""
+    model_refresher.start()
+
+@app.on_event("shutdown")
+def stop_model_refresher():
+    model_refresher.stop()
+
 @app.get("/health")
 def health_check():
     """Health check endpoint"""
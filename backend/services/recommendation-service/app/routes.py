@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 from typing import List
 from . import crud, schemas, database
 from .services import cf_engine
+from .services.online_updates import apply_interactions, retrain
 
 router = APIRouter()
 
@@ -39,6 +40,23 @@ def get_user_recommendations(
     return crud.get_user_recommendations(db=db, user_id=user_id, limit=limit)
 
 
+@router.get(
+    "/games/{game_id}/similar",
+    response_model=List[schemas.SimilarGameResponse],
+)
+def get_similar_games(game_id: str, limit: int = 10):
+    """Return the games closest to ``game_id`` in the trained model's item space."""
+    if not cf_engine.is_ready():
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Model has not been trained yet."
+        )
+    try:
+        similar = cf_engine.similar_games(game_id, limit=max(1, min(limit, 50)))
+    except KeyError as exc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Game not in the model.") from exc
+    return [schemas.SimilarGameResponse(game_id=g, score=score) for g, score in similar]
+
+
 @router.post(
     "/feedback",
     response_model=schemas.RecommendationFeedbackResponse,
@@ -64,6 +82,7 @@ def ingest_interactions(
     if not payload.interactions:
         raise HTTPException(status_code=400, detail="Interactions list cannot be empty.")
     created, updated = crud.ingest_interactions(db, payload)
+    apply_interactions(db, payload)
     return schemas.InteractionIngestResponse(created=created, updated=updated)
 
 
@@ -72,10 +91,9 @@ def train_collaborative_model(
     request: schemas.TrainingRequest = Body(default=schemas.TrainingRequest()),
     db: Session = Depends(database.get_db),
 ):
-    interactions = crud.list_interaction_tuples(db)
     try:
-        result = cf_engine.train(
-            interactions,
+        result = retrain(
+            db,
             min_interactions=request.min_interactions,
             n_components=request.n_components,
             persist=request.persist,
@@ -40,6 +40,11 @@ class RecommendationResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class SimilarGameResponse(BaseModel):
+    game_id: str
+    score: float
+
+
 class RecommendationFeedbackCreate(BaseModel):
     recommendation_id: Optional[int] = None
     user_id: str
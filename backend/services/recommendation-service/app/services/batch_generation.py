@@ -0,0 +1,251 @@
+"""Refresh stored recommendations for every user the model knows, in bulk.
+
+``/user/{user_id}/generate`` scores one user per request. This job scores
+users in blocks: one ``user_factors[block] @ item_factors.T`` product per
+block, each user's seen games masked out from a sparse user x game matrix, a
+row-wise ``argpartition`` for the top ``limit``, topped up from the popularity
+ranking like ``recommend`` does, then one bulk upsert per block through
+``crud.bulk_replace_recommendations``.
+
+Blocks are sized so a block's score matrix (plus the partition indices) stays
+under ``CF_BATCH_MEMORY_MB``, and are scored by a process pool with at most two
+blocks per worker in flight, so memory does not grow with the user base.
+Results are written from the calling process as blocks complete.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Deque, Dict, Iterable, List, Sequence, Set, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy.orm import Session
+
+from .. import crud
+from ..core.config import settings
+from .collaborative import CollaborativeFilteringEngine, _ModelState, cf_engine
+
+logger = logging.getLogger(__name__)
+
+Scored = List[Tuple[str, float]]
+
+
+@dataclass
+class BatchGenerationResult:
+    users: int
+    recommendations: int
+    blocks: int
+    elapsed: float
+
+
+def seen_matrix(
+    state: _ModelState,
+    pairs: Iterable[Tuple[str, str]],
+    outside: Dict[int, Set[str]] | None = None,
+) -> sparse.csr_matrix:
+    """Users x games matrix of what each user has already interacted with.
+
+    Seen games the model does not know are collected into ``outside`` by user
+    row, when given, for ``fill_from_popularity``.
+    """
+    rows: List[int] = []
+    cols: List[int] = []
+    for user_id, game_id in pairs:
+        user_idx = state.user_index.get(user_id)
+        if user_idx is None:
+            continue
+        game_idx = state.game_index.get(game_id)
+        if game_idx is not None:
+            rows.append(user_idx)
+            cols.append(game_idx)
+        elif outside is not None:
+            outside.setdefault(user_idx, set()).add(game_id)
+    return sparse.csr_matrix(
+        (np.ones(len(rows), dtype=bool), (rows, cols)),
+        shape=(len(state.user_index), len(state.game_index)),
+    )
+
+
+def block_size(games: int, memory_mb: int, itemsize: int = 8) -> int:
+    """Users per block so that scores and argpartition indices fit ``memory_mb``."""
+    per_user = max(1, games) * (itemsize + np.dtype(np.intp).itemsize)
+    return max(1, memory_mb * 1024 * 1024 // per_user)
+
+
+def score_block(state: _ModelState, user_rows: np.ndarray, seen: sparse.csr_matrix, limit: int) -> List[Scored]:
+    """Top ``limit`` unseen games for each of ``user_rows``, best first.
+
+    ``seen`` holds the rows of the seen matrix for ``user_rows``, in order.
+    Matches the model ranking of ``CollaborativeFilteringEngine.recommend``.
+    A user with fewer than ``limit`` unseen games in the model also gets
+    ``recommend``'s popularity fallback, which can only add games outside the
+    model (ingested since training); ``fill_from_popularity`` adds those.
+    """
+    # Negated in place so argpartition/argsort pick the best without a copy
+    scores = state.user_factors[user_rows] @ state.item_factors.T
+    np.negative(scores, out=scores)
+    seen_rows = np.repeat(np.arange(len(user_rows)), np.diff(seen.indptr))
+    scores[seen_rows, seen.indices] = np.inf
+
+    games = scores.shape[1]
+    k = min(limit, games)
+    if k < games:
+        top = np.argpartition(scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(games), (len(user_rows), 1))
+    # Sort the k winners per row; ties keep game_index order like recommend()
+    top.sort(axis=1)
+    top_scores = np.take_along_axis(scores, top, axis=1)
+    order = np.argsort(top_scores, axis=1, kind="stable")
+    top = np.take_along_axis(top, order, axis=1)
+    top_scores = -np.take_along_axis(top_scores, order, axis=1)
+
+    game_ids = state.game_ids[top]
+    results: List[Scored] = []
+    for ids, row_scores in zip(game_ids, top_scores):
+        # Fewer unseen games than the limit: the seen ones sort last at -inf
+        keep = np.isfinite(row_scores)
+        results.append(list(zip(ids[keep].tolist(), row_scores[keep].tolist())))
+    return results
+
+
+def fill_from_popularity(
+    scored: List[Scored],
+    user_rows: np.ndarray,
+    ranking: Sequence[Tuple[str, float]],
+    outside: Dict[int, Set[str]],
+    limit: int,
+) -> List[Scored]:
+    """Top up short rows of ``scored`` from ``ranking`` as ``recommend`` does.
+
+    ``ranking`` is the popularity ranking restricted to games outside the
+    model; every unseen game in the model is already in a short row.
+    """
+    if not ranking:
+        return scored
+    for row, items in zip(user_rows.tolist(), scored):
+        if len(items) >= limit:
+            continue
+        seen = outside.get(row, ())
+        for game_id, score in ranking:
+            if game_id in seen:
+                continue
+            items.append((game_id, score))
+            if len(items) >= limit:
+                break
+    return scored
+
+
+_worker_state: _ModelState | None = None
+
+
+def _init_worker(state: _ModelState) -> None:
+    global _worker_state
+    _worker_state = state
+
+
+def _score_in_worker(user_rows: np.ndarray, seen: sparse.csr_matrix, limit: int) -> List[Scored]:
+    return score_block(_worker_state, user_rows, seen, limit)
+
+
+class _InlineExecutor:
+    """Runs blocks in the calling process, for ``workers <= 1``."""
+
+    def submit(self, fn, *args) -> Future:
+        future: Future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+def generate_for_all_users(
+    db: Session,
+    *,
+    engine: CollaborativeFilteringEngine = cf_engine,
+    user_ids: Sequence[str] | None = None,
+    limit: int = 20,
+    algorithm: str = "collaborative",
+    reason: str | None = "Because you liked similar games",
+    expires_in_hours: int | None = 24,
+    workers: int | None = None,
+    memory_mb: int | None = None,
+    progress: Callable[[BatchGenerationResult], None] | None = None,
+) -> BatchGenerationResult:
+    """Score and store recommendations for ``user_ids`` (default: every user in the model)."""
+    state = engine.state
+    if not state:
+        raise ValueError("Model is not trained")
+    limit = max(1, min(limit, settings.CF_MAX_RECOMMENDATIONS))
+    workers = settings.CF_BATCH_WORKERS if workers is None else workers
+    memory_mb = memory_mb or settings.CF_BATCH_MEMORY_MB
+
+    if user_ids is None:
+        user_rows = np.arange(len(state.user_index))
+    else:
+        user_rows = np.array(
+            sorted({state.user_index[u] for u in user_ids if u in state.user_index}), dtype=np.intp
+        )
+    index_to_user = np.empty(len(state.user_index), dtype=object)
+    for user_id, idx in state.user_index.items():
+        index_to_user[idx] = user_id
+
+    outside: Dict[int, Set[str]] = {}
+    seen = seen_matrix(state, crud.iter_seen_pairs(db), outside)
+    # Popular games ingested since training, for users the model runs short on
+    ranking = [(g, score) for g, score in engine._popularity_ranking(state) if g not in state.game_index]
+    size = block_size(len(state.game_index), memory_mb, state.item_factors.dtype.itemsize)
+    result = BatchGenerationResult(users=0, recommendations=0, blocks=0, elapsed=0.0)
+    started = time.perf_counter()
+
+    def _store(rows: np.ndarray, scored: List[Scored]) -> None:
+        scored = fill_from_popularity(scored, rows, ranking, outside, limit)
+        result.recommendations += crud.bulk_replace_recommendations(
+            db,
+            list(zip(index_to_user[rows].tolist(), scored)),
+            algorithm=algorithm,
+            reason=reason,
+            context={"source": "collaborative"},
+            expires_in_hours=expires_in_hours,
+        )
+        result.users += len(rows)
+        result.blocks += 1
+        result.elapsed = time.perf_counter() - started
+        if progress:
+            progress(result)
+
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(state,))
+        task = _score_in_worker
+    else:
+        executor = _InlineExecutor()
+        task = partial(score_block, state)
+    pending: Deque[Tuple[np.ndarray, Future]] = deque()
+    with executor:
+        for start in range(0, len(user_rows), size):
+            rows = user_rows[start : start + size]
+            pending.append((rows, executor.submit(task, rows, seen[rows], limit)))
+            if len(pending) >= 2 * max(1, workers):
+                rows, future = pending.popleft()
+                _store(rows, future.result())
+        while pending:
+            rows, future = pending.popleft()
+            _store(rows, future.result())
+
+    result.elapsed = time.perf_counter() - started
+    logger.info(
+        "Generated %s recommendations for %s users in %.1fs",
+        result.recommendations,
+        result.users,
+        result.elapsed,
+    )
+    return result
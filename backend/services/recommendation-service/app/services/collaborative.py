@@ -4,15 +4,18 @@ from __future__ import annotations
 import logging
 import os
 import pickle
+import threading
+from contextlib import contextmanager
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, Iterable, List, Sequence, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Sequence, Tuple
 
 import numpy as np
-from scipy import sparse
 from sklearn.decomposition import TruncatedSVD
 
 from ..core.config import settings
+from .similarity import SimilarItemsIndex
+from .training_data import InteractionMatrix, load_interaction_matrix
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +35,61 @@ class _ModelState:
     game_index: Dict[str, int]
     user_factors: np.ndarray
     item_factors: np.ndarray
-    game_popularity: List[Tuple[str, float]]
+    # Best first; None while popularity has updates not yet sorted in
+    game_popularity: List[Tuple[str, float]] | None
     trained_at: datetime = field(default_factory=datetime.utcnow)
+    # Row of item_factors -> game id, the inverse of game_index
+    game_ids: np.ndarray | None = None
+    # Game id -> total interaction score, including games the model has not seen
+    popularity: Dict[str, float] | None = None
+    # Saved separately as .npz, see CollaborativeFilteringEngine.similar_index_path
+    similar_index: SimilarItemsIndex | None = field(default=None, repr=False)
+
+    def __post_init__(self) -> None:
+        self.fill_derived()
+
+    def __getstate__(self) -> dict:
+        state = dict(self.__dict__)
+        state.pop("similar_index", None)
+        return state
+
+    def fill_derived(self) -> None:
+        # Models pickled by older versions are unpickled without these
+        if getattr(self, "game_ids", None) is None:
+            game_ids = np.empty(len(self.game_index), dtype=object)
+            for game_id, idx in self.game_index.items():
+                game_ids[idx] = game_id
+            self.game_ids = game_ids
+        if getattr(self, "popularity", None) is None:
+            self.popularity = dict(self.game_popularity)
+        if not hasattr(self, "similar_index"):
+            self.similar_index = None
+
+    def set_user_factors(self, user_id: str, vector: np.ndarray) -> None:
+        idx = self.user_index.get(user_id)
+        if idx is None:
+            idx = len(self.user_index)
+            if idx == len(self.user_factors):
+                # Grow geometrically so folding in new users stays amortized O(1)
+                grown = np.zeros((max(16, 2 * idx), self.user_factors.shape[1]), dtype=self.user_factors.dtype)
+                grown[:idx] = self.user_factors[:idx]
+                self.user_factors = grown
+            self.user_factors[idx] = vector
+            self.user_index[user_id] = idx
+        else:
+            self.user_factors[idx] = vector
+
+
+@dataclass
+class _OnlineJournal:
+    """Online updates made while a retrain is in progress."""
+
+    users: Dict[str, Mapping[str, float]] = field(default_factory=dict)
+    popularity: Dict[str, float] = field(default_factory=dict)
+
+
+class RetrainInProgress(RuntimeError):
+    """Raised by ``retraining(wait=False)`` while another retrain is running."""
 
 
 class CollaborativeFilteringEngine:
@@ -42,6 +98,12 @@ class CollaborativeFilteringEngine:
     def __init__(self, model_path: str):
         self.model_path = model_path
         self.state: _ModelState | None = None
+        # Options of the last requested retrain; scheduled retrains reuse them
+        self.train_options: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # Held for a whole retrain, so only one at a time owns the journal
+        self._retrain_lock = threading.Lock()
+        self._journal: _OnlineJournal | None = None
         self._load_from_disk()
 
     # ------------------------- persistence ------------------------- #
@@ -50,18 +112,43 @@ class CollaborativeFilteringEngine:
             return
         try:
             with open(self.model_path, "rb") as fh:
-                self.state = pickle.load(fh)
+                state = pickle.load(fh)
+            state.fill_derived()
             logger.info("Loaded collaborative model from %s", self.model_path)
         except Exception as exc:  # pragma: no cover - defensive
             logger.warning("Failed to load recommendation model: %s", exc)
-            self.state = None
+            return
+        state.similar_index = self._load_similar_index(state)
+        self.state = state
+
+    @property
+    def similar_index_path(self) -> str:
+        return os.path.splitext(self.model_path)[0] + ".similar.npz"
+
+    @property
+    def similar_index(self) -> SimilarItemsIndex | None:
+        return self.state.similar_index if self.state else None
+
+    def _load_similar_index(self, state: _ModelState) -> SimilarItemsIndex:
+        if os.path.exists(self.similar_index_path):
+            try:
+                index, meta = SimilarItemsIndex.load(self.similar_index_path)
+                if meta.get("trained_at") == state.trained_at.timestamp():
+                    return index
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.warning("Failed to load similar-games index: %s", exc)
+        # Missing, or left over from another model: rebuild from the factors
+        return SimilarItemsIndex.build(state.item_factors, nlist=settings.CF_SIMILAR_NLIST)
 
     def _persist(self) -> None:
         if not self.model_path:
             return
         os.makedirs(os.path.dirname(self.model_path), exist_ok=True)
-        with open(self.model_path, "wb") as fh:
-            pickle.dump(self.state, fh)
+        state = self.state
+        with self._lock, open(self.model_path, "wb") as fh:
+            pickle.dump(state, fh)
+        if state.similar_index is not None:
+            state.similar_index.save(self.similar_index_path, trained_at=state.trained_at.timestamp())
 
     # ------------------------- training --------------------------- #
     def train(
@@ -74,26 +161,29 @@ class CollaborativeFilteringEngine:
     ) -> TrainingResult:
         if not interactions:
             raise ValueError("No interactions supplied")
+        return self.train_matrix(
+            load_interaction_matrix([interactions], expected_rows=len(interactions)),
+            min_interactions=min_interactions,
+            n_components=n_components,
+            persist=persist,
+        )
+
+    def train_matrix(
+        self,
+        data: InteractionMatrix,
+        *,
+        min_interactions: int | None = None,
+        n_components: int | None = None,
+        persist: bool = True,
+    ) -> TrainingResult:
+        if not data.interactions:
+            raise ValueError("No interactions supplied")
 
         min_required = min_interactions or settings.CF_MIN_INTERACTIONS
-        if len(interactions) < max(2, min_required):
+        if data.interactions < max(2, min_required):
             raise ValueError("Not enough interactions to train the model")
 
-        user_ids = sorted({u for u, _, _ in interactions})
-        game_ids = sorted({g for _, g, _ in interactions})
-
-        user_index = {user_id: idx for idx, user_id in enumerate(user_ids)}
-        game_index = {game_id: idx for idx, game_id in enumerate(game_ids)}
-
-        rows: List[int] = []
-        cols: List[int] = []
-        data: List[float] = []
-        for user_id, game_id, score in interactions:
-            rows.append(user_index[user_id])
-            cols.append(game_index[game_id])
-            data.append(max(score, 0.0))
-
-        matrix = sparse.csr_matrix((data, (rows, cols)), shape=(len(user_ids), len(game_ids)))
+        matrix = data.matrix
         min_dim = min(matrix.shape)
         if min_dim < 2:
             raise ValueError("Insufficient dimensionality for SVD")
@@ -105,32 +195,115 @@ class CollaborativeFilteringEngine:
         user_factors = svd.fit_transform(matrix)
         item_factors = svd.components_.T  # shape (games, k)
 
-        game_popularity = self._compute_popularity(interactions)
-
-        self.state = _ModelState(
-            user_index=user_index,
-            game_index=game_index,
+        state = _ModelState(
+            user_index={user_id: idx for idx, user_id in enumerate(data.user_ids.tolist())},
+            game_index={game_id: idx for idx, game_id in enumerate(data.game_ids.tolist())},
             user_factors=user_factors,
             item_factors=item_factors,
-            game_popularity=game_popularity,
+            game_popularity=data.popularity(),
             trained_at=datetime.utcnow(),
+            game_ids=data.game_ids,
         )
+        state.similar_index = SimilarItemsIndex.build(item_factors, nlist=settings.CF_SIMILAR_NLIST)
+        with self._lock:
+            if self._journal is not None:
+                self._fold_in(state, self._journal.users)
+                self._add_popularity(state, self._journal.popularity)
+                self._journal = None
+            self.state = state
         if persist:
             self._persist()
         return TrainingResult(
-            interactions=len(interactions),
-            users=len(user_ids),
-            games=len(game_ids),
+            interactions=data.interactions,
+            users=matrix.shape[0],
+            games=matrix.shape[1],
             components=components,
-            trained_at=self.state.trained_at,
+            trained_at=state.trained_at,
         )
 
+    @contextmanager
+    def retraining(self, *, wait: bool = True) -> Iterator[None]:
+        """Carry online updates over to the model a retrain inside this block produces.
+
+        Enter it before reading the interactions to train on: updates that
+        arrive while those are read and fitted would otherwise be applied to
+        the old model only, and lost when ``train`` swaps in the new one.
+        Retrains are serialized; with ``wait=False`` a busy engine raises
+        ``RetrainInProgress`` instead of blocking.
+        """
+        if not self._retrain_lock.acquire(blocking=wait):
+            raise RetrainInProgress("A retrain is already running")
+        journal = _OnlineJournal()
+        try:
+            with self._lock:
+                self._journal = journal
+            yield
+        finally:
+            with self._lock:
+                if self._journal is journal:
+                    self._journal = None
+            self._retrain_lock.release()
+
+    # ------------------------- online updates --------------------- #
+    def fold_in(self, user_scores: Mapping[str, Mapping[str, float]]) -> int:
+        """Refresh users' factors from their current interactions, without refitting.
+
+        ``user_scores`` maps each user id to all of that user's game scores.
+        With the item factors V from the last fit, a user's factors are
+        ``x @ V`` for their interaction row ``x``, exactly what the fit gives
+        an existing user, so new users get personalized results immediately.
+        Games the model has not seen yet are ignored until the next retrain.
+        Returns how many users were folded in.
+        """
+        with self._lock:
+            if not self.state:
+                return 0
+            if self._journal is not None:
+                self._journal.users.update(user_scores)
+            return self._fold_in(self.state, user_scores)
+
+    def add_popularity(self, deltas: Mapping[str, float]) -> None:
+        """Add interaction scores to the popularity ranking used for fallbacks."""
+        with self._lock:
+            if not self.state:
+                return
+            if self._journal is not None:
+                for game_id, delta in deltas.items():
+                    self._journal.popularity[game_id] = self._journal.popularity.get(game_id, 0.0) + delta
+            self._add_popularity(self.state, deltas)
+
+    @staticmethod
+    def _fold_in(state: _ModelState, user_scores: Mapping[str, Mapping[str, float]]) -> int:
+        folded = 0
+        for user_id, scores in user_scores.items():
+            known = [(state.game_index[g], max(s, 0.0)) for g, s in scores.items() if g in state.game_index]
+            if not known:
+                continue
+            cols, weights = zip(*known)
+            state.set_user_factors(user_id, np.asarray(weights) @ state.item_factors[list(cols)])
+            folded += 1
+        return folded
+
     @staticmethod
-    def _compute_popularity(interactions: Sequence[Tuple[str, str, float]]) -> List[Tuple[str, float]]:
-        popularity: Dict[str, float] = {}
-        for _, game_id, score in interactions:
-            popularity[game_id] = popularity.get(game_id, 0.0) + score
-        return sorted(popularity.items(), key=lambda item: item[1], reverse=True)
+    def _add_popularity(state: _ModelState, deltas: Mapping[str, float]) -> None:
+        if not deltas:
+            return
+        for game_id, delta in deltas.items():
+            state.popularity[game_id] = state.popularity.get(game_id, 0.0) + delta
+        # Re-sorted on the next read that needs it, not on every ingest
+        state.game_popularity = None
+
+    def _popularity_ranking(self, state: _ModelState) -> List[Tuple[str, float]]:
+        ranking = state.game_popularity
+        if ranking is None:
+            with self._lock:
+                if state.game_popularity is None:
+                    game_ids = list(state.popularity)
+                    scores = np.fromiter(state.popularity.values(), dtype=float, count=len(game_ids))
+                    order = np.argsort(-scores, kind="stable")
+                    state.game_popularity = [(game_ids[i], float(scores[i])) for i in order]
+                ranking = state.game_popularity
+        return ranking
 
     # ------------------------- inference -------------------------- #
     def is_ready(self) -> bool:
@@ -143,37 +316,63 @@ class CollaborativeFilteringEngine:
         *,
         limit: int = 20,
     ) -> List[Tuple[str, float]]:
-        if not self.state:
+        state = self.state
+        if not state:
             raise ValueError("Model is not trained")
 
         limit = max(1, min(limit, settings.CF_MAX_RECOMMENDATIONS))
         exclude = set(exclude_games)
         recommendations: List[Tuple[str, float]] = []
 
-        if user_id in self.state.user_index:
-            user_idx = self.state.user_index[user_id]
-            user_vector = self.state.user_factors[user_idx]
-            scores = self.state.item_factors @ user_vector
-            game_ids = list(self.state.game_index.keys())
-            scored = [
-                (game_id, float(scores[self.state.game_index[game_id]]))
-                for game_id in game_ids
-                if game_id not in exclude
-            ]
-            scored.sort(key=lambda item: item[1], reverse=True)
-            recommendations.extend(scored[:limit])
+        user_idx = state.user_index.get(user_id)
+        if user_idx is not None:
+            scores = state.item_factors @ state.user_factors[user_idx]
+            recommendations = self._top_k(state, scores, exclude, limit)
 
         if len(recommendations) < limit:
-            for game_id, score in self.state.game_popularity:
-                if game_id in exclude:
-                    continue
-                if any(rec[0] == game_id for rec in recommendations):
+            taken = exclude.union(game_id for game_id, _ in recommendations)
+            for game_id, score in self._popularity_ranking(state):
+                if game_id in taken:
                     continue
                 recommendations.append((game_id, score))
                 if len(recommendations) >= limit:
                     break
-        return recommendations[:limit]
+        return recommendations
+
+    @staticmethod
+    def _top_k(state: _ModelState, scores: np.ndarray, exclude: set[str], limit: int) -> List[Tuple[str, float]]:
+        """Highest scoring games not in ``exclude``, best first."""
+        game_index = state.game_index
+        excluded = [game_index[game_id] for game_id in exclude if game_id in game_index]
+        if excluded:
+            mask = np.zeros(scores.shape[0], dtype=bool)
+            mask[excluded] = True
+            scores = np.where(mask, -np.inf, scores)
+        k = min(limit, scores.shape[0] - len(excluded))
+        if k <= 0:
+            return []
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        # Only the k winners are sorted; ties keep game_index order
+        top = top[np.lexsort((top, -scores[top]))]
+        return list(zip(state.game_ids[top].tolist(), scores[top].tolist()))
+
+    def similar_games(self, game_id: str, *, limit: int = 10) -> List[Tuple[str, float]]:
+        """Games whose item vectors are closest to ``game_id``'s, by cosine similarity."""
+        state = self.state
+        if not state or state.similar_index is None:
+            raise ValueError("Model is not trained")
+        game_idx = state.game_index.get(game_id)
+        if game_idx is None:
+            raise KeyError(game_id)
+        limit = max(1, min(limit, settings.CF_MAX_RECOMMENDATIONS))
+        items, scores = state.similar_index.search(
+            state.similar_index.item_vector(game_idx), limit + 1, nprobe=settings.CF_SIMILAR_NPROBE
+        )
+        keep = items != game_idx
+        return list(zip(state.game_ids[items[keep]][:limit].tolist(), scores[keep][:limit].tolist()))
 
 
 cf_engine = CollaborativeFilteringEngine(settings.RECOMMENDATION_MODEL_PATH)
-
@@ -0,0 +1,125 @@
+"""Keep the CF model current between full retrains.
+
+Each ``/interactions`` batch is applied to the loaded model right away: the
+touched users are folded in from their stored interaction rows and the games'
+popularity is bumped, so new users get personalized results and trending games
+reach cold-start fallbacks within the request. ``ModelRefresher`` still runs a
+full ``TruncatedSVD`` fit from every stored interaction on a schedule, which is
+what picks up new games and re-balances the item factors. Scheduled fits reuse
+the options of the last ``/train`` call and skip their turn while one runs.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Callable, Dict
+
+from sqlalchemy.orm import Session
+
+from .. import crud, schemas
+from ..core.config import settings
+from ..database import SessionLocal
+from .collaborative import CollaborativeFilteringEngine, RetrainInProgress, TrainingResult, cf_engine
+from .training_data import load_interaction_matrix
+
+logger = logging.getLogger(__name__)
+
+
+def apply_interactions(
+    db: Session,
+    batch: schemas.InteractionBatch,
+    *,
+    engine: CollaborativeFilteringEngine = cf_engine,
+) -> int:
+    """Fold an ingested batch into the loaded model. Returns how many users were folded in."""
+    if not settings.CF_ONLINE_UPDATES or not engine.is_ready():
+        return 0
+    deltas: Dict[str, float] = {}
+    for event in batch.interactions:
+        weight = crud.interaction_weight(event.event_type, event.weight)
+        deltas[event.game_id] = deltas.get(event.game_id, 0.0) + weight
+    engine.add_popularity(deltas)
+    user_ids = {event.user_id for event in batch.interactions}
+    return engine.fold_in(crud.get_users_game_scores(db, user_ids))
+
+
+def retrain(
+    db: Session,
+    *,
+    engine: CollaborativeFilteringEngine = cf_engine,
+    wait: bool = True,
+    **train_options,
+) -> TrainingResult:
+    """Fit the model from every stored interaction, keeping online updates made meanwhile.
+
+    Waits for a retrain already in progress unless ``wait`` is False, in which
+    case ``RetrainInProgress`` is raised. The options of a successful fit are
+    kept on the engine for ``ModelRefresher``.
+    """
+    with engine.retraining(wait=wait):
+        data = load_interaction_matrix(
+            crud.iter_interaction_batches(db, settings.CF_TRAINING_BATCH_SIZE),
+            expected_rows=crud.count_training_interactions(db),
+        )
+        result = engine.train_matrix(data, **train_options)
+    engine.train_options = dict(train_options)
+    return result
+
+
+class ModelRefresher:
+    """Runs ``retrain`` every ``interval`` seconds in a daemon thread.
+
+    Each run uses the engine's last ``/train`` options and is skipped if a
+    retrain is already running.
+    """
+
+    def __init__(
+        self,
+        engine: CollaborativeFilteringEngine = cf_engine,
+        *,
+        interval: int | None = None,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.engine = engine
+        self.interval = settings.CF_RETRAIN_INTERVAL_SECONDS if interval is None else interval
+        self.session_factory = session_factory
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="cf-model-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self) -> TrainingResult | None:
+        with self.session_factory() as db:
+            try:
+                result = retrain(db, engine=self.engine, wait=False, **self.engine.train_options)
+            except (RetrainInProgress, ValueError) as exc:
+                logger.info("Skipping scheduled retrain: %s", exc)
+                return None
+        logger.info(
+            "Retrained collaborative model: %s users, %s games from %s interactions",
+            result.users,
+            result.games,
+            result.interactions,
+        )
+        return result
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:  # pragma: no cover - keep the schedule alive
+                logger.exception("Scheduled retrain failed")
+
+
+model_refresher = ModelRefresher()
@@ -0,0 +1,67 @@
+"""``SimilarItemsIndex`` query latency and recall against brute-force cosine.
+
+    python benchmarks/bench_similar.py [--games 100000] [--components 40] [--nlist 0]
+
+Item factors are synthetic: games drawn around ``--clusters`` genre-like
+centres, roughly how CF factors group. Brute force is the exact top ``--k``
+over every normalised vector, i.e. one ``vectors @ query`` plus argpartition.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np  # noqa: E402
+
+from app.services.similarity import SimilarItemsIndex  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=100_000)
+    parser.add_argument("--components", type=int, default=40)
+    parser.add_argument("--clusters", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.5, help="Spread around each centre")
+    parser.add_argument("--nlist", type=int, default=0, help="0 for sqrt(games)")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(11)
+    centers = rng.standard_normal((args.clusters, args.components))
+    factors = centers[rng.integers(args.clusters, size=args.games)]
+    factors += args.noise * rng.standard_normal((args.games, args.components))
+
+    started = time.perf_counter()
+    index = SimilarItemsIndex.build(factors, nlist=args.nlist or None)
+    print(f"{args.games} games, {args.components} components, nlist {index.nlist}, "
+          f"built in {time.perf_counter() - started:.1f}s\n")
+
+    queries = rng.choice(args.games, args.queries, replace=False)
+    vectors = [index.item_vector(item) for item in queries]
+    exact, samples = [], []
+    for query in vectors:
+        begin = time.perf_counter()
+        items, _ = index.search(query, args.k, nprobe=index.nlist)
+        samples.append((time.perf_counter() - begin) * 1000)
+        exact.append(set(items.tolist()))
+    print(f"{'nprobe':>8}{'median ms':>12}{'p99 ms':>10}{'recall@' + str(args.k):>12}")
+    print(f"{'all':>8}{statistics.median(samples):>12.3f}{np.percentile(samples, 99):>10.3f}{1.0:>12.3f}")
+    for nprobe in (1, 4, 8, 16, 32):
+        hits, samples = 0, []
+        for query, truth in zip(vectors, exact):
+            begin = time.perf_counter()
+            items, _ = index.search(query, args.k, nprobe=nprobe)
+            samples.append((time.perf_counter() - begin) * 1000)
+            hits += len(truth & set(items.tolist()))
+        recall = hits / (args.k * len(vectors))
+        print(f"{nprobe:>8}{statistics.median(samples):>12.3f}{np.percentile(samples, 99):>10.3f}{recall:>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
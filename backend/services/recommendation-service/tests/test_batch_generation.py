@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import models
+from app.database import SessionLocal, init_db
+from app.services.batch_generation import generate_for_all_users, score_block, seen_matrix
+from app.services.collaborative import CollaborativeFilteringEngine
+
+
+@pytest.fixture
+def trained(tmp_path):
+    engine = CollaborativeFilteringEngine(str(tmp_path / "cf.pkl"))
+    interactions = [(f"u{u}", f"g{g}", float((u * g) % 5 + 1)) for u in range(12) for g in range(15) if (u + g) % 3]
+    engine.train(interactions, n_components=4, persist=False)
+    return engine, interactions
+
+
+def test_score_block_matches_single_user_recommend(trained):
+    engine, interactions = trained
+    state = engine.state
+    seen = seen_matrix(state, [(u, g) for u, g, _ in interactions])
+    rows = np.arange(len(state.user_index))
+
+    for limit in (3, 15):
+        block = score_block(state, rows, seen[rows], limit)
+        for user_id, idx in state.user_index.items():
+            seen_games = {g for u, g, _ in interactions if u == user_id}
+            expected = engine.recommend(user_id, seen_games, limit=limit)
+            assert [g for g, _ in block[idx]] == [g for g, _ in expected]
+            assert [s for _, s in block[idx]] == pytest.approx([s for _, s in expected])
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_generate_for_all_users_replaces_active_rows(trained, workers):
+    engine, interactions = trained
+    init_db()
+    with SessionLocal() as db:
+        db.query(models.Recommendation).delete()
+        db.query(models.UserGameInteraction).delete()
+        db.add_all(models.UserGameInteraction(user_id=u, game_id=g, score=s) for u, g, s in interactions)
+        db.add(models.Recommendation(user_id="u1", game_id="stale", score=1.0, rank=1))
+        db.commit()
+
+        for _ in range(2):  # a second run upserts over the first
+            result = generate_for_all_users(db, engine=engine, limit=3, workers=workers, memory_mb=1)
+        assert result.users == 12
+        assert result.recommendations == 36
+
+        active = (
+            db.query(models.Recommendation)
+            .filter(models.Recommendation.user_id == "u1", models.Recommendation.is_active == True)  # noqa: E712
+            .order_by(models.Recommendation.rank)
+            .all()
+        )
+        seen_games = {g for u, g, _ in interactions if u == "u1"}
+        assert [rec.game_id for rec in active] == [g for g, _ in engine.recommend("u1", seen_games, limit=3)]
+        stale = db.query(models.Recommendation).filter_by(user_id="u1", game_id="stale").one()
+        assert stale.is_active is False
+
+
+def test_generate_fills_from_games_added_since_training(trained):
+    engine, interactions = trained
+    engine.add_popularity({"new-hit": 1000.0, "new-niche": 1.0})
+    # u1 already played one of the new games; it is outside the model, so only the seen pairs know
+    played = [*interactions, ("u1", "new-hit", 5.0)]
+    init_db()
+    with SessionLocal() as db:
+        db.query(models.Recommendation).delete()
+        db.query(models.UserGameInteraction).delete()
+        db.add_all(models.UserGameInteraction(user_id=u, game_id=g, score=s) for u, g, s in played)
+        db.commit()
+
+        generate_for_all_users(db, engine=engine, limit=15, workers=0)
+        for user_id in ("u0", "u1"):
+            stored = (
+                db.query(models.Recommendation.game_id)
+                .filter(models.Recommendation.user_id == user_id, models.Recommendation.is_active == True)  # noqa: E712
+                .order_by(models.Recommendation.rank)
+                .all()
+            )
+            seen_games = {g for u, g, _ in played if u == user_id}
+            expected = engine.recommend(user_id, seen_games, limit=15)
+            assert [game_id for game_id, in stored] == [g for g, _ in expected]
+            assert ("new-hit" in seen_games) != ("new-hit" in {g for g, _ in expected})
@@ -23,3 +23,39 @@ def test_engine_trains_and_recommends(tmp_path):
     assert len(recs) == 1
     assert recs[0][0] == "g3"
 
+
+def test_recommend_matches_full_ranking_and_fills_from_popularity(tmp_path):
+    engine = CollaborativeFilteringEngine(str(tmp_path / "cf.pkl"))
+    interactions = [(f"u{u}", f"g{g}", float((u * g) % 5 + 1)) for u in range(6) for g in range(8) if (u + g) % 3]
+    engine.train(interactions, n_components=3, persist=False)
+    state = engine.state
+
+    scores = state.item_factors @ state.user_factors[state.user_index["u1"]]
+    ranked = sorted(
+        ((game_id, float(scores[idx])) for game_id, idx in state.game_index.items() if game_id not in {"g2", "g5"}),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+    assert engine.recommend("u1", {"g2", "g5", "unknown"}, limit=4) == ranked[:4]
+
+    # Every unseen game is a candidate; popularity must not repeat any of them
+    recs = engine.recommend("u1", {"g0", "g1", "g2", "g3", "g4", "g5"}, limit=5)
+    assert sorted(game_id for game_id, _ in recs) == ["g6", "g7"]
+
+    cold = engine.recommend("nobody", {"g0"}, limit=3)
+    assert [game_id for game_id, _ in cold] == [g for g, _ in state.game_popularity if g != "g0"][:3]
+
+
+def test_model_pickled_without_game_ids_still_recommends(tmp_path):
+    model_path = tmp_path / "cf.pkl"
+    engine = CollaborativeFilteringEngine(str(model_path))
+    engine.train(
+        [("u1", "g1", 5.0), ("u1", "g2", 3.0), ("u2", "g2", 4.0), ("u2", "g3", 5.0), ("u3", "g1", 4.0)],
+        n_components=2,
+    )
+    expected = engine.recommend("u1", set(), limit=3)
+
+    del engine.state.__dict__["game_ids"]
+    engine._persist()
+    reloaded = CollaborativeFilteringEngine(str(model_path))
+    assert reloaded.recommend("u1", set(), limit=3) == expected
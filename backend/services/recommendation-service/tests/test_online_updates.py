@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import crud, models, schemas
+from app.database import SessionLocal, init_db
+from app.services.collaborative import CollaborativeFilteringEngine, RetrainInProgress
+from app.services.online_updates import ModelRefresher, apply_interactions, retrain
+
+INTERACTIONS = [(f"u{u}", f"g{g}", float((u * g) % 5 + 1)) for u in range(10) for g in range(12) if (u + g) % 3]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = CollaborativeFilteringEngine(str(tmp_path / "cf.pkl"))
+    engine.train(INTERACTIONS, n_components=4, persist=False)
+    return engine
+
+
+def _scores(user_id):
+    return {g: s for u, g, s in INTERACTIONS if u == user_id}
+
+
+def test_fold_in_matches_fitted_factors_and_adds_new_users(engine):
+    trained = engine.state.user_factors[engine.state.user_index["u4"]].copy()
+    assert engine.fold_in({"u4": _scores("u4")}) == 1
+    assert engine.state.user_factors[engine.state.user_index["u4"]] == pytest.approx(trained)
+
+    assert engine.fold_in({"new": {"g1": 5.0, "g2": 3.0, "unknown": 1.0}, "cold": {"unknown": 2.0}}) == 1
+    assert "cold" not in engine.state.user_index
+    state = engine.state
+    vector = 5.0 * state.item_factors[state.game_index["g1"]] + 3.0 * state.item_factors[state.game_index["g2"]]
+    recs = engine.recommend("new", {"g1", "g2"}, limit=3)
+    scores = state.item_factors @ vector
+    assert [s for _, s in recs] == pytest.approx(sorted(np.delete(scores, [1, 4]), reverse=True)[:3])
+
+
+def test_popularity_updates_reach_fallback_and_survive_retrain(engine):
+    engine.add_popularity({"brand-new": 1000.0})
+    assert engine.recommend("cold", set(), limit=1)[0] == ("brand-new", 1000.0)
+
+    with engine.retraining():
+        engine.fold_in({"late": {"g3": 4.0}})
+        engine.add_popularity({"brand-new": 5.0})
+        engine.train(INTERACTIONS, n_components=4, persist=False)
+    assert "late" in engine.state.user_index
+    assert ("brand-new", 5.0) in engine.recommend("cold", set(), limit=20)
+
+
+def test_apply_interactions_folds_in_ingested_users(engine):
+    init_db()
+    with SessionLocal() as db:
+        db.query(models.UserGameInteraction).delete()
+        db.commit()
+        batch = schemas.InteractionBatch(
+            interactions=[
+                schemas.InteractionEvent(user_id="fresh", game_id="g2", event_type="purchased"),
+                schemas.InteractionEvent(user_id="fresh", game_id="g5", event_type="played"),
+            ]
+        )
+        crud.ingest_interactions(db, batch)
+        assert apply_interactions(db, batch, engine=engine) == 1
+
+    state = engine.state
+    expected = 5.0 * state.item_factors[state.game_index["g2"]] + 3.0 * state.item_factors[state.game_index["g5"]]
+    assert state.user_factors[state.user_index["fresh"]] == pytest.approx(expected)
+
+
+def _store_interactions():
+    init_db()
+    with SessionLocal() as db:
+        db.query(models.UserGameInteraction).delete()
+        db.commit()
+        events = [
+            schemas.InteractionEvent(user_id=u, game_id=g, event_type="played", weight=s)
+            for u, g, s in INTERACTIONS
+        ]
+        crud.ingest_interactions(db, schemas.InteractionBatch(interactions=events))
+
+
+def test_retrains_are_serialized(engine):
+    refresher = ModelRefresher(engine, interval=0)
+    with engine.retraining():
+        with pytest.raises(RetrainInProgress):
+            with engine.retraining(wait=False):
+                pass
+        # The scheduled retrain skips its turn instead of clobbering this one
+        assert refresher.run_once() is None
+    with engine.retraining(wait=False):
+        pass
+
+
+def test_scheduled_retrain_reuses_last_train_options(engine):
+    _store_interactions()
+    with SessionLocal() as db:
+        assert retrain(db, engine=engine, n_components=3, persist=False).components == 3
+    assert engine.train_options == {"n_components": 3, "persist": False}
+
+    result = ModelRefresher(engine, interval=0).run_once()
+    assert result is not None and result.components == 3
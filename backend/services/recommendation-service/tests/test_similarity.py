@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import numpy as np
+
+from app.services.collaborative import CollaborativeFilteringEngine
+from app.services.similarity import SimilarItemsIndex
+
+
+def _clustered_factors(n: int = 5000, dims: int = 16, clusters: int = 50, seed: int = 3) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dims))
+    return centers[rng.integers(clusters, size=n)] + 0.4 * rng.standard_normal((n, dims))
+
+
+def test_ivf_recall_against_brute_force():
+    factors = _clustered_factors()
+    index = SimilarItemsIndex.build(factors)
+    normalized = factors / np.linalg.norm(factors, axis=1, keepdims=True)
+
+    hits = 0
+    queries = np.random.default_rng(4).choice(len(factors), 200, replace=False)
+    for item in queries:
+        exact = np.argsort(-(normalized @ normalized[item]))[:10]
+        approx, scores = index.search(index.item_vector(item), 10, nprobe=8)
+        assert np.all(np.diff(scores) <= 0)
+        hits += len(set(exact) & set(approx))
+    assert hits / (10 * len(queries)) >= 0.9
+
+    exact_items, _ = index.search(index.item_vector(7), 10, nprobe=index.nlist)
+    assert list(exact_items) == list(np.argsort(-(normalized @ normalized[7]))[:10])
+
+
+def test_engine_persists_similar_index_next_to_model(tmp_path):
+    model_path = tmp_path / "cf.pkl"
+    engine = CollaborativeFilteringEngine(str(model_path))
+    interactions = [(f"u{u}", f"g{g}", float((u * g) % 5 + 1)) for u in range(20) for g in range(30) if (u + g) % 4]
+    engine.train(interactions, n_components=5)
+    similar = engine.similar_games("g3", limit=5)
+    assert len(similar) == 5
+    assert "g3" not in {game_id for game_id, _ in similar}
+
+    assert (tmp_path / "cf.similar.npz").exists()
+    reloaded = CollaborativeFilteringEngine(str(model_path))
+    assert reloaded.similar_games("g3", limit=5) == similar
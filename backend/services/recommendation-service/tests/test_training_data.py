@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from app import crud, models
+from app.database import SessionLocal, init_db
+from app.services.collaborative import CollaborativeFilteringEngine
+from app.services.online_updates import retrain
+from app.services.training_data import load_interaction_matrix
+
+
+def _interactions(n: int = 2000, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    pairs = {(f"user-{rng.integers(300)}", f"game-{rng.integers(150)}") for _ in range(n)}
+    return [(u, g, float(rng.integers(1, 10))) for u, g in sorted(pairs, key=lambda p: rng.random())]
+
+
+def test_batched_loader_matches_row_by_row_build():
+    interactions = _interactions()
+    batches = [interactions[i : i + 97] for i in range(0, len(interactions), 97)]
+    data = load_interaction_matrix(batches, expected_rows=10)
+
+    user_ids = sorted({u for u, _, _ in interactions})
+    game_ids = sorted({g for _, g, _ in interactions})
+    assert data.user_ids.tolist() == user_ids
+    assert data.game_ids.tolist() == game_ids
+    assert data.interactions == len(interactions)
+
+    dense = np.zeros((len(user_ids), len(game_ids)))
+    for u, g, s in interactions:
+        dense[user_ids.index(u), game_ids.index(g)] += s
+    assert np.array_equal(data.matrix.toarray(), dense)
+
+    totals = dict(data.popularity())
+    assert totals == pytest.approx({g: dense[:, j].sum() for j, g in enumerate(game_ids)})
+
+
+def test_retrain_streams_the_same_model_as_train(tmp_path):
+    interactions = _interactions(500)
+    init_db()
+    with SessionLocal() as db:
+        db.query(models.UserGameInteraction).delete()
+        db.add_all(models.UserGameInteraction(user_id=u, game_id=g, score=s) for u, g, s in interactions)
+        db.add(models.UserGameInteraction(user_id="ignored", game_id="game-0", score=0.0))
+        db.commit()
+        streamed = CollaborativeFilteringEngine(str(tmp_path / "a.pkl"))
+        retrain(db, engine=streamed, n_components=5, persist=False)
+        listed = CollaborativeFilteringEngine(str(tmp_path / "b.pkl"))
+        listed.train(crud.list_interaction_tuples(db), n_components=5, persist=False)
+
+    assert streamed.state.user_index == listed.state.user_index
+    assert streamed.state.game_index == listed.state.game_index
+    assert np.allclose(streamed.state.item_factors, listed.state.item_factors)
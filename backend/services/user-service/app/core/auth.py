@@ -7,10 +7,15 @@ removal.
 """
 from __future__ import annotations
 
+import base64
+import hashlib
+import hmac
+import json
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
@@ -51,17 +56,55 @@ def create_access_token(
     return encoded_jwt
 
 
-def verify_token(token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
-    """Decode and validate a JWT token, returning the payload."""
+def _unb64(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+# Each service image is built from its own directory, so user-service/app/core/auth.py and
+# friends-chat-service/app/auth.py carry identical copies; api-gateway/tests/test_auth.py
+# checks they match and accept what the gateway signs.
+def verify_internal_identity(header: str | None) -> Optional[Dict[str, Any]]:
+    """Return the claims from a gateway-signed ``X-Internal-Identity`` header.
+
+    Returns None when the header is absent, unsigned, forged or expired, in
+    which case callers fall back to decoding the bearer token themselves.
+    """
+    secret = settings.INTERNAL_IDENTITY_SECRET
+    if not secret or not header or "." not in header:
+        return None
+    payload, signature = header.rsplit(".", 1)
+    expected = hmac.new(secret.encode(), payload.encode("ascii", "ignore"), hashlib.sha256).digest()
+    try:
+        if not hmac.compare_digest(_unb64(signature), expected):
+            return None
+        claims = json.loads(_unb64(payload))
+    except ValueError:
+        return None
+    if not isinstance(claims, dict):
+        return None
+    exp = claims.get("exp")
+    if isinstance(exp, (int, float)) and exp <= time.time():
+        return None
+    return claims
+
+
+def verify_token(request: Request, token: str = Depends(oauth2_scheme)) -> Dict[str, Any]:
+    """Decode and validate a JWT token, returning the payload.
+
+    Claims already verified by the API gateway are taken from its signed
+    identity header, skipping the JWT decode.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-    except JWTError:
-        raise credentials_exception
+    payload = verify_internal_identity(request.headers.get("x-internal-identity"))
+    if payload is None:
+        try:
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            raise credentials_exception
     if "user_id" not in payload:
         raise credentials_exception
     return payload
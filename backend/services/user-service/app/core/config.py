@@ -47,6 +47,8 @@ class Settings:
     ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     TOKEN_URL: str = os.getenv("TOKEN_URL", "/api/v1/users/login")
+    # Shared with the API gateway to trust its signed X-Internal-Identity header.
+    INTERNAL_IDENTITY_SECRET: str = os.getenv("INTERNAL_IDENTITY_SECRET", "")
 
     ALLOWED_ORIGINS: List[str] = field(
         default_factory=lambda: _parse_allowed_origins(os.getenv("ALLOWED_ORIGINS"))